@@ -0,0 +1,185 @@
+#----------------------------------------------------------------------------#
+# JSON API.
+#
+#   GET /api/v1/venues?fields=id,name,city&limit=100&cursor=<next_cursor>
+#   GET /api/v1/venues/<id>?fields=name,genres
+#   GET /api/v1/artists, /api/v1/artists/<id>
+#   GET /api/v1/artists/<id>/availability
+#   GET /api/v1/shows?fields=start_time,venue_name&from=2035-01-01&venue_id=3
+#
+# ``fields`` selects the columns returned (and the only ones queried; the id
+# is always included), listings are keyset paginated in id order (start
+# time order for shows) and bodies are encoded with orjson when it is
+# installed.
+#----------------------------------------------------------------------------#
+
+import json
+from datetime import date, datetime, time
+
+from flask import Blueprint, Response, current_app, request
+from sqlalchemy import tuple_
+
+from clock import as_utc
+from listings import format_cursor, parse_cursor
+from models import Artist, Show, ArtistAvailability
+from schemas import venue_schema, artist_schema, show_schema, availability_schema
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(data):
+    """``data`` as JSON bytes. Datetimes and times are ISO 8601 strings
+    either way."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_json_default, separators=(',', ':')).encode()
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+class InvalidRequest(ValueError):
+    pass
+
+
+@api.errorhandler(InvalidRequest)
+def bad_request(error):
+    return json_response({'error': str(error)}, 400)
+
+
+def not_found(kind, id):
+    return json_response({'error': f'No {kind} with id {id}.'}, 404)
+
+
+def requested_fields(schema):
+    try:
+        return schema.parse_fields(request.args.get('fields', ''))
+    except ValueError as e:
+        raise InvalidRequest(e)
+
+
+def page_limit():
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return min(max(limit, 1), current_app.config['API_PAGE_MAX'])
+
+
+def datetime_arg(name):
+    # Without an offset the value is UTC
+    value = request.args.get(name)
+    try:
+        return as_utc(datetime.fromisoformat(value)) if value else None
+    except ValueError:
+        raise InvalidRequest(f'{name} must be an ISO 8601 date or datetime.')
+
+
+def page(schema, query, fields, limit, cursor_of):
+    """Rows of ``query`` (already ordered and filtered past the cursor) as
+    the response body of one page."""
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = cursor_of(rows[-1])
+    return {'data': [schema.dump(row, fields) for row in rows], 'next_cursor': next_cursor}
+
+
+#  Venues and artists
+#  ----------------------------------------------------------------
+
+def entity_list(schema, filters):
+    fields = requested_fields(schema)
+    model = schema.model
+    query = schema.query(fields)
+    for name in filters:
+        if request.args.get(name):
+            query = query.filter(getattr(model, name) == request.args[name])
+    cursor = request.args.get('cursor')
+    if cursor:
+        if not cursor.isdigit():
+            raise InvalidRequest('Malformed cursor.')
+        query = query.filter(model.id > int(cursor))
+    query = query.order_by(model.id)
+    return json_response(page(schema, query, fields, page_limit(), lambda row: str(row.id)))
+
+
+def entity(schema, id):
+    fields = requested_fields(schema)
+    row = schema.query(fields).filter(schema.model.id == id).first()
+    if row is None:
+        return not_found(schema.model.__tablename__, id)
+    return json_response(schema.dump(row, fields))
+
+
+@api.route('/venues')
+def venues():
+    return entity_list(venue_schema, ('city', 'state'))
+
+
+@api.route('/venues/<int:venue_id>')
+def venue(venue_id):
+    return entity(venue_schema, venue_id)
+
+
+@api.route('/artists')
+def artists():
+    return entity_list(artist_schema, ('city', 'state'))
+
+
+@api.route('/artists/<int:artist_id>')
+def artist(artist_id):
+    return entity(artist_schema, artist_id)
+
+
+@api.route('/artists/<int:artist_id>/availability')
+def artist_availability(artist_id):
+    if Artist.query.with_entities(Artist.id).filter(Artist.id == artist_id).first() is None:
+        return not_found('artist', artist_id)
+    fields = requested_fields(availability_schema)
+    rows = availability_schema.query(fields).filter(
+        ArtistAvailability.artist_id == artist_id
+    ).order_by(ArtistAvailability.day_of_week, ArtistAvailability.start_time).all()
+    return json_response({'data': [availability_schema.dump(row, fields) for row in rows]})
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@api.route('/shows')
+def shows():
+    # Filtered by venue_id, artist_id and a from/to start time range, in
+    # (start_time, id) order like the /shows page
+    fields = requested_fields(show_schema)
+    # The cursor needs each row's start time
+    selected = fields if 'start_time' in fields else fields + ['start_time']
+    query = show_schema.query(selected)
+    for name in ('venue_id', 'artist_id'):
+        value = request.args.get(name, type=int)
+        if value is not None:
+            query = query.filter(getattr(Show, name) == value)
+    start, end = datetime_arg('from'), datetime_arg('to')
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = parse_cursor(cursor)
+        except ValueError:
+            raise InvalidRequest('Malformed cursor.')
+        query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(*after))
+    query = query.order_by(Show.start_time, Show.id)
+    return json_response(page(show_schema, query, fields, page_limit(),
+                              lambda row: format_cursor(row.start_time, row.id)))
@@ -0,0 +1,337 @@
+#----------------------------------------------------------------------------#
+# Artist pages: the listing, search, the artist page and the create and edit
+# forms.
+#----------------------------------------------------------------------------#
+
+from flask import (Blueprint, Response, abort, current_app, flash, make_response, redirect,
+                   render_template, request, url_for)
+from flask_wtf.csrf import generate_csrf
+
+from cache import response_cache
+from database import db, reads_primary, reads_replica
+from forms import ArtistForm
+from listings import artist_names, entity_detail, entity_version, touch_counterparts
+from models import Artist, Venue
+from pages import (show_pages, detail_cache_key, page_validators, not_modified,
+                   with_validators, search_page)
+from schemas import artist_schema
+from search import search_results
+from writes import (COUNTERPART_COLUMNS, availability_windows, create_artist, form_fields,
+                    replace_availabilities, update_entity)
+
+artist_views = Blueprint('artists', __name__)
+
+#  Artists
+#  ----------------------------------------------------------------
+@artist_views.route('/artists')
+def artists():
+    # TODO: replace with real data returned from querying the database
+    # data=[{
+    #     "id": 4,
+    #     "name": "Guns N Petals",
+    # }, {
+    #     "id": 5,
+    #     "name": "Matt Quevedo",
+    # }, {
+    #     "id": 6,
+    #     "name": "The Wild Sax Band",
+    # }]
+    data = []
+    try:
+        # Query all artists and format them as needed
+        data = response_cache.cached('artists', '', ('artists',), artist_names)
+    except Exception:
+        current_app.logger.exception('Error loading artists')
+        db.session.rollback()
+        flash('An error occurred loading artists.')
+    finally:
+        db.session.close()
+    return render_template('pages/artists.html', artists=data)
+
+@artist_views.route('/artists/search', methods=['POST'])
+@reads_replica
+def search_artists():
+    # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+    # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+    # search for "band" should return "The Wild Sax Band".
+    
+    # Original response data for reference:
+    # response={
+    #     "count": 1,
+    #     "data": [{
+    #         "id": 4,
+    #         "name": "Guns N Petals",
+    #         "num_upcoming_shows": 0,
+    #     }]
+    # }
+
+    search_term = request.form.get('search_term', '')
+    limit, offset = search_page()
+
+    # Matches and their upcoming show counts come back from a single query
+    response = search_results(Artist, search_term, limit, offset)
+    
+    return render_template('pages/search_artists.html', 
+                         results=response, 
+                         search_term=search_term)
+
+@artist_views.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+    # shows the artist page with the given artist_id
+    # TODO: replace with real artist data from the artist table, using artist_id
+    
+    # Original mock data for reference:
+    # data1={
+      # "id": 4,
+      # "name": "Guns N Petals",
+      # "genres": ["Rock n Roll"],
+      # "city": "San Francisco",
+      # "state": "CA",
+      # "phone": "326-123-5000",
+      # "website": "https://www.gunsnpetalsband.com",
+      # "facebook_link": "https://www.facebook.com/GunsNPetals",
+      # "seeking_venue": True,
+      # "seeking_description": "Looking for shows to perform at in the San Francisco Bay Area!",
+      # "image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80",
+      # "past_shows": [{
+        # "venue_id": 1,
+        # "venue_name": "The Musical Hop",
+        # "venue_image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60",
+        # "start_time": "2019-05-21T21:30:00.000Z"
+      # }],
+      # "upcoming_shows": [],
+      # "past_shows_count": 1,
+      # "upcoming_shows_count": 0,
+    # }
+    # data2={
+      # "id": 5,
+      # "name": "Matt Quevedo",
+      # "genres": ["Jazz"],
+      # "city": "New York",
+      # "state": "NY",
+      # "phone": "300-400-5000",
+      # "facebook_link": "https://www.facebook.com/mattquevedo923251523",
+      # "seeking_venue": False,
+      # "image_link": "https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80",
+      # "past_shows": [{
+        # "venue_id": 3,
+        # "venue_name": "Park Square Live Music & Coffee",
+        # "venue_image_link": "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80",
+        # "start_time": "2019-06-15T23:00:00.000Z"
+      # }],
+      # "upcoming_shows": [],
+      # "past_shows_count": 1,
+      # "upcoming_shows_count": 0,
+    # }
+    # data3={
+      # "id": 6,
+      # "name": "The Wild Sax Band",
+      # "genres": ["Jazz", "Classical"],
+      # "city": "San Francisco",
+      # "state": "CA",
+      # "phone": "432-325-5432",
+      # "seeking_venue": False,
+      # "image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+      # "past_shows": [],
+      # "upcoming_shows": [{
+        # "venue_id": 3,
+        # "venue_name": "Park Square Live Music & Coffee",
+        # "venue_image_link": "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80",
+        # "start_time": "2035-04-01T20:00:00.000Z"
+      # }, {
+        # "venue_id": 3,
+        # "venue_name": "Park Square Live Music & Coffee",
+        # "venue_image_link": "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80",
+        # "start_time": "2035-04-08T20:00:00.000Z"
+      # }, {
+        # "venue_id": 3,
+        # "venue_name": "Park Square Live Music & Coffee",
+        # "venue_image_link": "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80",
+        # "start_time": "2035-04-15T20:00:00.000Z"
+      # }],
+      # "past_shows_count": 0,
+      # "upcoming_shows_count": 3,
+    # }
+    # data = list(filter(lambda d: d['id'] == artist_id, [data1, data2, data3]))[0]
+    
+    # Answer repeat requests with 304 before loading any shows
+    etag, last_modified = page_validators(Artist, artist_id, entity_version(Artist, artist_id))
+    if not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    # Artist, its show counts and one page each of past and upcoming shows
+    pages = show_pages()
+    data = response_cache.cached(
+        'artist', detail_cache_key(artist_id, pages),
+        (f'artist:{artist_id}', 'artist'),
+        lambda: entity_detail(Artist, artist_id, Venue, **pages)
+    )
+    if data is None:
+        abort(404)
+    
+    response = make_response(render_template('pages/show_artist.html', artist=data))
+    return with_validators(response, etag, last_modified)
+
+#  Update
+#  ----------------------------------------------------------------
+@artist_views.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@reads_primary
+def edit_artist(artist_id):
+    # Original mock data for reference:
+    # artist={
+    #     "id": 4,
+    #     "name": "Guns N Petals",
+    #     "genres": ["Rock n Roll"],
+    #     "city": "San Francisco",
+    #     "state": "CA",
+    #     "phone": "326-123-5000",
+    #     "website": "https://www.gunsnpetalsband.com",
+    #     "facebook_link": "https://www.facebook.com/GunsNPetals",
+    #     "seeking_venue": True,
+    #     "seeking_description": "Looking for shows to perform at in the San Francisco Bay Area!",
+    #     "image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80"
+    # }
+    
+    # TODO: populate form with fields from artist with ID <artist_id>
+    
+    form = ArtistForm()
+    # Query the artist
+    artist_data = Artist.query.get_or_404(artist_id)
+
+    
+    # Populate form with existing artist data
+    form.name.data = artist_data.name
+    form.genres.data = artist_data.genres
+    form.city.data = artist_data.city
+    form.state.data = artist_data.state
+    form.phone.data = artist_data.phone
+    form.website.data = artist_data.website
+    form.facebook_link.data = artist_data.facebook_link
+    form.seeking_venue.data = artist_data.seeking_venue
+    form.seeking_description.data = artist_data.seeking_description
+    form.image_link.data = artist_data.image_link
+
+     # Handle genres specifically
+    if artist_data.genres:
+        # If genres is stored as a string that looks like a list
+        if isinstance(artist_data.genres, str):
+            if artist_data.genres.startswith('[') and artist_data.genres.endswith(']'):
+                # Remove brackets and split
+                genres_list = artist_data.genres[1:-1].replace('"', '').replace("'", '').split(',')
+                form.genres.data = [g.strip() for g in genres_list]
+            else:
+                # Simple split by comma
+                form.genres.data = [g.strip() for g in artist_data.genres.split(',')]
+        # If genres is already a list
+        elif isinstance(artist_data.genres, list):
+            form.genres.data = artist_data.genres
+    else:
+        form.genres.data = []
+
+    # The availability windows are edited as a whole and replace the stored ones
+    if artist_data.availabilities:
+        while form.availabilities.entries:
+            form.availabilities.pop_entry()
+        for window in sorted(artist_data.availabilities, key=lambda a: (a.day_of_week, a.start_time)):
+            form.availabilities.append_entry(window)
+    
+    # Format artist data for the template
+    artist = artist_schema.dump(artist_data)
+    
+    return render_template('forms/edit_artist.html', form=form, artist=artist, csrf_token=generate_csrf())
+
+@artist_views.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    # TODO: take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+
+    form = ArtistForm()
+
+    if not form.validate():
+        # If form validation fails, flash the errors and return
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/edit_artist.html', form=form)
+    
+    error = False
+    
+    try:
+        # Updates only the columns that changed, if any, and the
+        # availabilities that were added or removed (see writes.py)
+        changed = update_entity(Artist, artist_id, form_fields(Artist, form))
+        
+        if changed is not None:
+            replace_availabilities(artist_id, availability_windows(form))
+            if COUNTERPART_COLUMNS[Artist] & changed.keys():
+                # Venue pages list the artist's name and image
+                touch_counterparts(Artist, artist_id)
+            
+            # Commit the changes
+            db.session.commit()
+            if changed:
+                # Venue pages and the show listing carry artist names
+                response_cache.invalidate('artists', f'artist:{artist_id}', 'venue', 'shows')
+            
+        else:
+            error = True
+            
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error updating artist')
+    finally:
+        db.session.close()
+    
+    if error:
+        flash(f'An error occurred updating artist {artist_id}')
+    else:
+        flash(f'Artist {form.name.data} was successfully updated!')
+
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@artist_views.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form, csrf_token=generate_csrf())
+
+@artist_views.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    # called upon submitting the new artist listing form
+    # TODO: insert form data as a new Venue record in the db, instead
+
+    form = ArtistForm()
+    
+    if not form.validate():
+        # If form validation fails, flash the errors and return
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/new_artist.html', form=form)
+    
+    error = False
+    
+    try:
+        # The artist and its availabilities in one statement (see writes.py)
+        artist_id = create_artist(form_fields(Artist, form), availability_windows(form))
+        db.session.commit()
+        response_cache.invalidate('artists', f'artist:{artist_id}')
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error creating artist')
+    finally:
+        db.session.close()
+    
+    if error:
+        # TODO: on unsuccessful db insert, flash an error instead.
+        # e.g., flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+        flash('An error occurred. Artist ' + form.name.data + ' could not be listed.')
+    else:
+        # on successful db insert, flash success
+        flash('Artist ' + form.name.data + ' was successfully listed!')
+    
+    return render_template('pages/home.html')
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------#
+# Async database access.
+#
+# Flask runs an async view on a fresh event loop per request, and asyncpg
+# connections belong to the loop that opened them, so the async engine and
+# its pool live on one long-running loop per process, in a background
+# thread. Views await statements submitted to that loop; the statements of
+# one call run concurrently, each on its own pooled connection. Like the
+# session (database.py), they read from the request's replica, if it has
+# one, and from the primary otherwise.
+#
+# Needs SQLAlchemy's asyncio extension, asyncpg and Flask's async extra:
+#   pip install "flask[async]" asyncpg
+#----------------------------------------------------------------------------#
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from database import replica_route
+from instrumentation import current_stats
+
+try:
+    import asyncpg
+    from sqlalchemy.ext.asyncio import create_async_engine
+except ImportError:
+    asyncpg = None
+
+
+def async_url(url):
+    """``url`` with its Postgres driver swapped for asyncpg."""
+    url = make_url(url)
+    if url.get_backend_name() != 'postgresql':
+        raise ValueError(f'The async views need Postgres, not {url.get_backend_name()}.')
+    return url.set(drivername='postgresql+asyncpg')
+
+
+class AsyncDatabase:
+
+    def __init__(self):
+        self.urls = {}
+        self.engine_options = {}
+        self.lock = threading.Lock()
+        self.pid = None
+        self.loop = None
+        self.engines = {}
+
+    def init_app(self, app):
+        if asyncpg is None:
+            raise RuntimeError('ASYNC_VIEWS is on but asyncpg or SQLAlchemy asyncio is not installed.')
+        # The primary under None, then the replicas under their bind keys
+        self.urls = {None: async_url(app.config['ASYNC_DATABASE_URL'] or app.config['SQLALCHEMY_DATABASE_URI'])}
+        self.urls.update((key, async_url(url)) for key, url in (app.config['SQLALCHEMY_BINDS'] or {}).items()
+                         if key.startswith('replica_'))
+        if app.config['DB_POOLER']:
+            # PgBouncer in transaction mode pools the connections and may
+            # hand each transaction a different one, so asyncpg must not keep
+            # prepared statements between them
+            self.urls = {key: url.update_query_dict({'prepared_statement_cache_size': '0'})
+                         for key, url in self.urls.items()}
+            self.engine_options = {
+                'poolclass': NullPool,
+                'connect_args': {'statement_cache_size': 0},
+            }
+        else:
+            self.engine_options = {
+                'pool_size': app.config['ASYNC_POOL_SIZE'],
+                'max_overflow': app.config['ASYNC_MAX_OVERFLOW'],
+                'pool_pre_ping': True,
+            }
+
+    def _start(self):
+        # Started on first use in each process, so that forked workers do
+        # not share the parent's loop or connections
+        with self.lock:
+            if self.pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='async-database', daemon=True).start()
+                self.loop = loop
+                self.engines = {key: create_async_engine(url, **self.engine_options)
+                                for key, url in self.urls.items()}
+                self.pid = os.getpid()
+            return self.loop
+
+    async def _fetch(self, engine, statement):
+        async with engine.connect() as connection:
+            started = time.perf_counter()
+            result = await connection.execute(statement)
+            rows = result.all()
+            return rows, time.perf_counter() - started
+
+    async def _fetch_all(self, route, statements):
+        engine = self.engines[route]
+        return await asyncio.gather(*[self._fetch(engine, statement) for statement in statements])
+
+    async def fetch(self, *statements):
+        """The rows of each statement, run concurrently. Their timings are
+        added to the current request's stats."""
+        # Submitted from an empty context: with the request's, the engine
+        # events would time these concurrent statements against one timer
+        future = contextvars.Context().run(
+            asyncio.run_coroutine_threadsafe, self._fetch_all(replica_route(), statements), self._start()
+        )
+        results = await asyncio.wrap_future(future)
+        stats = current_stats()
+        if stats is not None:
+            for statement, (rows, seconds) in zip(statements, results):
+                # Only the slowest statement's SQL is kept, so only it is compiled
+                sql = str(statement) if seconds > stats.slowest_seconds else None
+                stats.statement_done(sql, seconds)
+        return [rows for rows, seconds in results]
+
+    def dispose(self):
+        """Close the pool and stop the loop of this process."""
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            for engine in self.engines.values():
+                asyncio.run_coroutine_threadsafe(engine.dispose(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.pid = self.loop = None
+            self.engines = {}
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,136 @@
+#----------------------------------------------------------------------------#
+# Async read views.
+#
+# With ASYNC_VIEWS on, the /venues, /artists and /shows listings and the
+# venue and artist pages are served by the coroutines below instead of the
+# views in venue_views.py, artist_views.py and show_views.py. They render
+# the same templates from the same statements (listings.py), run through
+# SQLAlchemy's asyncio extension and asyncpg (async_database.py) rather than
+# the Flask-SQLAlchemy session, and share the page data cache. A venue or artist page loads the entity with its
+# show totals, its past shows page and its upcoming shows page as three
+# concurrent statements instead of one windowed query.
+#----------------------------------------------------------------------------#
+
+from flask import Response, abort, current_app, flash, make_response, render_template, request
+
+from async_database import async_db
+from cache import response_cache
+from clock import bucket_now
+from listings import (venue_areas_statement, group_venue_areas, artist_names_statement,
+                      list_artist_names, shows_page_statement, list_shows_page,
+                      entity_summary_statement, show_page_statement, detail_data,
+                      entity_version_statement, latest_version)
+from models import Venue, Artist
+from pages import (show_pages, detail_cache_key, page_validators, not_modified, with_validators,
+                   shows_listing_args)
+
+
+async def _venue_areas():
+    rows, = await async_db.fetch(venue_areas_statement())
+    return group_venue_areas(rows)
+
+
+async def _artist_names():
+    rows, = await async_db.fetch(artist_names_statement())
+    return list_artist_names(rows)
+
+
+async def _entity_detail(model, entity_id, counterpart, past_page, upcoming_page, per_page):
+    now = bucket_now()
+    summary, past_shows, upcoming_shows = await async_db.fetch(
+        entity_summary_statement(model, entity_id, now),
+        show_page_statement(model, entity_id, counterpart, True, past_page, per_page, now),
+        show_page_statement(model, entity_id, counterpart, False, upcoming_page, per_page, now)
+    )
+    if not summary:
+        return None
+    entity = summary[0]
+    return detail_data(model, counterpart, entity, entity.past_shows_total, entity.upcoming_shows_total,
+                       past_shows, upcoming_shows, past_page, upcoming_page, per_page)
+
+
+async def _entity_page(model, entity_id, counterpart, template):
+    # Answer repeat requests with 304 before loading any shows
+    rows, = await async_db.fetch(entity_version_statement(model, entity_id, bucket_now()))
+    etag, last_modified = page_validators(model, entity_id, latest_version(rows[0] if rows else None))
+    if not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    pages = show_pages()
+    name = model.__tablename__
+    data = await response_cache.cached_async(
+        name, detail_cache_key(entity_id, pages), (f'{name}:{entity_id}', name),
+        lambda: _entity_detail(model, entity_id, counterpart, **pages)
+    )
+    if data is None:
+        abort(404)
+    response = make_response(render_template(template, **{name: data}))
+    return with_validators(response, etag, last_modified)
+
+
+async def venues():
+    data = []
+    try:
+        data = await response_cache.cached_async('venues', '', ('venues',), _venue_areas)
+    except Exception:
+        current_app.logger.exception('Error loading venues')
+        flash('An error occurred. Could not load venues.')
+    return render_template('pages/venues.html', areas=data)
+
+
+async def show_venue(venue_id):
+    return await _entity_page(Venue, venue_id, Artist, 'pages/show_venue.html')
+
+
+async def artists():
+    data = []
+    try:
+        data = await response_cache.cached_async('artists', '', ('artists',), _artist_names)
+    except Exception:
+        current_app.logger.exception('Error loading artists')
+        flash('An error occurred loading artists.')
+    return render_template('pages/artists.html', artists=data)
+
+
+async def show_artist(artist_id):
+    return await _entity_page(Artist, artist_id, Venue, 'pages/show_artist.html')
+
+
+async def shows():
+    limit, after, start, end = shows_listing_args()
+
+    async def load():
+        rows, = await async_db.fetch(shows_page_statement(limit, after, start, end))
+        return list_shows_page(rows, limit)
+
+    data = []
+    next_cursor = None
+    try:
+        data, next_cursor = await response_cache.cached_async(
+            'shows', repr((limit, after, start, end)), ('shows',), load
+        )
+    except Exception:
+        current_app.logger.exception('Error loading shows')
+        flash('An error occurred loading shows.')
+    return render_template('pages/shows.html', shows=data, next_cursor=next_cursor,
+                           start=request.args.get('from', ''), end=request.args.get('to', ''))
+
+
+# Endpoint -> async view
+VIEWS = {
+    'venues.venues': venues,
+    'venues.show_venue': show_venue,
+    'artists.artists': artists,
+    'artists.show_artist': show_artist,
+    'shows.shows': shows,
+}
+
+
+def init_app(app):
+    """Serve the endpoints in VIEWS with their async views."""
+    async_db.init_app(app)
+    for endpoint, view in VIEWS.items():
+        # Raises now rather than on the first request when Flask's async
+        # extra (asgiref) is missing
+        app.ensure_sync(view)
+        app.view_functions[endpoint] = view
@@ -0,0 +1,149 @@
+#----------------------------------------------------------------------------#
+# Benchmark: the write path of the artist forms (writes.py) vs the ORM code
+# the views used before. That code added the artist, flushed for its id and
+# added each availability window; on edit it loaded the artist and set
+# every field. It left the availabilities alone, so here the ORM edit also
+# deletes and adds windows one by one to do the same work.
+#
+# --artists artists with --windows availability windows each are created,
+# one transaction apiece as in the view, then --edits of them are edited:
+# half keep their columns, and half of the edits change one window.
+# Reports operations per second, latency and statements per operation.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.artist_writes --artists 10000 --windows 7
+#----------------------------------------------------------------------------#
+
+import argparse
+import random
+import time
+from datetime import time as dt_time
+
+from benchmarks.common import app, db, QueryCounter, reset_schema, CITIES, GENRES
+from benchmarks.load_test import percentile
+from models import Artist, ArtistAvailability
+from writes import create_artist, replace_availabilities, update_entity
+
+MODES = ('orm', 'service')
+
+
+def artist_fields(rng, n):
+    city, state = rng.choice(CITIES)
+    return {'name': f'Writer {n}', 'city': city, 'state': state, 'phone': '555-555-5555',
+            'genres': rng.sample(GENRES, 2), 'facebook_link': 'https://www.facebook.com/writer',
+            'image_link': f'https://images.example.com/writer/{n}.jpg',
+            'website': 'https://writer.example.com', 'seeking_venue': rng.random() < 0.5,
+            'seeking_description': ''}
+
+
+def windows(rng, count):
+    return [(day_of_week, dt_time(rng.randint(12, 18), 0), dt_time(23, 59))
+            for day_of_week in rng.sample(range(7), count)]
+
+
+def orm_create(fields, windows):
+    artist = Artist(**fields)
+    db.session.add(artist)
+    db.session.flush()
+    for day_of_week, start_time, end_time in windows:
+        db.session.add(ArtistAvailability(artist_id=artist.id, day_of_week=day_of_week,
+                                          start_time=start_time, end_time=end_time))
+    db.session.commit()
+    return artist.id
+
+
+def service_create(fields, windows):
+    artist_id = create_artist(fields, windows)
+    db.session.commit()
+    return artist_id
+
+
+def orm_edit(artist_id, fields, windows):
+    artist = Artist.query.get(artist_id)
+    for column, value in fields.items():
+        setattr(artist, column, value)
+    missing = set(windows)
+    for availability in artist.availabilities:
+        window = (availability.day_of_week, availability.start_time, availability.end_time)
+        if window in missing:
+            missing.discard(window)
+        else:
+            db.session.delete(availability)
+    for day_of_week, start_time, end_time in missing:
+        db.session.add(ArtistAvailability(artist_id=artist_id, day_of_week=day_of_week,
+                                          start_time=start_time, end_time=end_time))
+    db.session.commit()
+
+
+def service_edit(artist_id, fields, windows):
+    update_entity(Artist, artist_id, fields)
+    replace_availabilities(artist_id, windows)
+    db.session.commit()
+
+
+OPERATIONS = {'orm': (orm_create, orm_edit), 'service': (service_create, service_edit)}
+
+
+def timed_calls(calls):
+    latencies = []
+    with QueryCounter(db.engine) as counter:
+        started = time.perf_counter()
+        for call, *args in calls:
+            start = time.perf_counter()
+            call(*args)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # Each form post gets a fresh session
+            db.session.remove()
+        seconds = time.perf_counter() - started
+    latencies.sort()
+    return {'count': len(latencies), 'per_second': len(latencies) / seconds,
+            'p50': percentile(latencies, 0.5), 'p99': percentile(latencies, 0.99),
+            'statements': counter.count / len(latencies)}
+
+
+def run(mode, args):
+    create, edit = OPERATIONS[mode]
+    rng = random.Random(0)
+    reset_schema()
+    db.session.remove()
+    created = [(artist_fields(rng, n), windows(rng, args.windows)) for n in range(args.artists)]
+    creates = timed_calls([(create, fields, artist_windows) for fields, artist_windows in created])
+
+    edits = []
+    for artist_id in rng.sample(range(1, args.artists + 1), min(args.edits, args.artists)):
+        fields, artist_windows = created[artist_id - 1]
+        if rng.random() < 0.5:
+            fields = dict(fields, name=f'{fields["name"]} (edited)')
+        if rng.random() < 0.5:
+            artist_windows = artist_windows[1:] + windows(rng, 1)
+        edits.append((edit, artist_id, fields, artist_windows))
+    edited = timed_calls(edits)
+
+    stored = ArtistAvailability.query.count()
+    db.session.remove()
+    return creates, edited, stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the artist create and edit write path.')
+    parser.add_argument('--artists', type=int, default=10000)
+    parser.add_argument('--windows', type=int, default=7, help='Availability windows per artist (1-7).')
+    parser.add_argument('--edits', type=int, default=2000)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f'{args.artists} artists with {args.windows} windows, {args.edits} edits '
+              f'({db.engine.dialect.name})')
+        print(f"{'mode':<8} {'operation':<7} {'count':>6} {'per sec':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'statements':>10}")
+        for mode in args.modes:
+            creates, edits, stored = run(mode, args)
+            for operation, stats in (('create', creates), ('edit', edits)):
+                print(f"{mode:<8} {operation:<7} {stats['count']:>6} {stats['per_second']:>9.1f} "
+                      f"{stats['p50']:>8.2f} {stats['p99']:>8.2f} {stats['statements']:>10.2f}")
+            print(f'{mode:<8} {stored} availability windows stored')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#----------------------------------------------------------------------------#
+# Load test: requests/sec and latency of the sync views vs the async views
+# (ASYNC_VIEWS) on the listings and the venue and artist pages, at equal
+# worker counts. For each mode, --workers processes are forked that accept
+# on one shared socket, like a preforking server, and --concurrency client
+# threads send a weighted mix of those routes for --duration seconds. Each
+# worker serves one request at a time (a sync worker) unless --threaded.
+# The page data cache is off, so every request reaches the database.
+# Needs Postgres, asyncpg and flask[async].
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.async_views --workers 4 --concurrency 16 --duration 20
+#----------------------------------------------------------------------------#
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from werkzeug.serving import make_server
+
+from benchmarks.common import app, db, reset_schema, seed, analyze
+from benchmarks.load_test import percentile, git_commit
+from cache import response_cache
+import async_views
+
+MODES = ('sync', 'async')
+
+# route: (weight, path of a catalog)
+ROUTES = {
+    '/venues': (1, lambda rng, catalog: '/venues'),
+    '/artists': (1, lambda rng, catalog: '/artists'),
+    '/shows': (2, lambda rng, catalog: '/shows'),
+    '/venues/<id>': (3, lambda rng, catalog: f"/venues/{rng.randint(1, catalog['venues'])}"),
+    '/artists/<id>': (3, lambda rng, catalog: f"/artists/{rng.randint(1, catalog['artists'])}"),
+}
+
+
+def serve(listener, mode, threaded):
+    # Runs in a forked worker
+    sys.stdout = open(os.devnull, 'w')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    if mode == 'async':
+        async_views.init_app(app)
+    host, port = listener.getsockname()
+    make_server(host, port, app, threaded=threaded, fd=listener.fileno()).serve_forever()
+
+
+def client(port, paths, deadline, samples, errors):
+    rng = random.Random(threading.get_ident())
+    routes = list(paths)
+    weights = [ROUTES[route][0] for route in routes]
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        path = paths[route](rng)
+        start = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+        except OSError:
+            errors[route] += 1
+            continue
+        if response.status != 200:
+            errors[route] += 1
+        samples[route].append((time.perf_counter() - start) * 1000)
+
+
+def run(mode, args, catalog):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+    port = listener.getsockname()[1]
+    fork = multiprocessing.get_context('fork')
+    workers = [fork.Process(target=serve, args=(listener, mode, args.threaded), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+
+    paths = {route: (lambda rng, make=make: make(rng, catalog)) for route, (weight, make) in ROUTES.items()}
+    try:
+        for phase, seconds in (('warmup', args.warmup), ('measure', args.duration)):
+            samples, errors = defaultdict(list), defaultdict(int)
+            deadline = time.perf_counter() + seconds
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client, args=(port, paths, deadline, samples, errors))
+                       for _ in range(args.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+    finally:
+        for worker in workers:
+            worker.terminate()
+        listener.close()
+
+    every = sorted(ms for latencies in samples.values() for ms in latencies)
+
+    def latency(values):
+        return {'p50': percentile(values, 0.5), 'p90': percentile(values, 0.9), 'p99': percentile(values, 0.99)}
+
+    return {
+        'requests': len(every),
+        'errors': sum(errors.values()),
+        'requests_per_second': len(every) / elapsed,
+        'latency_ms': latency(every),
+        'routes': {route: dict(requests=len(samples[route]), errors=errors[route],
+                               latency_ms=latency(sorted(samples[route])))
+                   for route in ROUTES if samples[route]},
+    }
+
+
+def check_same_pages(catalog):
+    # The async views must render exactly what the sync views do
+    client = app.test_client()
+    paths = ['/venues', '/artists', '/shows', '/venues/1', f"/artists/{catalog['artists']}",
+             '/venues/2?past_page=2']
+    sync_pages = [client.get(path).get_data() for path in paths]
+    async_views.init_app(app)
+    for path, page in zip(paths, sync_pages):
+        if client.get(path).get_data() != page:
+            sys.exit(f'{path} differs between the sync and async views')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the sync and async read views under load.')
+    parser.add_argument('--venues', type=int, default=5000)
+    parser.add_argument('--shows-per-venue', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threaded', action='store_true', help='Workers serve requests in threads.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads.')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds measured per mode.')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds before measuring.')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--output', default='async_views.json')
+    args = parser.parse_args()
+
+    app.config['CACHE_BACKEND'] = 'none'
+    response_cache.init_app(app)
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit('The async views need Postgres; set BENCH_DATABASE_URL to a Postgres database.')
+        reset_schema()
+        seed(args.venues, shows_per_venue=args.shows_per_venue)
+        analyze()
+        # Workers must not inherit pooled connections
+        db.session.remove()
+        db.engine.dispose()
+    catalog = {'venues': args.venues, 'artists': max(args.venues // 4, 1)}
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'venues': args.venues,
+            'shows_per_venue': args.shows_per_venue,
+            'workers': args.workers,
+            'threaded': args.threaded,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+        },
+        'modes': {mode: run(mode, args, catalog) for mode in args.modes},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.workers} workers ({'threaded' if args.threaded else 'one request at a time'}), "
+          f"{args.concurrency} clients, {args.duration:g}s per mode")
+    print(f"{'mode':<6} {'route':<15} {'requests':>8} {'errors':>6} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for mode, summary in results['modes'].items():
+        rows = [('all', summary)] + list(summary['routes'].items())
+        for route, stats in rows:
+            latency = stats['latency_ms']
+            rate = f"{summary['requests_per_second']:>8.1f}" if route == 'all' else f"{'':>8}"
+            print(f"{mode:<6} {route:<15} {stats['requests']:>8} {stats['errors']:>6} {rate} "
+                  f"{latency['p50']:>8.2f} {latency['p90']:>8.2f} {latency['p99']:>8.2f}")
+    print(f'results written to {args.output}')
+
+    check_same_pages(catalog)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#----------------------------------------------------------------------------#
+# Benchmark: `flask import` throughput, COPY vs executemany, from generated
+# CSV and JSON Lines catalogs.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.bulk_import --venues 20000 --shows 1000000
+#----------------------------------------------------------------------------#
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.common import app, db, reset_schema, CITIES
+from importer import import_file
+
+
+def write_catalog(directory, num_venues, num_shows, format):
+    """Write venues, artists and shows files and return their paths."""
+    rng = random.Random(num_shows)
+    num_artists = max(num_venues // 4, 1)
+    first = datetime(2030, 1, 1)
+    venue_keys = [(f'Venue {i}', *rng.choice(CITIES)) for i in range(num_venues)]
+    artist_keys = [(f'Artist {i}', *rng.choice(CITIES)) for i in range(num_artists)]
+
+    def rows(entity):
+        if entity == 'venues':
+            for name, city, state in venue_keys:
+                yield {'name': name, 'city': city, 'state': state, 'address': f'{name} Street',
+                       'genres': 'Jazz;Folk', 'seeking_talent': 'false'}
+        elif entity == 'artists':
+            for name, city, state in artist_keys:
+                yield {'name': name, 'city': city, 'state': state, 'genres': 'Rock n Roll',
+                       'seeking_venue': 'true'}
+        else:
+            for i in range(num_shows):
+                venue = venue_keys[rng.randrange(num_venues)]
+                artist = artist_keys[rng.randrange(num_artists)]
+                yield {'venue_name': venue[0], 'venue_city': venue[1], 'venue_state': venue[2],
+                       'artist_name': artist[0], 'artist_city': artist[1], 'artist_state': artist[2],
+                       'start_time': (first + timedelta(hours=i)).isoformat()}
+
+    paths = {}
+    for entity in ('venues', 'artists', 'shows'):
+        path = paths[entity] = os.path.join(directory, f'{entity}.{format}')
+        with open(path, 'w', newline='') as f:
+            writer = None
+            for row in rows(entity):
+                if format == 'jsonl':
+                    f.write(json.dumps(row) + '\n')
+                    continue
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bulk import.')
+    parser.add_argument('--venues', type=int, default=20000)
+    parser.add_argument('--shows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'jsonl'])
+    args = parser.parse_args()
+
+    methods = ['copy', 'executemany']
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            methods = ['executemany']
+        print(f"{'format':>6} {'method':>12} {'entity':>8} {'rows':>9} {'seconds':>8} {'rows/s':>9}")
+        with tempfile.TemporaryDirectory() as directory:
+            for format in args.formats:
+                paths = write_catalog(directory, args.venues, args.shows, format)
+                for method in methods:
+                    reset_schema()
+                    for entity in ('venues', 'artists', 'shows'):
+                        report = import_file(entity, paths[entity], chunk_size=args.chunk_size, method=method)
+                        assert report.rejected == 0, report.examples[:5]
+                        print(f'{format:>6} {method:>12} {entity:>8} {report.imported:>9} '
+                              f'{report.seconds:>8.2f} {report.rate:>9,.0f}')
+    # ru_maxrss is in kilobytes on Linux
+    print(f'peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Cache check: with the page data cache on, every write through the views
+# must be visible on the next read, and in the search results and the
+# typeahead. Exits non-zero on a stale page.
+#
+#   BENCH_DATABASE_URL=sqlite+pysqlite:////tmp/fyyur_bench.db \
+#       python -m benchmarks.cache_consistency
+#----------------------------------------------------------------------------#
+
+import json
+import sys
+import time
+
+from benchmarks.common import app, db, reset_schema, seed
+from cache import response_cache
+from models import Venue, Artist
+
+VENUE = {
+    'name': 'Cache Check Hall',
+    'city': 'Cache City',
+    'state': 'CA',
+    'address': '1 Cache Street',
+    'phone': '415-000-1234',
+    'genres': 'Jazz',
+}
+
+ARTIST = {
+    'name': 'The Cache Misses',
+    'city': 'Cache City',
+    'state': 'CA',
+    'phone': '415-000-4321',
+    'genres': 'Jazz',
+    'availabilities-0-day_of_week': '0',
+    'availabilities-0-start_time': '00:00',
+    'availabilities-0-end_time': '23:59',
+}
+
+
+def main():
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        reset_schema()
+        seed(20)
+    response_cache.init_app(app)
+    client = app.test_client()
+    failures = []
+
+    def check(description, url, expected, present=True):
+        # Read twice: the first read may fill the cache, the second must hit it
+        for _ in range(2):
+            body = client.get(url).get_data(as_text=True)
+            if (expected in body) != present:
+                failures.append(description)
+                print(f'FAIL {description}')
+                return
+        print(f'  ok {description}')
+
+    def searched(description, url, expected, present=True):
+        # The venue and artist searches post their term
+        body = client.post(url, data={'search_term': expected}).get_data(as_text=True)
+        if (f'>{expected}<' in body) != present:
+            failures.append(description)
+            print(f'FAIL {description}')
+            return
+        print(f'  ok {description}')
+
+    def typeahead(description, query, expected, present=True):
+        # A stale index is rebuilt in the background while the old one keeps
+        # answering, so allow the rebuild a moment
+        for _ in range(50):
+            names = [result['name'] for result in client.get(f'/search?q={query}').get_json()['results']]
+            if (expected in names) == present:
+                print(f'  ok {description}')
+                return
+            time.sleep(0.1)
+        failures.append(description)
+        print(f'FAIL {description}')
+
+    check('seeded venue listed', '/venues', 'Venue 1<')
+    client.post('/venues/create', data=VENUE)
+    check('new venue listed', '/venues', VENUE['name'])
+    searched('new venue found by search', '/venues/search', VENUE['name'])
+    typeahead('new venue in the typeahead', 'cache check', VENUE['name'])
+    with app.app_context():
+        venue_id = db.session.query(Venue.id).filter_by(name=VENUE['name']).scalar()
+
+    client.post(f'/venues/{venue_id}/edit', data=dict(VENUE, name='Cache Check Arena'))
+    check('venue rename on its page', f'/venues/{venue_id}', 'Cache Check Arena')
+    check('venue rename in the listing', '/venues', 'Cache Check Arena')
+    searched('venue rename found by search', '/venues/search', 'Cache Check Arena')
+    searched('old venue name not found by search', '/venues/search', VENUE['name'], present=False)
+    typeahead('venue rename in the typeahead', 'cache check', 'Cache Check Arena')
+    typeahead('old venue name out of the typeahead', 'cache check', VENUE['name'], present=False)
+
+    check('artist listing before create', '/artists', ARTIST['name'], present=False)
+    client.post('/artists/create', data=ARTIST)
+    check('new artist listed', '/artists', ARTIST['name'])
+    searched('new artist found by search', '/artists/search', ARTIST['name'])
+    with app.app_context():
+        artist_id = db.session.query(Artist.id).filter_by(name=ARTIST['name']).scalar()
+
+    client.post('/shows/create', data={
+        'artist_id': str(artist_id),
+        'venue_id': str(venue_id),
+        'start_time': '2035-04-02 20:00:00',
+    })
+    check('new show on the venue page', f'/venues/{venue_id}', ARTIST['name'])
+    check('new show on the artist page', f'/artists/{artist_id}', 'Cache Check Arena')
+    check('new show in the listing', '/shows?from=2035-04-02&to=2035-04-03', ARTIST['name'])
+
+    client.post(f'/artists/{artist_id}/edit', data=dict(ARTIST, name='The Cache Hits'))
+    check('artist rename on the venue page', f'/venues/{venue_id}', 'The Cache Hits')
+    searched('artist rename found by search', '/artists/search', 'The Cache Hits')
+    typeahead('artist rename in the typeahead', 'the cache', 'The Cache Hits')
+
+    client.delete(f'/venues/{venue_id}')
+    check('deleted venue unlisted', '/venues', 'Cache Check Arena', present=False)
+    check('deleted venue off the artist page', f'/artists/{artist_id}', 'Cache Check Arena', present=False)
+
+    print(json.dumps(response_cache.stats(), indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#----------------------------------------------------------------------------#
+# Shared benchmark helpers.
+#----------------------------------------------------------------------------#
+
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta, time as dt_time
+
+# Benchmarks drop and recreate every table, so they only ever run against the
+# database named by BENCH_DATABASE_URL, never the one configured for the app.
+if 'BENCH_DATABASE_URL' not in os.environ:
+    raise SystemExit('Set BENCH_DATABASE_URL to a scratch database before running benchmarks.')
+os.environ['DATABASE_URL'] = os.environ['BENCH_DATABASE_URL']
+
+from sqlalchemy import event, text
+
+from app import app
+from clock import utcnow
+from database import db
+from models import Venue, Artist, Show, ArtistAvailability
+from counters import recount
+from forms import GENRES_CHOICES
+
+GENRES = [value for value, label in GENRES_CHOICES]
+
+CITIES = [
+    ('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'),
+    ('Brooklyn', 'NY'), ('Austin', 'TX'), ('Houston', 'TX'), ('Chicago', 'IL'),
+    ('Seattle', 'WA'), ('Portland', 'OR'), ('Nashville', 'TN'), ('Denver', 'CO'),
+    ('New Orleans', 'LA'), ('Atlanta', 'GA'), ('Boston', 'MA'), ('Miami', 'FL'),
+]
+
+TRIGRAM_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_venue_name_trgm ON venue USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_venue_city_trgm ON venue USING gin (city gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_artist_name_trgm ON artist USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_artist_city_trgm ON artist USING gin (city gin_trgm_ops)',
+]
+
+
+class QueryCounter:
+    """Counts the statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+@contextmanager
+def timed(result):
+    start = time.perf_counter()
+    yield
+    result['seconds'] = time.perf_counter() - start
+
+
+def reset_schema():
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+def seed(num_venues, num_artists=None, shows_per_venue=2, availabilities_per_artist=3, chunk_size=10000):
+    """Bulk insert synthetic venues, artists (with weekly availability windows)
+    and shows (half past, half upcoming, within a year of now).
+
+    Venues and artists get one to three genres and the optional fields the
+    pages render; a few artists play far more shows than the rest. Names are
+    'Venue <id>' and 'Artist <id>'.
+    """
+    rng = random.Random(num_venues)
+    num_artists = num_artists or max(num_venues // 4, 1)
+    now = utcnow()
+
+    def insert(table, rows):
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(table.insert(), rows[start:start + chunk_size])
+
+    def profile(kind, i):
+        city, state = rng.choice(CITIES)
+        return {'id': i, 'name': f'{kind.capitalize()} {i}', 'city': city, 'state': state,
+                'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+                'genres': rng.sample(GENRES, rng.randint(1, 3)),
+                'image_link': f'https://images.example.com/{kind}/{i}.jpg',
+                'facebook_link': f'https://www.facebook.com/{kind}{i}',
+                'website': f'https://{kind}{i}.example.com'}
+
+    venues = []
+    for i in range(1, num_venues + 1):
+        seeking = rng.random() < 0.3
+        venues.append(dict(profile('venue', i), address=f'{i} Main Street', seeking_talent=seeking,
+                           seeking_description='Looking for local bands.' if seeking else None))
+    insert(Venue.__table__, venues)
+
+    artists = []
+    for i in range(1, num_artists + 1):
+        seeking = rng.random() < 0.5
+        artists.append(dict(profile('artist', i), seeking_venue=seeking,
+                            seeking_description='Looking for a weekly residency.' if seeking else None))
+    insert(Artist.__table__, artists)
+
+    availabilities = []
+    for artist_id in range(1, num_artists + 1):
+        for day_of_week in rng.sample(range(7), availabilities_per_artist):
+            start_hour = rng.randint(12, 20)
+            availabilities.append({'artist_id': artist_id, 'day_of_week': day_of_week,
+                                   'start_time': dt_time(start_hour, 0),
+                                   'end_time': dt_time(min(start_hour + rng.randint(3, 6), 23), 59)})
+    insert(ArtistAvailability.__table__, availabilities)
+
+    shows = []
+    for venue_id in range(1, num_venues + 1):
+        for n in range(shows_per_venue):
+            offset = timedelta(days=rng.randint(1, 365), hours=rng.randint(0, 23))
+            shows.append({'venue_id': venue_id,
+                          # Skewed towards low ids: a few artists are very busy
+                          'artist_id': int(num_artists * rng.random() ** 2) + 1,
+                          'start_time': now + offset if n % 2 else now - offset})
+    insert(Show.__table__, shows)
+
+    if db.engine.dialect.name == 'postgresql':
+        # Venue and artist ids were given explicitly; move their sequences
+        # past them so rows added later get fresh ids
+        for table in ('venue', 'artist'):
+            db.session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+
+    # Bulk inserts bypass the ORM events that maintain the show counters
+    recount(Venue, now=now)
+    recount(Artist, now=now)
+    db.session.commit()
+
+
+def create_trigram_indexes():
+    """Add the search migration's trigram indexes, which create_all() can't
+    create. Returns False when pg_trgm is not available."""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    available = db.session.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    if not available:
+        return False
+    db.session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    for statement in TRIGRAM_INDEXES:
+        db.session.execute(text(statement))
+    db.session.commit()
+    return True
+
+
+def analyze():
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
@@ -0,0 +1,65 @@
+#----------------------------------------------------------------------------#
+# Benchmark: the `datetime` template filter over many show times, the old
+# way (ISO string, dateutil parse, babel.dates.format_datetime) vs Babel on
+# datetimes vs the compiled patterns of formatting.py. Needs no database.
+#
+#   python -m benchmarks.datetime_filter --values 100000
+#----------------------------------------------------------------------------#
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from formatting import DATETIME_FORMATS, format_datetime
+
+
+def legacy(value, format):
+    # The filter as it was: views passed strftime strings
+    date = dateutil.parser.parse(value.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+    return babel.dates.format_datetime(date, DATETIME_FORMATS[format], locale='en')
+
+
+def babel_datetime(value, format):
+    return babel.dates.format_datetime(value, DATETIME_FORMATS[format], locale='en')
+
+
+def compiled(value, format):
+    return format_datetime(value, format, 'en')
+
+
+def compiled_timezone(value, format):
+    return format_datetime(value, format, 'en', 'America/New_York')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the datetime template filter.')
+    parser.add_argument('--values', type=int, default=100000)
+    parser.add_argument('--format', choices=list(DATETIME_FORMATS), default='full')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    first = datetime(2030, 1, 1)
+    values = [first + timedelta(minutes=rng.randrange(10 * 365 * 24 * 60)) for _ in range(args.values)]
+
+    print(f"{'path':>18} {'seconds':>8} {'us/value':>9}")
+    outputs = {}
+    for name, filter in (('legacy', legacy), ('babel datetime', babel_datetime),
+                         ('compiled', compiled), ('compiled + tz', compiled_timezone)):
+        start = time.perf_counter()
+        outputs[name] = [filter(value, args.format) for value in values]
+        seconds = time.perf_counter() - start
+        print(f'{name:>18} {seconds:>8.2f} {seconds / len(values) * 1e6:>9.2f}')
+
+    assert outputs['compiled'] == outputs['legacy'], 'compiled output differs from Babel'
+    expected = [babel.dates.format_datetime(value, DATETIME_FORMATS[args.format], locale='en',
+                                            tzinfo=babel.dates.get_timezone('America/New_York'))
+                for value in values[:1000]]
+    assert outputs['compiled + tz'][:1000] == expected, 'time zone output differs from Babel'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# Import check: malformed and mistyped rows of a `flask import` file must be
+# rejected one by one, with their line numbers, while the rest of the file
+# is imported. Exits non-zero when a file aborts or a row is misreported.
+#
+#   BENCH_DATABASE_URL=sqlite+pysqlite:////tmp/fyyur_bench.db \
+#       python -m benchmarks.import_errors
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.common import app, db, reset_schema
+from importer import import_file
+from models import Venue, Show
+
+VENUE = {'name': 'Import Hall', 'city': 'Import City', 'state': 'CA', 'address': '1 Import Street'}
+
+# (line text, rejection expected)
+VENUE_LINES = [
+    (json.dumps(VENUE), False),
+    ('{"name": "Broken Hall", "city": ', True),
+    ('["not", "an", "object"]', True),
+    (json.dumps(dict(VENUE, name='Number Genres', genres=5)), True),
+    (json.dumps(dict(VENUE, name='Object Genres', genres={'Jazz': True})), True),
+    (json.dumps(dict(VENUE, name='Nested Genres', genres=[['Jazz']])), True),
+    (json.dumps(dict(VENUE, name='List Name Hall', city=['Import City'])), True),
+    (json.dumps(dict(VENUE, name='Listed Hall', genres=['Jazz'])), False),
+]
+
+SHOW_LINES = [
+    (json.dumps({'venue_name': 'Import Hall', 'venue_city': 'Import City', 'venue_state': 'CA',
+                 'artist_name': 'Import Band', 'artist_city': 'Import City', 'artist_state': 'CA',
+                 'start_time': '2035-01-01T20:00:00Z'}), False),
+    # Not a JSON literal
+    ("{'venue_name': 'Import Hall'}", True),
+    # A list where a natural key part goes
+    (json.dumps({'venue_name': ['Import Hall'], 'venue_city': 'Import City', 'venue_state': 'CA',
+                 'artist_name': 'Import Band', 'artist_city': 'Import City', 'artist_state': 'CA',
+                 'start_time': '2035-01-02T20:00:00Z'}), True),
+]
+
+
+def write(directory, name, lines):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(''.join(text + '\n' for text, rejected in lines))
+    return path
+
+
+def main():
+    failures = []
+
+    def check(description, report, lines):
+        expected = [line for line, (text, rejected) in enumerate(lines, start=1) if rejected]
+        rejected = [line for line, reason in report.examples]
+        imported = len(lines) - len(expected)
+        if rejected != expected or report.imported != imported:
+            failures.append(description)
+            print(f'FAIL {description}: imported {report.imported} (expected {imported}), '
+                  f'rejected lines {rejected} (expected {expected})')
+            return
+        print(f'  ok {description}')
+        for line, reason in report.examples:
+            print(f'       line {line}: {reason}')
+
+    with app.app_context(), tempfile.TemporaryDirectory() as directory:
+        reset_schema()
+        check('venues', import_file('venues', write(directory, 'venues.jsonl', VENUE_LINES)), VENUE_LINES)
+        artists = write(directory, 'artists.jsonl', [(json.dumps(
+            {'name': 'Import Band', 'city': 'Import City', 'state': 'CA'}), False)])
+        import_file('artists', artists)
+        check('shows', import_file('shows', write(directory, 'shows.jsonl', SHOW_LINES)), SHOW_LINES)
+        if db.session.query(Venue).count() != 2 or db.session.query(Show).count() != 1:
+            failures.append('stored rows')
+            print('FAIL stored rows')
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+#----------------------------------------------------------------------------#
+# Load test: a weighted mix of requests to every route on a seeded catalog,
+# with per route latency percentiles, queries and rows fetched per request.
+# Results are written as JSON so runs from two commits can be compared.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.load_test --venues 20000 --output after.json --compare before.json
+#
+# Rows fetched come from the driver's rowcount, which psycopg2 reports for
+# SELECTs and sqlite3 does not, so they are only recorded on Postgres.
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from benchmarks.common import app, db, reset_schema, seed, analyze, CITIES, GENRES
+from cache import response_cache
+
+SEARCH_TERMS = ['venue 1', 'artist 2', 'San', 'york', 'Jazz', 'hop', 'zzz']
+
+
+class RequestStats:
+    """Queries and rows fetched by the request in flight, from engine events."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = 0
+        self.rows = 0
+
+    def reset(self):
+        self.queries = 0
+        self.rows = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if cursor.description is not None and cursor.rowcount > 0:
+            self.rows += cursor.rowcount
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.remove(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+
+#----------------------------------------------------------------------------#
+# Requests. Each takes the test client, a Random and the catalog size, and
+# returns a response.
+#----------------------------------------------------------------------------#
+
+def venue_form(rng, name):
+    city, state = rng.choice(CITIES)
+    return {'name': name, 'city': city, 'state': state, 'address': '1 Load Test Street',
+            'phone': '555-555-5555', 'genres': rng.sample(GENRES, 2),
+            'facebook_link': 'https://www.facebook.com/loadtest', 'website': 'https://example.com'}
+
+
+def artist_form(rng, name):
+    city, state = rng.choice(CITIES)
+    return {'name': name, 'city': city, 'state': state, 'phone': '555-555-5555',
+            'genres': rng.sample(GENRES, 2), 'seeking_venue': 'y',
+            'availabilities-0-day_of_week': str(rng.randrange(7)),
+            'availabilities-0-start_time': '18:00', 'availabilities-0-end_time': '23:59'}
+
+
+def upcoming(rng):
+    start = datetime.now() + timedelta(days=rng.randint(1, 365))
+    return start.replace(hour=rng.randint(18, 21), minute=0, second=0, microsecond=0)
+
+
+def venue_page(client, rng, catalog):
+    venue_id = rng.randint(1, catalog['venues'])
+    response = client.get(f'/venues/{venue_id}')
+    catalog['etags'][venue_id] = response.headers.get('ETag')
+    return response
+
+
+def conditional_venue(client, rng, catalog):
+    # A repeat visit: revalidate a venue page fetched earlier in the run
+    venue_id, etag = rng.choice(list(catalog['etags'].items()) or [(1, None)])
+    return client.get(f'/venues/{venue_id}', headers={'If-None-Match': etag} if etag else {})
+
+
+def delete_venue(client, rng, catalog):
+    catalog['created_venues'] += 1
+    client.post('/venues/create', data=venue_form(rng, f"Doomed Venue {catalog['created_venues']}"))
+    venue_id = catalog['venues'] + catalog['created_venues']
+    return client.delete(f'/venues/{venue_id}')
+
+
+REQUESTS = {
+    'GET /': (5, lambda client, rng, catalog: client.get('/')),
+    'GET /venues': (10, lambda client, rng, catalog: client.get('/venues')),
+    'GET /venues/<id>': (15, venue_page),
+    'GET /venues/<id> (304)': (5, conditional_venue),
+    'POST /venues/search': (8, lambda client, rng, catalog: client.post(
+        '/venues/search', data={'search_term': rng.choice(SEARCH_TERMS)})),
+    'GET /artists': (10, lambda client, rng, catalog: client.get('/artists')),
+    'GET /artists/<id>': (15, lambda client, rng, catalog: client.get(
+        f"/artists/{rng.randint(1, catalog['artists'])}")),
+    'POST /artists/search': (8, lambda client, rng, catalog: client.post(
+        '/artists/search', data={'search_term': rng.choice(SEARCH_TERMS)})),
+    'GET /search': (10, lambda client, rng, catalog: client.get(
+        '/search', query_string={'q': rng.choice(SEARCH_TERMS)[:rng.randint(1, 4)]})),
+    'GET /shows': (10, lambda client, rng, catalog: client.get('/shows')),
+    'GET /venues/create': (1, lambda client, rng, catalog: client.get('/venues/create')),
+    'POST /venues/create': (2, lambda client, rng, catalog: client.post(
+        '/venues/create', data=venue_form(rng, f'Load Venue {rng.random()}'))),
+    'GET /venues/<id>/edit': (1, lambda client, rng, catalog: client.get(
+        f"/venues/{rng.randint(1, catalog['venues'])}/edit")),
+    'POST /venues/<id>/edit': (2, lambda client, rng, catalog: client.post(
+        f"/venues/{rng.randint(1, catalog['venues'])}/edit", data=venue_form(rng, 'Edited Venue'))),
+    'DELETE /venues/<id>': (1, delete_venue),
+    'GET /artists/create': (1, lambda client, rng, catalog: client.get('/artists/create')),
+    'POST /artists/create': (2, lambda client, rng, catalog: client.post(
+        '/artists/create', data=artist_form(rng, f'Load Artist {rng.random()}'))),
+    'GET /artists/<id>/edit': (1, lambda client, rng, catalog: client.get(
+        f"/artists/{rng.randint(1, catalog['artists'])}/edit")),
+    'POST /artists/<id>/edit': (2, lambda client, rng, catalog: client.post(
+        f"/artists/{rng.randint(1, catalog['artists'])}/edit", data=artist_form(rng, 'Edited Artist'))),
+    'GET /shows/create': (1, lambda client, rng, catalog: client.get('/shows/create')),
+    'POST /shows/create': (3, lambda client, rng, catalog: client.post('/shows/create', data={
+        'artist_id': str(rng.randint(1, catalog['artists'])),
+        'venue_id': str(rng.randint(1, catalog['venues'])),
+        'start_time': upcoming(rng).strftime('%Y-%m-%d %H:%M:%S')})),
+    'POST /shows/recurring': (1, lambda client, rng, catalog: client.post('/shows/recurring', json={
+        'artist_id': rng.randint(1, catalog['artists']),
+        'venue_id': rng.randint(1, catalog['venues']),
+        'start_time': upcoming(rng).isoformat(),
+        'rule': 'FREQ=WEEKLY;COUNT=12',
+        'skip_conflicts': True})),
+    'GET /export/shows.jsonl': (1, lambda client, rng, catalog: client.get(
+        '/export/shows.jsonl', query_string={'after_id': catalog['shows'] - 1000})),
+    'GET /export/venues.csv': (1, lambda client, rng, catalog: client.get(
+        '/export/venues.csv', query_string={'after_id': catalog['venues'] - 1000})),
+    'GET /api/v1/venues': (3, lambda client, rng, catalog: client.get(
+        '/api/v1/venues', query_string={'fields': 'name,city,state', 'limit': 100,
+                                        'cursor': rng.randint(0, catalog['venues'])})),
+    'GET /api/v1/venues/<id>': (3, lambda client, rng, catalog: client.get(
+        f"/api/v1/venues/{rng.randint(1, catalog['venues'])}")),
+    'GET /api/v1/shows': (3, lambda client, rng, catalog: client.get(
+        '/api/v1/shows', query_string={'fields': 'start_time,venue_name,artist_name',
+                                       'venue_id': rng.randint(1, catalog['venues'])})),
+    'GET /cache/stats': (1, lambda client, rng, catalog: client.get('/cache/stats')),
+}
+
+
+#----------------------------------------------------------------------------#
+# Statistics.
+#----------------------------------------------------------------------------#
+
+def percentile(sorted_values, fraction):
+    # Nearest rank
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def summarize(samples, record_rows):
+    latencies = sorted(sample['ms'] for sample in samples)
+    queries = [sample['queries'] for sample in samples]
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample['status'])] += 1
+    summary = {
+        'requests': len(samples),
+        'status': dict(statuses),
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50),
+            'p90': percentile(latencies, 0.90),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1],
+            'mean': sum(latencies) / len(latencies),
+        },
+        'queries': {'mean': sum(queries) / len(queries), 'max': max(queries)},
+        'rows': None,
+    }
+    if record_rows:
+        rows = [sample['rows'] for sample in samples]
+        summary['rows'] = {'mean': sum(rows) / len(rows), 'max': max(rows)}
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'route':<26} {'n':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'queries':>8} {'rows':>8}")
+    for route, summary in results['routes'].items():
+        latency = summary['latency_ms']
+        rows = summary['rows']['mean'] if summary['rows'] else float('nan')
+        line = (f"{route:<26} {summary['requests']:>5} {latency['p50']:>8.2f} {latency['p90']:>8.2f} "
+                f"{latency['p99']:>8.2f} {summary['queries']['mean']:>8.1f} {rows:>8.1f}")
+        before = (baseline or {}).get('routes', {}).get(route)
+        if before:
+            change = latency['p50'] / max(before['latency_ms']['p50'], 1e-9) - 1
+            line += (f"   p50 {change:+.0%}, queries "
+                     f"{summary['queries']['mean'] - before['queries']['mean']:+.1f}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive every route and record latency and queries.')
+    parser.add_argument('--venues', type=int, default=5000)
+    parser.add_argument('--shows-per-venue', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200, help='Requests sent before measuring.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the request mix.')
+    parser.add_argument('--routes', nargs='+', choices=list(REQUESTS), help='Only these routes.')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the page data cache.')
+    parser.add_argument('--output', default='load_test.json')
+    parser.add_argument('--compare', help='Results of an earlier run to compare against.')
+    args = parser.parse_args()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    if args.no_cache:
+        app.config['CACHE_BACKEND'] = 'none'
+        response_cache.init_app(app)
+
+    routes = args.routes or list(REQUESTS)
+    weights = [REQUESTS[route][0] for route in routes]
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    samples = defaultdict(list)
+
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        reset_schema()
+        seed(args.venues, shows_per_venue=args.shows_per_venue)
+        analyze()
+        catalog = {'venues': args.venues, 'artists': max(args.venues // 4, 1),
+                   'shows': args.venues * args.shows_per_venue, 'created_venues': 0, 'etags': {}}
+        db.session.remove()
+
+    # Requests run outside any app context, so each gets its own and its
+    # session is removed at teardown, as in production
+    with RequestStats(engine) as stats:
+        for n in range(args.warmup + args.requests):
+            route = rng.choices(routes, weights)[0]
+            stats.reset()
+            start = time.perf_counter()
+            response = REQUESTS[route][1](client, rng, catalog)
+            # Streamed bodies are produced while they are read
+            response.get_data()
+            ms = (time.perf_counter() - start) * 1000
+            if n >= args.warmup:
+                samples[route].append({'ms': ms, 'queries': stats.queries, 'rows': stats.rows,
+                                       'status': response.status_code})
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'dialect': dialect,
+            'venues': args.venues,
+            'shows_per_venue': args.shows_per_venue,
+            'requests': args.requests,
+            'seed': args.seed,
+            'cache': not args.no_cache,
+        },
+        'routes': {route: summarize(samples[route], dialect == 'postgresql')
+                   for route in routes if samples[route]},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print_results(results, baseline)
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Page version check: a venue or artist page must not be answered with 304
+# once a show has moved from its upcoming to its past list. The clock is
+# moved through one time bucket and into the next around a show's start,
+# revalidating the page with its last ETag each time, with the page data
+# cache on. Exits non-zero on a stale 304.
+#
+#   BENCH_DATABASE_URL=sqlite+pysqlite:////tmp/fyyur_bench.db \
+#       python -m benchmarks.page_versions
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime, timezone
+from unittest import mock
+
+from benchmarks.common import app, db, reset_schema, seed
+from cache import response_cache
+from clock import utcnow
+from models import Venue, Artist, Show
+
+
+def main():
+    app.config['NOW_BUCKET_SECONDS'] = 60
+    with app.app_context():
+        reset_schema()
+        seed(2, shows_per_venue=0)
+        # A bucket well after the rows were written, and a show in its middle
+        bucket = (int(utcnow().timestamp()) // 60 + 10) * 60
+        start = datetime.fromtimestamp(bucket + 30, timezone.utc)
+        venue_id, artist_id = db.session.query(Venue.id).first()[0], db.session.query(Artist.id).first()[0]
+        db.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=start))
+        db.session.commit()
+    response_cache.init_app(app)
+    failures = []
+
+    def at(offset):
+        # The app's clock, `offset` seconds after the show's bucket starts
+        return mock.patch('clock.utcnow',
+                          return_value=datetime.fromtimestamp(bucket + offset, timezone.utc))
+
+    for url in (f'/venues/{venue_id}', f'/artists/{artist_id}'):
+        client = app.test_client()
+        etag = kept = None
+        # Before the start, after it within the same bucket, then in the next
+        # bucket: the page shows the show as upcoming until the last
+        for offset, upcoming in ((10, 1), (40, 1), (70, 0)):
+            with at(offset):
+                response = client.get(url, headers={'If-None-Match': etag} if etag else {})
+                if response.status_code != 304:
+                    etag, kept = response.headers['ETag'], response.get_data(as_text=True)
+            # On a 304 the client shows the page it kept
+            if f'{upcoming} Upcoming' not in kept:
+                failures.append(f'{url} at +{offset}s')
+                print(f'FAIL {url} at +{offset}s: {response.status_code} for a page without '
+                      f'{upcoming} upcoming shows')
+                continue
+            print(f'  ok {url} at +{offset}s: {response.status_code}, {upcoming} upcoming')
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#----------------------------------------------------------------------------#
+# Query plan check: EXPLAIN every statement each route runs against a seeded
+# Postgres database and fail if one sequentially scans a table it should
+# reach through an index.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.query_plans --venues 100000
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import sys
+
+from sqlalchemy import event
+
+from benchmarks.common import app, db, reset_schema, seed, create_trigram_indexes, analyze
+
+# (method, url, form data, tables the route may scan in full)
+ROUTES = [
+    ('GET', '/venues', None, {'venue'}),
+    ('GET', '/artists', None, {'artist'}),
+    ('GET', '/shows', None, set()),
+    ('GET', '/shows?from=2030-01-01&to=2030-02-01', None, set()),
+    ('GET', '/venues/1', None, set()),
+    ('GET', '/venues/1?past_page=2', None, set()),
+    ('GET', '/artists/1', None, set()),
+    # The typeahead index is built from a full read of venues and artists
+    ('GET', '/search?q=venue%2012', None, {'venue', 'artist'}),
+    ('POST', '/shows/create', {'artist_id': '1', 'venue_id': '1', 'start_time': '2035-04-06 20:00:00'}, set()),
+]
+
+SEARCH_ROUTES = [
+    ('POST', '/venues/search', {'search_term': 'venue 12'}, set()),
+    ('POST', '/artists/search', {'search_term': 'artist 12'}, set()),
+]
+
+
+def capture_statements(client, method, url, data):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.open(url, method=method, data=data)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response.status_code, statements
+
+
+def seq_scans(plan):
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan['Relation Name']
+    for child in plan.get('Plans', []):
+        yield from seq_scans(child)
+
+
+def explain(statement, parameters):
+    with db.engine.connect() as connection:
+        result = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check route query plans for sequential scans.')
+    parser.add_argument('--venues', type=int, default=100000)
+    args = parser.parse_args()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    failures = []
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            raise SystemExit('The query plan check needs a Postgres BENCH_DATABASE_URL.')
+        reset_schema()
+        seed(args.venues)
+        routes = list(ROUTES)
+        if create_trigram_indexes():
+            routes += SEARCH_ROUTES
+        else:
+            print('pg_trgm is not available; skipping the search routes')
+        analyze()
+
+        for method, url, data, allowed in routes:
+            status, statements = capture_statements(client, method, url, data)
+            scanned = set()
+            for statement, parameters in statements:
+                scanned.update(seq_scans(explain(statement, parameters)))
+            unexpected = scanned - allowed
+            print(f"{method:>6} {url:<45} {status} {len(statements):>3} queries"
+                  f"  seq scans: {', '.join(sorted(scanned)) or '-'}")
+            if unexpected:
+                failures.append((method, url, unexpected))
+
+    for method, url, tables in failures:
+        print(f"FAIL {method} {url}: sequential scan on {', '.join(sorted(tables))}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
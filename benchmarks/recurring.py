@@ -0,0 +1,104 @@
+#----------------------------------------------------------------------------#
+# Benchmark: booking a residency through the recurring show endpoint vs one
+# create show form post per occurrence. Also checks that both reject an
+# artist or venue that doesn't exist.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.recurring --counts 52 1000 10000
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from datetime import datetime, time as dt_time
+
+from dateutil.rrule import rrule, DAILY
+
+from benchmarks.common import app, db, QueryCounter, reset_schema, seed
+from models import Venue, Artist, Show, ArtistAvailability
+
+FIRST = datetime(2031, 1, 3, 20, 0)
+
+
+def post_forms(client, artist_id, venue_id, count):
+    # The one-post-per-show way of booking a residency
+    for start_time in rrule(DAILY, dtstart=FIRST, count=count):
+        client.post('/shows/create', data={
+            'artist_id': str(artist_id),
+            'venue_id': str(venue_id),
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+
+def post_rule(client, artist_id, venue_id, count):
+    response = client.post('/shows/recurring', json={
+        'artist_id': artist_id,
+        'venue_id': venue_id,
+        'start_time': FIRST.isoformat(),
+        'rule': f'FREQ=DAILY;COUNT={count}',
+    })
+    assert response.status_code == 201, response.get_json()
+
+
+def check_unknown_ids(client, artist_id, venue_id):
+    # A missing artist or venue is reported, and nothing is booked
+    for artist, venue, missing in ((artist_id + 10**6, venue_id, 'artist'),
+                                   (artist_id, venue_id + 10**6, 'venue')):
+        message = f'There is no {missing} with id'
+        body = client.post('/shows/create', data={
+            'artist_id': str(artist),
+            'venue_id': str(venue),
+            'start_time': FIRST.strftime('%Y-%m-%d %H:%M:%S'),
+        }).get_data(as_text=True)
+        assert message in body, f'create show form: no error for a missing {missing}'
+        response = client.post('/shows/recurring', json={
+            'artist_id': artist,
+            'venue_id': venue,
+            'start_time': FIRST.isoformat(),
+            'rule': 'FREQ=DAILY;COUNT=3',
+        })
+        assert response.status_code == 404 and message in response.get_json()['error'], \
+            f'recurring shows: {response.status_code} for a missing {missing}'
+    assert Show.query.filter_by(artist_id=artist_id).count() == 0
+    print('unknown artist and venue ids rejected')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark recurring show booking.')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--counts', type=int, nargs='+', default=[52, 1000, 10000])
+    parser.add_argument('--form-posts', type=int, default=52)
+    args = parser.parse_args()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    with app.app_context():
+        print(f"{'shows':>7} {'path':>10} {'queries':>8} {'seconds':>9}")
+        for name, book, counts in (('form posts', post_forms, [args.form_posts]),
+                                   ('recurring', post_rule, args.counts)):
+            for count in counts:
+                reset_schema()
+                seed(args.venues)
+                # A fresh artist and venue, available every evening
+                artist = Artist(name='Resident', city='Austin', state='TX')
+                venue = Venue(name='Residency Hall', city='Austin', state='TX', address='1 Main St')
+                artist.availabilities = [ArtistAvailability(day_of_week=day, start_time=dt_time(18, 0),
+                                                            end_time=dt_time(23, 59)) for day in range(7)]
+                db.session.add_all([artist, venue])
+                db.session.commit()
+                artist_id, venue_id = artist.id, venue.id
+                db.session.remove()
+
+                if name == 'form posts':
+                    check_unknown_ids(client, artist_id, venue_id)
+                with QueryCounter(db.engine) as counter:
+                    start = time.perf_counter()
+                    book(client, artist_id, venue_id, count)
+                    seconds = time.perf_counter() - start
+                booked = Show.query.filter_by(venue_id=venue_id).count()
+                assert booked == count, (booked, count)
+                db.session.remove()
+                print(f'{count:>7} {name:>10} {counter.count:>8} {seconds:>9.3f}')
+
+
+if __name__ == '__main__':
+    main()
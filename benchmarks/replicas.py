@@ -0,0 +1,162 @@
+#----------------------------------------------------------------------------#
+# Replica routing check: with a primary and a read replica, the read views
+# must query only the replica, the writes and edit forms only the primary,
+# and a client must read its own writes (a create, an edit and a delete)
+# until REPLICA_STICKY_SECONDS pass, with the page data cache on.
+# Replication is simulated by copying every table from the primary to the
+# replica, so between copies the replica is stale like a lagging one. Exits
+# non-zero on a misrouted request.
+#
+# Two SQLite files (the replica defaults to the primary's file + -replica):
+#   BENCH_DATABASE_URL=sqlite+pysqlite:////tmp/fyyur_bench.db python -m benchmarks.replicas
+# Two Postgres databases:
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#   BENCH_REPLICA_URL=postgresql://localhost:5433/fyyur_bench python -m benchmarks.replicas
+#----------------------------------------------------------------------------#
+
+import os
+import sys
+import time
+
+if 'BENCH_DATABASE_URL' in os.environ and 'BENCH_REPLICA_URL' not in os.environ:
+    if not os.environ['BENCH_DATABASE_URL'].startswith('sqlite'):
+        raise SystemExit('Set BENCH_REPLICA_URL to a second scratch database to stand in for the replica.')
+    os.environ['BENCH_REPLICA_URL'] = os.environ['BENCH_DATABASE_URL'] + '-replica'
+os.environ['DATABASE_REPLICA_URLS'] = os.environ.get('BENCH_REPLICA_URL', '')
+
+from benchmarks.common import app, db, QueryCounter, reset_schema, seed
+from cache import response_cache
+from models import Venue
+
+VENUE = {
+    'name': 'Replica Check Hall',
+    'city': 'Replica City',
+    'state': 'CA',
+    'address': '1 Replica Street',
+    'phone': '415-000-1234',
+    'genres': 'Jazz',
+}
+
+READS = [
+    ('GET', '/venues'),
+    ('GET', '/artists'),
+    ('GET', '/shows'),
+    ('GET', '/venues/1'),
+    ('GET', '/artists/1'),
+    ('GET', '/search?q=venue'),
+    ('GET', '/api/v1/venues?fields=name'),
+    ('POST', '/venues/search'),
+    ('POST', '/artists/search'),
+]
+
+PRIMARY_READS = [
+    ('GET', '/venues/1/edit'),
+    ('GET', '/artists/1/edit'),
+]
+
+
+def replicate():
+    # Copy every table from the primary, as replication would
+    replica = db.get_engine(app, bind='replica_0')
+    metadata = db.Model.metadata
+    metadata.drop_all(replica)
+    metadata.create_all(replica)
+    with db.engine.connect() as source, replica.begin() as target:
+        for table in metadata.sorted_tables:
+            rows = source.execute(table.select()).mappings().all()
+            if rows:
+                target.execute(table.insert(), [dict(row) for row in rows])
+
+
+def main():
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['REPLICA_STICKY_SECONDS'] = 2
+    with app.app_context():
+        reset_schema()
+        seed(20)
+        replicate()
+        primary, replica = db.engine, db.get_engine(app, bind='replica_0')
+        db.session.remove()
+    failures = []
+
+    def fail(description):
+        failures.append(description)
+        print(f'FAIL {description}')
+
+    def routed(description, client, method, url, expected):
+        # Which databases the request queried: 'replica' or 'primary'
+        with QueryCounter(primary) as on_primary, QueryCounter(replica) as on_replica:
+            response = client.open(url, method=method,
+                                   data={'search_term': 'venue'} if method == 'POST' else None)
+        if response.status_code >= 400:
+            return fail(f'{description}: {method} {url} returned {response.status_code}')
+        queried = {'primary': on_primary.count, 'replica': on_replica.count}
+        other = 'primary' if expected == 'replica' else 'replica'
+        if queried[other] or not queried[expected]:
+            return fail(f'{description}: {method} {url} queried {queried}')
+        print(f'  ok {description}: {method} {url} on the {expected}')
+
+    def shown(description, client, url, text, present=True):
+        # Read twice: the first read may fill the cache, the second must hit it
+        for _ in range(2):
+            body = client.get(url).get_data(as_text=True)
+            if (text in body) != present:
+                return fail(description)
+        print(f'  ok {description}')
+
+    def replicated():
+        with app.app_context():
+            replicate()
+        # Entries computed from the stale replica last until CACHE_TTL
+        response_cache.init_app(app)
+
+    # Async views read through their own engines, which the counters don't see
+    if not app.config['ASYNC_VIEWS']:
+        client = app.test_client()
+        for method, url in READS:
+            routed('read view', client, method, url, 'replica')
+        for method, url in PRIMARY_READS:
+            routed('edit form', client, method, url, 'primary')
+
+    # Each write comes from a new client, so only the write itself can make
+    # it read the primary
+    other = app.test_client()
+    writer = app.test_client()
+    with QueryCounter(replica) as on_replica:
+        writer.post('/venues/create', data=VENUE)
+    if on_replica.count:
+        fail(f'create venue queried the replica {on_replica.count} times')
+    with app.app_context():
+        venue_id = db.session.query(Venue.id).filter_by(name=VENUE['name']).scalar()
+    if not venue_id:
+        fail('new venue was not written to the primary')
+    shown('writer reads its create from the primary', writer, '/venues', VENUE['name'])
+    shown('other clients read the stale replica', other, '/venues', VENUE['name'], False)
+    time.sleep(app.config['REPLICA_STICKY_SECONDS'] + 0.5)
+    shown('writer reads the replica again once stickiness expires', writer, '/venues', VENUE['name'], False)
+    replicated()
+    shown('everyone sees the create once replicated', other, '/venues', VENUE['name'])
+
+    writer = app.test_client()
+    writer.post(f'/venues/{venue_id}/edit', data=dict(VENUE, name='Replica Check Arena'))
+    shown('writer reads its edit on the page', writer, f'/venues/{venue_id}', 'Replica Check Arena')
+    shown('writer reads its edit in the listing', writer, '/venues', 'Replica Check Arena')
+    shown('other clients read the page before the edit', other, f'/venues/{venue_id}', VENUE['name'])
+    replicated()
+    shown('everyone sees the edit once replicated', other, f'/venues/{venue_id}', 'Replica Check Arena')
+
+    writer = app.test_client()
+    writer.delete(f'/venues/{venue_id}')
+    shown('writer reads its delete on the page', writer, f'/venues/{venue_id}', 'Replica Check Arena', False)
+    shown('writer reads its delete in the listing', writer, '/venues', 'Replica Check Arena', False)
+    shown('other clients read the listing before the delete', other, '/venues', 'Replica Check Arena')
+    replicated()
+    shown('everyone sees the delete once replicated', other, '/venues', 'Replica Check Arena', False)
+
+    if failures:
+        sys.exit(f'{len(failures)} replica routing check(s) failed')
+    print('replica routing ok')
+
+
+if __name__ == '__main__':
+    main()
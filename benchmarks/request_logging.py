@@ -0,0 +1,201 @@
+#----------------------------------------------------------------------------#
+# Request latency under each way of writing the logs (see logs.py):
+#
+#   file     the FileHandler create_app used to install: every record is
+#            formatted and written in the request thread, under the
+#            handler's lock;
+#   queue    the queue pipeline, keeping every record;
+#   sampled  the queue pipeline with the configured LOG_SAMPLE_RATES.
+#
+# --concurrency threads each send a weighted mix of the listings and the
+# pages of the first --pages venues and artists for --duration seconds per
+# mode, and every request logs its metrics line. Those pages are cached
+# before the first mode, so requests spend little time outside logging and
+# every mode finds the same cache. --disk-delay-ms makes each write that
+# much slower, like a busy disk or a network filesystem. Also reports how
+# many lines were written and how long the queue took to drain at the end.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.request_logging --concurrency 8 --disk-delay-ms 2
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from logging import FileHandler, Formatter
+
+LOG_DIR = tempfile.mkdtemp(prefix='fyyur-logs-')
+os.environ['LOG_FILE'] = os.path.join(LOG_DIR, 'startup.log')
+os.environ['CACHE_BACKEND'] = 'memory'
+
+from benchmarks.common import app, db, reset_schema, seed, analyze
+from benchmarks.load_test import percentile, git_commit
+from cache import response_cache
+from logs import log_pipeline, log_file_handler
+
+MODES = ('file', 'queue', 'sampled')
+
+# route: (weight, path for the number of pages)
+ROUTES = {
+    '/venues': (1, lambda rng, pages: '/venues'),
+    '/artists': (1, lambda rng, pages: '/artists'),
+    '/shows': (2, lambda rng, pages: '/shows'),
+    '/venues/<id>': (3, lambda rng, pages: f'/venues/{rng.randint(1, pages)}'),
+    '/artists/<id>': (3, lambda rng, pages: f'/artists/{rng.randint(1, pages)}'),
+}
+
+
+def slowed(handler, delay):
+    # Each write takes `delay` seconds longer
+    if delay:
+        emit = handler.emit
+
+        def slow_emit(record):
+            time.sleep(delay)
+            emit(record)
+        handler.emit = slow_emit
+    return handler
+
+
+def install(mode, path, delay, sample_rates):
+    """Log the app's records the way `mode` does, to `path`."""
+    log_pipeline.stop()
+    app.logger.removeHandler(log_pipeline.handler)
+    if mode == 'file':
+        handler = FileHandler(path)
+        handler.setFormatter(
+            Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        )
+        app.logger.addHandler(slowed(handler, delay))
+        return handler
+    app.config['LOG_SAMPLE_RATES'] = sample_rates if mode == 'sampled' else {}
+    log_pipeline.start(app.logger, slowed(log_file_handler(dict(app.config, LOG_FILE=path)), delay))
+    return None
+
+
+def client(paths, deadline, samples, errors):
+    rng = random.Random(threading.get_ident())
+    routes = list(paths)
+    weights = [ROUTES[route][0] for route in routes]
+    test_client = app.test_client()
+    while time.perf_counter() < deadline:
+        route = rng.choices(routes, weights)[0]
+        start = time.perf_counter()
+        response = test_client.get(paths[route](rng))
+        response.get_data()
+        samples[route].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors[route] += 1
+
+
+def prime(pages):
+    test_client = app.test_client()
+    for path in ['/venues', '/artists', '/shows']:
+        test_client.get(path)
+    for n in range(1, pages + 1):
+        test_client.get(f'/venues/{n}')
+        test_client.get(f'/artists/{n}')
+
+
+def run(mode, args, sample_rates):
+    path = os.path.join(LOG_DIR, f'{mode}.log')
+    handler = install(mode, path, args.disk_delay_ms / 1000, sample_rates)
+    paths = {route: (lambda rng, make=make: make(rng, args.pages)) for route, (weight, make) in ROUTES.items()}
+    for phase, seconds in (('warmup', args.warmup), ('measure', args.duration)):
+        samples, errors = defaultdict(list), defaultdict(int)
+        deadline = time.perf_counter() + seconds
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(paths, deadline, samples, errors))
+                   for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    # The records still queued when the clients stop
+    stopping = time.perf_counter()
+    if handler is None:
+        log_pipeline.stop()
+    else:
+        app.logger.removeHandler(handler)
+        handler.close()
+    drain = time.perf_counter() - stopping
+    with open(path) as f:
+        lines = sum(1 for line in f)
+
+    latencies = sorted(ms for values in samples.values() for ms in values)
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {'p50': percentile(latencies, 0.5), 'p90': percentile(latencies, 0.9),
+                       'p99': percentile(latencies, 0.99)},
+        # Warmup and measured requests both log
+        'lines': lines,
+        'drain_seconds': drain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Request latency with each way of writing the logs.')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--shows-per-venue', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=100, help='Venue and artist pages requested.')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads.')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds measured per mode.')
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds before measuring.')
+    parser.add_argument('--disk-delay-ms', type=float, default=0, help='Added to every log write.')
+    parser.add_argument('--output', default='request_logging.json')
+    args = parser.parse_args()
+
+    app.config['METRICS_LOG_REQUESTS'] = True
+    # Nothing expires while the modes run
+    app.config['CACHE_TTL'] = 24 * 3600
+    response_cache.init_app(app)
+    sample_rates = app.config['LOG_SAMPLE_RATES']
+    args.pages = min(args.pages, max(args.venues // 4, 1))
+    with app.app_context():
+        reset_schema()
+        seed(args.venues, shows_per_venue=args.shows_per_venue)
+        analyze()
+        db.session.remove()
+    prime(args.pages)
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'cpus': os.cpu_count(),
+            'venues': args.venues,
+            'pages': args.pages,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'disk_delay_ms': args.disk_delay_ms,
+        },
+        'modes': {mode: run(mode, args, sample_rates) for mode in args.modes},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.concurrency} clients, {args.duration:g}s per mode, "
+          f"{args.disk_delay_ms:g} ms added per log write; logs in {LOG_DIR}")
+    print(f"{'mode':<8} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'lines':>7} {'drain s':>8}")
+    for mode, summary in results['modes'].items():
+        latency = summary['latency_ms']
+        print(f"{mode:<8} {summary['requests']:>8} {summary['errors']:>6} "
+              f"{summary['requests_per_second']:>8.1f} {latency['p50']:>8.2f} {latency['p90']:>8.2f} "
+              f"{latency['p99']:>8.2f} {summary['lines']:>7} {summary['drain_seconds']:>8.2f}")
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
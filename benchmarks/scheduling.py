@@ -0,0 +1,102 @@
+#----------------------------------------------------------------------------#
+# Benchmark: show scheduling checks for a busy artist and venue, lazy loops
+# vs the set-based query vs the in-memory indexes.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.scheduling --windows 500 --shows 5000
+#----------------------------------------------------------------------------#
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone, time as dt_time
+
+from benchmarks.common import app, db, QueryCounter, reset_schema, seed, analyze
+from models import Venue, Artist, Show, ArtistAvailability
+from scheduling import schedule_problems, show_duration, Schedule
+
+FIRST = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def legacy_problems(artist_id, venue_id, start_time):
+    # The lazy availability loop the create show view used to run, plus the
+    # obvious conflict scan over every show of the artist and the venue
+    duration = show_duration()
+    artist = Artist.query.get(artist_id)
+    venue = Venue.query.get(venue_id)
+    problems = []
+    if not any(availability.day_of_week == start_time.weekday() and
+               availability.start_time <= start_time.time() <= availability.end_time
+               for availability in artist.availabilities):
+        problems.append('Artist is not available at this time.')
+    for shows in (venue.shows, artist.shows):
+        if any(abs(show.start_time - start_time) < duration for show in shows):
+            problems.append('conflict')
+    return problems
+
+
+def busy_schedule(artist_id, venue_id, windows, shows, rng):
+    # Many short, partly overlapping availability windows, and shows every
+    # few hours for both the artist (at other venues) and the venue
+    db.session.bulk_insert_mappings(ArtistAvailability, [{
+        'artist_id': artist_id,
+        'day_of_week': i % 7,
+        'start_time': dt_time(rng.randrange(24), rng.choice((0, 30))),
+        'end_time': dt_time(23, 59),
+    } for i in range(windows)])
+    db.session.bulk_insert_mappings(Show, [{
+        'artist_id': artist_id if i % 2 else rng.randrange(1, artist_id),
+        'venue_id': venue_id if i % 2 == 0 else rng.randrange(1, venue_id),
+        'start_time': FIRST + timedelta(hours=7 * i),
+    } for i in range(shows)])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark show scheduling checks.')
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--windows', type=int, default=500)
+    parser.add_argument('--shows', type=int, default=5000)
+    parser.add_argument('--checks', type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(11)
+
+    with app.app_context():
+        reset_schema()
+        seed(args.venues)
+        artist_id = db.session.query(db.func.max(Artist.id)).scalar()
+        venue_id = db.session.query(db.func.max(Venue.id)).scalar()
+        busy_schedule(artist_id, venue_id, args.windows, args.shows, rng)
+        analyze()
+
+        last = FIRST + timedelta(hours=7 * args.shows)
+        span = int((last - FIRST).total_seconds() // 60)
+        candidates = [FIRST + timedelta(minutes=rng.randrange(span)) for _ in range(args.checks)]
+
+        print(f'{args.windows} availability windows, {args.shows} shows, {args.checks} checks')
+        print(f"{'path':>10} {'queries':>8} {'ms/check':>9}")
+        results = {}
+        for name, check in (('legacy', legacy_problems), ('set-based', schedule_problems)):
+            with QueryCounter(db.engine) as counter:
+                start = time.perf_counter()
+                results[name] = [bool(check(artist_id, venue_id, t)) for t in candidates]
+                seconds = time.perf_counter() - start
+            db.session.remove()
+            print(f'{name:>10} {counter.count:>8} {seconds * 1000 / args.checks:>9.3f}')
+
+        with QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            schedule = Schedule(artist_id, venue_id, min(candidates), max(candidates))
+            results['in-memory'] = [bool(schedule.problems(t)) for t in candidates]
+            seconds = time.perf_counter() - start
+        print(f"{'in-memory':>10} {counter.count:>8} {seconds * 1000 / args.checks:>9.3f}"
+              f"  (including the two loading queries)")
+
+        if results['set-based'] != results['in-memory']:
+            raise SystemExit('The set-based and in-memory checks disagree.')
+        if results['set-based'] != results['legacy']:
+            raise SystemExit('The set-based and legacy checks disagree.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#----------------------------------------------------------------------------#
+# Benchmark: venue search, sequential ILIKE scan vs indexed search.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.search_index --size 100000
+#----------------------------------------------------------------------------#
+
+import argparse
+import statistics
+import time
+
+from benchmarks.common import app, db, reset_schema, seed, create_trigram_indexes, analyze
+from models import Venue
+import search
+
+TERMS = ['Venue 4242', '4242', 'austin', 'Jazz', 'nothing here']
+
+
+def legacy_search(term):
+    # The unindexed name scan the search views used to run
+    return Venue.query.filter(Venue.name.ilike(f'%{term}%')).all()
+
+
+def median_ms(fn, term, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(term)
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.remove()
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark venue search paths.')
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with app.app_context():
+        reset_schema()
+        seed(args.size)
+
+        paths = {'legacy scan': legacy_search}
+        if create_trigram_indexes():
+            analyze()
+            paths['trigram'] = lambda term: search.search_results(Venue, term, 50)
+        else:
+            print('pg_trgm is not available; skipping the trigram path')
+
+        app.config['SEARCH_BACKEND'] = 'ngram'
+        start = time.perf_counter()
+        search.ngram_index(Venue)
+        print(f'n-gram index built over {args.size} venues in {time.perf_counter() - start:.2f}s')
+        paths['ngram'] = lambda term: search.search_results(Venue, term, 50)
+
+        print(f"{'term':>14} " + ' '.join(f'{name:>12}' for name in paths) + '  (median ms)')
+        for term in TERMS:
+            row = []
+            for name, fn in paths.items():
+                app.config['SEARCH_BACKEND'] = 'ngram' if name == 'ngram' else 'trigram'
+                row.append(median_ms(fn, term, args.repeat))
+            print(f'{term:>14} ' + ' '.join(f'{ms:>12.2f}' for ms in row))
+
+
+if __name__ == '__main__':
+    main()
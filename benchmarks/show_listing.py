@@ -0,0 +1,61 @@
+#----------------------------------------------------------------------------#
+# Benchmark: /shows listing, lazy-loaded rows vs keyset pages.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.show_listing --venues 10000
+#----------------------------------------------------------------------------#
+
+import argparse
+
+from benchmarks.common import app, db, QueryCounter, timed, reset_schema, seed
+from listings import shows_page, parse_cursor
+from models import Show
+
+
+def legacy_shows(limit):
+    # The lazy-loading loop the /shows view used to run, over the same page size
+    data = []
+    for show in Show.query.order_by(Show.start_time, Show.id).limit(limit).all():
+        data.append({
+            "venue_id": show.venue_id,
+            "venue_name": show.venue.name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist.name,
+            "artist_image_link": show.artist.image_link,
+            "start_time": show.start_time.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        })
+    return data
+
+
+def measure(fn, *args):
+    result = {}
+    with QueryCounter(db.engine) as counter, timed(result):
+        fn(*args)
+    db.session.remove()
+    return counter.count, result['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /shows listing.')
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    print(f"{'page size':>10} {'path':>8} {'queries':>8} {'seconds':>9}")
+    with app.app_context():
+        reset_schema()
+        seed(args.venues)
+        for size in args.page_sizes:
+            for name, fn in (('legacy', legacy_shows), ('keyset', shows_page)):
+                queries, seconds = measure(fn, size)
+                print(f"{size:>10} {name:>8} {queries:>8} {seconds:>9.3f}")
+
+        # A deep page costs the same as the first one with keyset cursors
+        _, cursor = shows_page(args.page_sizes[-1])
+        if cursor:
+            queries, seconds = measure(shows_page, 100, parse_cursor(cursor))
+            print(f"{'100 @deep':>10} {'keyset':>8} {queries:>8} {seconds:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
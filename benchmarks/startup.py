@@ -0,0 +1,123 @@
+#----------------------------------------------------------------------------#
+# Benchmark: cold start cost of each entry point, from fresh interpreters
+# run with `python -X importtime`. For each entry point it reports the
+# median wall time and import time over --repeat runs and the packages
+# whose imports cost the most. Needs no database: nothing here connects.
+# Results are written as JSON so runs from two commits can be compared.
+#
+#   python -m benchmarks.startup --output after.json --compare before.json
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# entry point: (description, python arguments after -X importtime)
+ENTRY_POINTS = {
+    'wsgi': ('a web worker importing app.py', ['-c', 'import app']),
+    'seed': ('a seed script building the app without views',
+             ['-c', 'from factory import create_app; create_app(views=False)']),
+    'cli': ('the flask command loading the app', ['-m', 'flask', '--help']),
+}
+
+
+def parse_importtime(stderr):
+    # Microseconds spent importing each top-level package, summed over its
+    # modules' own (not cumulative) times, so that an import is counted
+    # once whichever module pulled it in
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return packages
+
+
+def run_once(arguments):
+    env = dict(os.environ, FLASK_APP='app.py')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', *arguments], cwd=BASEDIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f'{" ".join(arguments)} failed:\n{result.stderr[-2000:]}')
+    return wall_ms, parse_importtime(result.stderr)
+
+
+def measure(arguments, repeat):
+    # One run first so .pyc files are written before timing
+    run_once(arguments)
+    runs = [run_once(arguments) for _ in range(repeat)]
+    wall_ms = statistics.median(wall for wall, modules in runs)
+    names = set().union(*(modules for wall, modules in runs))
+    modules = {name: statistics.median(modules.get(name, 0) for wall, modules in runs) / 1000
+               for name in names}
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': statistics.median(sum(modules.values()) for wall, modules in runs) / 1000,
+        'modules_ms': dict(sorted(modules.items(), key=lambda item: -item[1])),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=BASEDIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold start cost of each entry point.')
+    parser.add_argument('--entry-points', nargs='+', choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per entry point.')
+    parser.add_argument('--top', type=int, default=8, help='Slowest packages listed per entry point.')
+    parser.add_argument('--output', default='startup.json')
+    parser.add_argument('--compare', help='Results of an earlier run to compare against.')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'repeat': args.repeat,
+        },
+        'entry_points': {name: measure(ENTRY_POINTS[name][1], args.repeat) for name in args.entry_points},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+
+    for name, summary in results['entry_points'].items():
+        before = baseline.get('entry_points', {}).get(name)
+
+        def delta(key):
+            if before is None:
+                return ''
+            return f" (was {before[key]:.0f} ms, {summary[key] - before[key]:+.0f} ms)"
+
+        print(f"{name}: {ENTRY_POINTS[name][0]}")
+        print(f"  wall   {summary['wall_ms']:>7.0f} ms{delta('wall_ms')}")
+        print(f"  import {summary['import_ms']:>7.0f} ms{delta('import_ms')}")
+        for module, ms in list(summary['modules_ms'].items())[:args.top]:
+            print(f"    {module:<28} {ms:>7.1f} ms")
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Benchmark: /venues listing.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.venue_listing --sizes 1000 10000 100000
+#----------------------------------------------------------------------------#
+
+import argparse
+from datetime import datetime
+
+from benchmarks.common import app, db, QueryCounter, timed, reset_schema, seed
+from listings import venue_areas
+from models import Venue, Show
+
+
+def legacy_venue_areas():
+    # The per-venue COUNT loop the /venues view used to run.
+    areas = {}
+    for venue in Venue.query.all():
+        key = (venue.city, venue.state)
+        if key not in areas:
+            areas[key] = {"city": venue.city, "state": venue.state, "venues": []}
+        num_upcoming_shows = db.session.query(Show).filter(
+            Show.venue_id == venue.id,
+            Show.start_time > datetime.now()
+        ).count()
+        areas[key]["venues"].append({
+            "id": venue.id,
+            "name": venue.name,
+            "num_upcoming_shows": num_upcoming_shows
+        })
+    return [areas[key] for key in sorted(areas.keys())]
+
+
+def measure(fn):
+    result = {}
+    with QueryCounter(db.engine) as counter, timed(result):
+        fn()
+    db.session.remove()
+    return counter.count, result['seconds']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /venues listing.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='skip the legacy N+1 path above this many venues')
+    args = parser.parse_args()
+
+    print(f"{'venues':>8} {'path':>10} {'queries':>8} {'seconds':>9}")
+    with app.app_context():
+        for size in args.sizes:
+            reset_schema()
+            seed(size)
+            if size <= args.legacy_max:
+                queries, seconds = measure(legacy_venue_areas)
+                print(f"{size:>8} {'legacy':>10} {queries:>8} {seconds:>9.3f}")
+            queries, seconds = measure(venue_areas)
+            print(f"{size:>8} {'grouped':>10} {queries:>8} {seconds:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
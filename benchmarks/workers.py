@@ -0,0 +1,196 @@
+#----------------------------------------------------------------------------#
+# Load test of the production profile (gunicorn.conf.py) at several worker
+# counts: requests/sec, latency and the number of connections the workers
+# hold open on Postgres, sampled from pg_stat_activity while under load.
+# For each count, gunicorn is started with WEB_CONCURRENCY set to it and
+# --concurrency client threads send the same weighted mix of listing and
+# detail pages as benchmarks.async_views for --duration seconds. The page
+# data cache and request metrics are off. Pass --pooler-url (a PgBouncer in
+# front of BENCH_DATABASE_URL) to run the workers through it; connections
+# are still counted on the database itself.
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.workers --workers 1 2 4 8 --budget 30 --concurrency 16
+#----------------------------------------------------------------------------#
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from benchmarks.async_views import ROUTES, client
+from benchmarks.common import app, db, reset_schema, seed, analyze
+from benchmarks.load_test import percentile, git_commit
+from config import worker_pools
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONNECTIONS = text(
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_serving(port, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            return False
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/')
+            ok = connection.getresponse().status == 200
+            connection.close()
+            if ok:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def sample_connections(engine, stop, samples):
+    with engine.connect() as connection:
+        while not stop.is_set():
+            samples.append(connection.execute(CONNECTIONS).scalar())
+            stop.wait(0.1)
+
+
+def run(workers, args, catalog, monitor):
+    port = free_port()
+    env = dict(os.environ,
+               WEB_CONCURRENCY=str(workers),
+               WEB_THREADS=str(args.threads),
+               DB_CONNECTION_BUDGET=str(args.budget),
+               BIND=f'127.0.0.1:{port}',
+               CACHE_BACKEND='none',
+               METRICS_ENABLED='0')
+    if args.pooler_url:
+        env.update(DATABASE_URL=args.pooler_url, DB_POOLER='pgbouncer')
+    # (pool_size, max_overflow) per worker, as config.py sizes them
+    async_views = env.get('ASYNC_VIEWS') == '1'
+    if args.pooler_url:
+        pools = []
+    else:
+        sync_pool, async_pool = worker_pools(args.budget, workers, args.threads, async_views)
+        pools = [sync_pool, async_pool] if async_views else [sync_pool]
+    log = tempfile.TemporaryFile(mode='w+')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:app'], cwd=BASEDIR, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not wait_until_serving(port, server):
+            log.seek(0)
+            sys.exit(f'gunicorn with {workers} workers did not start:\n{log.read()[-3000:]}')
+
+        paths = {route: (lambda rng, make=make: make(rng, catalog)) for route, (weight, make) in ROUTES.items()}
+        for phase, seconds in (('warmup', args.warmup), ('measure', args.duration)):
+            samples, errors = defaultdict(list), defaultdict(int)
+            connections, stop = [], threading.Event()
+            sampler = threading.Thread(target=sample_connections, args=(monitor, stop, connections))
+            sampler.start()
+            deadline = time.perf_counter() + seconds
+            started = time.perf_counter()
+            threads = [threading.Thread(target=client, args=(port, paths, deadline, samples, errors))
+                       for _ in range(args.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            stop.set()
+            sampler.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        log.close()
+
+    latencies = sorted(ms for values in samples.values() for ms in values)
+    return {
+        'pools': pools,
+        'max_connections': None if args.pooler_url else workers * sum(map(sum, pools)),
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {'p50': percentile(latencies, 0.5), 'p90': percentile(latencies, 0.9),
+                       'p99': percentile(latencies, 0.99)},
+        'connections': {'peak': max(connections), 'mean': sum(connections) / len(connections)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the gunicorn profile at several worker counts.')
+    parser.add_argument('--venues', type=int, default=5000)
+    parser.add_argument('--shows-per-venue', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--threads', type=int, default=1, help='Threads per worker.')
+    parser.add_argument('--budget', type=int, default=30, help='DB_CONNECTION_BUDGET of the workers.')
+    parser.add_argument('--pooler-url', help='Database URL of a PgBouncer in front of BENCH_DATABASE_URL.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads.')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds measured per worker count.')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds before measuring.')
+    parser.add_argument('--output', default='workers.json')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            sys.exit('Connection counts need Postgres; set BENCH_DATABASE_URL to a Postgres database.')
+        reset_schema()
+        seed(args.venues, shows_per_venue=args.shows_per_venue)
+        analyze()
+        url = db.engine.url
+        db.session.remove()
+        db.engine.dispose()
+    catalog = {'venues': args.venues, 'artists': max(args.venues // 4, 1)}
+    monitor = create_engine(url, poolclass=NullPool)
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'cpus': os.cpu_count(),
+            'venues': args.venues,
+            'threads': args.threads,
+            'budget': args.budget,
+            'pooler': bool(args.pooler_url),
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+        },
+        'workers': {str(workers): run(workers, args, catalog, monitor) for workers in args.workers},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"budget {args.budget} connections, {args.threads} thread(s) per worker, "
+          f"{args.concurrency} clients, {args.duration:g}s per run"
+          + (', through the pooler' if args.pooler_url else ''))
+    print(f"{'workers':>7} {'pools':>11} {'max conns':>9} {'peak':>5} {'mean':>6} {'req/s':>8} "
+          f"{'errors':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers, summary in results['workers'].items():
+        limit = summary['max_connections']
+        pools = ' '.join(f'{size}+{overflow}' for size, overflow in summary['pools'])
+        print(f"{workers:>7} {pools:>11} "
+              f"{'-' if limit is None else limit:>9} {summary['connections']['peak']:>5} "
+              f"{summary['connections']['mean']:>6.1f} {summary['requests_per_second']:>8.1f} "
+              f"{summary['errors']:>6} {summary['latency_ms']['p50']:>8.2f} {summary['latency_ms']['p99']:>8.2f}")
+    print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
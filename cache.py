@@ -0,0 +1,187 @@
+#----------------------------------------------------------------------------#
+# Response cache.
+#
+# Views cache the data they compute (not rendered pages, which carry flashed
+# messages) under a name, a key and the namespaces the data depends on, e.g.
+# a venue page depends on 'venue:<id>' and on 'venue' (every venue page).
+# Each namespace has a version number that is part of the cache key; writes
+# bump the versions of the namespaces they touch, so the next read misses
+# and recomputes instead of hunting down individual entries. Entries also
+# expire after CACHE_TTL seconds, which bounds how long data derived from
+# the current time (upcoming vs past shows) or from writes that bypass the
+# views (seed scripts, counter rolls) can be stale. With read replicas,
+# data computed from a replica is cached apart from data computed from the
+# primary, which is what clients reading their own writes get.
+#----------------------------------------------------------------------------#
+
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from database import replica_route
+
+MISSING = object()
+
+
+class NullBackend:
+    """Caches nothing; every lookup is a miss."""
+
+    def get(self, key):
+        return MISSING
+
+    def set(self, key, value):
+        pass
+
+    def versions(self, namespaces):
+        return [0] * len(namespaces)
+
+    def bump(self, namespaces):
+        pass
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL.
+
+    Each worker process has its own copy, so a write in one worker reaches
+    the others only when their entries expire.
+    """
+
+    def __init__(self, max_entries=4096, ttl=60):
+        self.entries = OrderedDict()
+        # Versions are never evicted: forgetting one would bring back the
+        # entries cached under its old number
+        self.namespace_versions = {}
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def versions(self, namespaces):
+        with self.lock:
+            return [self.namespace_versions.get(namespace, 0) for namespace in namespaces]
+
+    def bump(self, namespaces):
+        with self.lock:
+            for namespace in namespaces:
+                self.namespace_versions[namespace] = self.namespace_versions.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Shared cache in a Redis-compatible server, so every worker sees a
+    write as soon as it is made."""
+
+    def __init__(self, url, ttl=60, prefix='fyyur:'):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND is 'redis' but the redis package is not installed.")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return MISSING if value is None else pickle.loads(value)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+
+    def versions(self, namespaces):
+        values = self.client.mget([f'{self.prefix}version:{namespace}' for namespace in namespaces])
+        return [int(value or 0) for value in values]
+
+    def bump(self, namespaces):
+        pipeline = self.client.pipeline()
+        for namespace in namespaces:
+            pipeline.incr(f'{self.prefix}version:{namespace}')
+        pipeline.execute()
+
+
+class ResponseCache:
+    """Cache of computed view data with hit/miss counts per cached view."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or NullBackend()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def init_app(self, app):
+        backend = app.config['CACHE_BACKEND']
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config['CACHE_MAX_ENTRIES'], app.config['CACHE_TTL'])
+        elif backend == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'], app.config['CACHE_TTL'])
+        elif backend == 'none':
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND {backend!r}')
+        self.hits.clear()
+        self.misses.clear()
+
+    def cached(self, name, key, namespaces, compute):
+        """Return the value cached for ``name`` and ``key``, or compute and
+        cache it. The entry is dropped when any of ``namespaces`` is
+        invalidated."""
+        cache_key, value = self._lookup(name, key, namespaces)
+        if value is MISSING:
+            value = compute()
+            self.backend.set(cache_key, value)
+        return value
+
+    async def cached_async(self, name, key, namespaces, compute):
+        """``cached`` for an async ``compute``."""
+        cache_key, value = self._lookup(name, key, namespaces)
+        if value is MISSING:
+            value = await compute()
+            self.backend.set(cache_key, value)
+        return value
+
+    def _lookup(self, name, key, namespaces):
+        versions = self.backend.versions(namespaces)
+        cache_key = f"{name}:{key}:{'.'.join(map(str, versions))}"
+        # What a request computed from a replica may lag behind the primary,
+        # so clients reading their own writes from the primary don't get it
+        if replica_route() is not None:
+            cache_key += ':replica'
+        value = self.backend.get(cache_key)
+        if value is MISSING:
+            self.misses[name] += 1
+        else:
+            self.hits[name] += 1
+        return cache_key, value
+
+    def invalidate(self, *namespaces):
+        self.backend.bump(namespaces)
+
+    def stats(self):
+        return {
+            name: {
+                "hits": self.hits[name],
+                "misses": self.misses[name],
+            } for name in sorted(set(self.hits) | set(self.misses))
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------#
+# Time.
+#
+# Show times are stored as timestamptz and handled as aware UTC datetimes;
+# a naive datetime reaching the database layer is taken to be UTC. Times a
+# person types or reads are in the venue's time zone (Venue.timezone, a tz
+# database name derived from its state unless set).
+#
+# A request reads the clock once: every past/upcoming split it makes uses
+# the same instant, floored to NOW_BUCKET_SECONDS so that page data
+# computed for one bucket can be cached and reused until the next.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import sqlite3
+
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_TIMEZONE = 'UTC'
+
+# No zone is further than this from UTC
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Most populous zone of each state
+STATE_TIMEZONES = {
+    'AL': 'America/Chicago', 'AK': 'America/Anchorage', 'AZ': 'America/Phoenix',
+    'AR': 'America/Chicago', 'CA': 'America/Los_Angeles', 'CO': 'America/Denver',
+    'CT': 'America/New_York', 'DE': 'America/New_York', 'DC': 'America/New_York',
+    'FL': 'America/New_York', 'GA': 'America/New_York', 'HI': 'Pacific/Honolulu',
+    'ID': 'America/Boise', 'IL': 'America/Chicago', 'IN': 'America/Indiana/Indianapolis',
+    'IA': 'America/Chicago', 'KS': 'America/Chicago', 'KY': 'America/New_York',
+    'LA': 'America/Chicago', 'ME': 'America/New_York', 'MT': 'America/Denver',
+    'NE': 'America/Chicago', 'NV': 'America/Los_Angeles', 'NH': 'America/New_York',
+    'NJ': 'America/New_York', 'NM': 'America/Denver', 'NY': 'America/New_York',
+    'NC': 'America/New_York', 'ND': 'America/Chicago', 'OH': 'America/New_York',
+    'OK': 'America/Chicago', 'OR': 'America/Los_Angeles', 'MD': 'America/New_York',
+    'MA': 'America/New_York', 'MI': 'America/Detroit', 'MN': 'America/Chicago',
+    'MS': 'America/Chicago', 'MO': 'America/Chicago', 'PA': 'America/New_York',
+    'RI': 'America/New_York', 'SC': 'America/New_York', 'SD': 'America/Chicago',
+    'TN': 'America/Chicago', 'TX': 'America/Chicago', 'UT': 'America/Denver',
+    'VT': 'America/New_York', 'VA': 'America/New_York', 'WA': 'America/Los_Angeles',
+    'WV': 'America/New_York', 'WI': 'America/Chicago', 'WY': 'America/Denver',
+}
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value):
+    """An aware UTC datetime; naive values are taken to be UTC already."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def state_timezone(state):
+    return STATE_TIMEZONES.get(state, DEFAULT_TIMEZONE)
+
+
+@lru_cache(maxsize=None)
+def zone(name):
+    return ZoneInfo(name or DEFAULT_TIMEZONE)
+
+
+def localize(value, timezone_name):
+    """The UTC instant of a naive wall clock time in ``timezone_name``.
+    Aware values are only converted to UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=zone(timezone_name))
+    return value.astimezone(timezone.utc)
+
+
+def local(value, timezone_name):
+    """``value`` (aware, or naive UTC) as a naive wall clock time in
+    ``timezone_name``."""
+    return as_utc(value).astimezone(zone(timezone_name)).replace(tzinfo=None)
+
+
+def is_upcoming(start_time, now):
+    """Whether a show starting at ``start_time`` is upcoming at ``now``.
+    Takes datetimes or SQL expressions; see ``is_past``."""
+    return start_time > now
+
+
+def is_past(start_time, now):
+    # A show is past from the instant it starts, on the pages and the
+    # counters alike
+    return start_time <= now
+
+
+def request_now():
+    """The current time, read once per request (once per call outside one)."""
+    if not has_request_context():
+        return utcnow()
+    if 'now' not in g:
+        g.now = utcnow()
+    return g.now
+
+
+def _bucket_seconds():
+    return current_app.config['NOW_BUCKET_SECONDS'] if has_app_context() else 1
+
+
+def time_bucket():
+    """Number of the NOW_BUCKET_SECONDS slot the current request falls in."""
+    return int(request_now().timestamp() // _bucket_seconds())
+
+
+def bucket_now():
+    """Start of the current time bucket: the "now" that splits past from
+    upcoming shows, identical for every request in the bucket."""
+    return datetime.fromtimestamp(time_bucket() * _bucket_seconds(), timezone.utc)
+
+
+def bucket_ceiling(value):
+    """Start of the first time bucket at or after ``value``: when a show
+    starting at ``value`` moves to the past list of the pages."""
+    seconds = _bucket_seconds()
+    return datetime.fromtimestamp(-(-value.timestamp() // seconds) * seconds, timezone.utc)
+
+
+def _sqlite_timezone(name, value):
+    # Postgres' timezone(zone, timestamptz) over SQLite's text timestamps
+    if value is None:
+        return None
+    return local(datetime.fromisoformat(value), name).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+@event.listens_for(Engine, 'connect')
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('timezone', 2, _sqlite_timezone, deterministic=True)
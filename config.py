@@ -1,5 +1,30 @@
 import os
 
+from sqlalchemy.pool import NullPool
+
+
+def pool_sizes(connections, threads=1):
+    """pool_size and max_overflow of a pool allowed at most ``connections``
+    (at least one): one kept open per thread, the rest opened on demand."""
+    pool_size = min(max(threads, 1), connections)
+    return pool_size, connections - pool_size
+
+
+def worker_pools(budget, workers, threads=1, async_views=False):
+    """(pool_size, max_overflow) of the sync and of the async pool of each
+    of ``workers`` processes that share ``budget`` connections. Raises
+    ValueError when the budget can't give every pool one connection."""
+    workers = max(workers, 1)
+    pools = 2 if async_views else 1
+    if budget < workers * pools:
+        raise ValueError(f'DB_CONNECTION_BUDGET={budget} is too small for {workers} workers with '
+                         f'{pools} connection pool(s) each; it needs at least {workers * pools}.')
+    share = budget // workers
+    async_share = share // 2 if async_views else 0
+    # A venue or artist page runs three statements at once on the async pool
+    return pool_sizes(share - async_share, threads), pool_sizes(async_share, 3 * threads)
+
+
 class Config:
     SECRET_KEY = os.urandom(32)
     # Grabs the folder where the script runs.
@@ -9,14 +34,118 @@ class Config:
     #DEBUG = True
     # TODO IMPLEMENT DATABASE URL
     # Connect to the database
-    SQLALCHEMY_DATABASE_URI = 'postgresql://davidpardob@localhost:5432/fyyur'
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        'DATABASE_URL', 'postgresql://davidpardob@localhost:5432/fyyur')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 10,
-        'max_overflow': 20,
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
+    # Read replicas (comma separated URLs), each a bind named replica_<n>.
+    # Requests that may read from a replica (see database.py) pick one; for
+    # REPLICA_STICKY_SECONDS after a write, the writing client reads the
+    # primary, which should cover the replicas' lag.
+    DATABASE_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    SQLALCHEMY_BINDS = {f'replica_{n}': url for n, url in enumerate(DATABASE_REPLICA_URLS)}
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
+    # Page size for venue and artist search results
+    SEARCH_RESULTS_PER_PAGE = 50
+    SEARCH_RESULTS_MAX = 200
+    # Past/upcoming shows listed per page on venue and artist pages
+    SHOWS_PER_PAGE = 24
+    # Shows per page on the /shows listing
+    SHOWS_LISTING_PER_PAGE = 60
+    SHOWS_LISTING_MAX = 500
+    # 'trigram' (Postgres pg_trgm indexes), 'ngram' (in-process index) or 'auto'
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    # Seconds before the /search typeahead index is rebuilt, and how many
+    # prefixes it keeps cached
+    TYPEAHEAD_INDEX_TTL = 60
+    TYPEAHEAD_CACHE_SIZE = 1024
+    # How long a show occupies its venue and artist when checking for
+    # double bookings
+    SHOW_DURATION_MINUTES = 180
+    # Most shows one recurring booking may create
+    RECURRING_SHOWS_MAX = 10000
+    # Cache for computed page data: 'memory' (per-process LRU), 'redis'
+    # (shared, needs the redis package) or 'none'. Entries expire after
+    # CACHE_TTL seconds even without a write.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_TTL = 60
+    CACHE_MAX_ENTRIES = 4096
+    # Per request query counts and database/template timings (see
+    # instrumentation.py): a JSON log line per request, Prometheus text at
+    # /metrics and, with METRICS_HEADERS (None follows DEBUG), Server-Timing
+    # response headers. Statements slower than METRICS_SLOW_QUERY_MS are
+    # logged as warnings. Nothing is hooked in when disabled.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_LOG_REQUESTS = True
+    METRICS_HEADERS = None
+    METRICS_SLOW_QUERY_MS = 100
+    # Log records are written as JSON lines by a background thread (see
+    # logs.py) to LOG_FILE ('-' for stderr), which is rotated at
+    # LOG_MAX_BYTES keeping LOG_BACKUP_COUNT old files. Only a sample of the
+    # INFO records of requests to the endpoints in LOG_SAMPLE_RATES is kept
+    # (LOG_SAMPLE_RATE of the others); /metrics still counts every request.
+    LOG_FILE = os.environ.get('LOG_FILE', 'error.log')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1))
+    LOG_SAMPLE_RATES = {
+        'venues.venues': 0.1,
+        'venues.show_venue': 0.1,
+        'artists.artists': 0.1,
+        'artists.show_artist': 0.1,
+        'shows.shows': 0.1,
     }
+    # Default and largest page sizes of the /api/v1 listings
+    API_PAGE_SIZE = 100
+    API_PAGE_MAX = 1000
+    # Locale of the `datetime` template filter, and the time zone it shows
+    # times in (a tz database name; None shows them as stored)
+    DATETIME_LOCALE = 'en'
+    DISPLAY_TIMEZONE = os.environ.get('DISPLAY_TIMEZONE')
+    # Venue and artist pages split past from upcoming shows at the start of
+    # the current slot of this many seconds, and their data is cached per slot
+    NOW_BUCKET_SECONDS = 60
+    # Serve the listings and the venue and artist pages from the async views
+    # (async_views.py; needs asyncpg and flask[async]). Their own pool of
+    # asyncpg connections per process is sized separately from the sync one.
+    ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+
+    # Connection pools. Every worker process has its own pools, so their
+    # sizes come from a budget for the whole deployment: WEB_CONCURRENCY
+    # workers (what gunicorn.conf.py starts) with WEB_THREADS threads each
+    # may together hold at most DB_CONNECTION_BUDGET connections. With the
+    # async views on, half of each worker's share goes to their pool.
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+    DB_CONNECTION_BUDGET = int(os.environ.get('DB_CONNECTION_BUDGET', 30))
+    # Set to 'pgbouncer' when DATABASE_URL (and ASYNC_DATABASE_URL) point at
+    # a PgBouncer in transaction mode: it pools the server connections, so
+    # the app keeps none and the budget is its default_pool_size instead
+    DB_POOLER = os.environ.get('DB_POOLER')
+
+    if DB_POOLER:
+        # The pooler holds the server connections; the app keeps none
+        (DB_POOL_SIZE, DB_MAX_OVERFLOW), (ASYNC_POOL_SIZE, ASYNC_MAX_OVERFLOW) = (0, 0), (0, 0)
+    else:
+        (DB_POOL_SIZE, DB_MAX_OVERFLOW), (ASYNC_POOL_SIZE, ASYNC_MAX_OVERFLOW) = worker_pools(
+            DB_CONNECTION_BUDGET, WEB_CONCURRENCY, WEB_THREADS, ASYNC_VIEWS
+        )
+
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # SQLite test databases (e.g. sqlite+pysqlite:///fyyur.db) don't use a sized pool
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+    elif DB_POOLER:
+        SQLALCHEMY_ENGINE_OPTIONS = {'poolclass': NullPool}
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_pre_ping': True,
+            'pool_recycle': 300,
+        }
 
 
 
@@ -0,0 +1,171 @@
+#----------------------------------------------------------------------------#
+# Show counters.
+#
+# Venue and Artist carry denormalized upcoming_shows_count / past_shows_count
+# columns. ORM inserts and deletes of shows (including cascades) keep them up
+# to date through the mapper events below; bulk statements that bypass the
+# ORM must call recount() for the venues and artists they touched.
+#----------------------------------------------------------------------------#
+
+from datetime import timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, case, event, func, select
+
+from clock import as_utc, is_past, is_upcoming, request_now
+from database import db
+from models import Venue, Artist, Show, SHOW_FOREIGN_KEYS
+
+
+def _counter_column(start_time, now):
+    return 'upcoming_shows_count' if is_upcoming(as_utc(start_time), now) else 'past_shows_count'
+
+
+def _adjust(connection, show, delta):
+    column = _counter_column(show.start_time, request_now())
+    for model, entity_id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+        table = model.__table__
+        connection.execute(
+            table.update().where(table.c.id == entity_id).values(
+                {column: table.c[column] + delta}
+            )
+        )
+
+
+@event.listens_for(Show, 'after_insert')
+def _show_inserted(mapper, connection, show):
+    _adjust(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def _show_deleted(mapper, connection, show):
+    _adjust(connection, show, -1)
+
+
+def forget_venue_shows(venue_id, now=None):
+    """Take a venue's shows off its artists' counters before the shows are
+    bulk deleted with the venue."""
+    if now is None:
+        now = request_now()
+    per_artist = db.session.query(
+        Show.artist_id,
+        func.count(case((is_upcoming(Show.start_time, now), 1))).label('upcoming'),
+        func.count(case((is_past(Show.start_time, now), 1))).label('past')
+    ).filter(
+        Show.venue_id == venue_id
+    ).group_by(Show.artist_id).all()
+
+    for artist_id, upcoming, past in per_artist:
+        Artist.query.filter(Artist.id == artist_id).update({
+            Artist.upcoming_shows_count: Artist.upcoming_shows_count - upcoming,
+            Artist.past_shows_count: Artist.past_shows_count - past,
+        }, synchronize_session=False)
+
+
+def recount(model, ids=None, now=None):
+    """Recompute the counters of ``model`` rows (all of them when ``ids`` is
+    None) from the show table with one set-based UPDATE."""
+    if now is None:
+        now = request_now()
+    show_fk = SHOW_FOREIGN_KEYS[model]
+
+    def count(condition):
+        return select(func.count(Show.id)).where(
+            show_fk == model.id, condition
+        ).scalar_subquery()
+
+    query = model.query
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    return query.update({
+        model.upcoming_shows_count: count(is_upcoming(Show.start_time, now)),
+        model.past_shows_count: count(is_past(Show.start_time, now)),
+    }, synchronize_session=False)
+
+
+def roll(since, now=None):
+    """Move shows that started between ``since`` and ``now`` from the
+    upcoming to the past counters. Recounting is idempotent, so overlapping
+    windows between runs are harmless."""
+    if now is None:
+        now = request_now()
+    started = and_(is_upcoming(Show.start_time, since), is_past(Show.start_time, now))
+    rolled = {}
+    for model, show_fk in SHOW_FOREIGN_KEYS.items():
+        ids = select(show_fk).where(started).distinct()
+        rolled[model] = recount(model, ids, now)
+    return rolled
+
+
+def drift(model, now=None):
+    """Rows of ``model`` whose stored counters differ from the show table, as
+    (id, stored upcoming, actual upcoming, stored past, actual past)."""
+    if now is None:
+        now = request_now()
+    show_fk = SHOW_FOREIGN_KEYS[model]
+    actual_upcoming = func.count(case((is_upcoming(Show.start_time, now), 1)))
+    actual_past = func.count(case((is_past(Show.start_time, now), 1)))
+
+    return db.session.query(
+        model.id,
+        model.upcoming_shows_count, actual_upcoming,
+        model.past_shows_count, actual_past
+    ).outerjoin(
+        Show, show_fk == model.id
+    ).group_by(
+        model.id
+    ).having(
+        (model.upcoming_shows_count != actual_upcoming) | (model.past_shows_count != actual_past)
+    ).order_by(model.id).all()
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+counters_cli = AppGroup('counters', help='Maintain the denormalized show counters.')
+# How far back `counters roll` looks by default; run it more often than this
+ROLL_WINDOW_HOURS = 24
+
+
+@counters_cli.command('roll')
+@click.option('--window-hours', default=ROLL_WINDOW_HOURS, show_default=True,
+              help='Recount entities with shows that started this many hours ago or later.')
+def roll_command(window_hours):
+    """Roll started shows from upcoming to past. Run it periodically (cron)."""
+    now = request_now()
+    rolled = roll(now - timedelta(hours=window_hours), now)
+    db.session.commit()
+    click.echo(f"Recounted {rolled[Venue]} venues and {rolled[Artist]} artists.")
+
+
+@counters_cli.command('check')
+@click.option('--fix', is_flag=True, help='Recount every venue and artist when drift is found.')
+@click.option('--roll', 'roll_first', is_flag=True,
+              help='Roll shows that started since the last roll first, so that only drift '
+                   'a roll would not fix is reported (e.g. after a deploy).')
+def check_command(fix, roll_first):
+    """Recompute the counters from the show table and report drift."""
+    now = request_now()
+    if roll_first:
+        # Shows that started since the last cron roll drift until the next
+        # one; rolling at the same instant as the check leaves none of that
+        roll(now - timedelta(hours=ROLL_WINDOW_HOURS), now)
+        db.session.commit()
+    drifted = False
+    for model in SHOW_FOREIGN_KEYS:
+        rows = drift(model, now)
+        drifted = drifted or bool(rows)
+        click.echo(f"{model.__tablename__}: {len(rows)} rows drifted")
+        for id, upcoming, actual_upcoming, past, actual_past in rows[:20]:
+            click.echo(f"  id={id} upcoming {upcoming} != {actual_upcoming}"
+                       f" or past {past} != {actual_past}")
+
+    if drifted and fix:
+        for model in SHOW_FOREIGN_KEYS:
+            recount(model, now=now)
+        db.session.commit()
+        click.echo('Recounted all venues and artists.')
+    elif drifted:
+        raise SystemExit(1)
@@ -1,3 +1,109 @@
-from flask_sqlalchemy import SQLAlchemy
+#----------------------------------------------------------------------------#
+# Database and read replica routing.
+#
+# With DATABASE_REPLICA_URLS set, each replica is a Flask-SQLAlchemy bind
+# (replica_0, replica_1...) and the session sends the reads of a request to
+# one of them, picked per request, when the request may read from a
+# replica:
+#
+#   - GET and HEAD requests may, unless their view is marked @reads_primary
+#     (the edit forms, which must show what is really stored);
+#   - other requests may not, unless their view is marked @reads_replica
+#     (the searches, which are POSTs);
+#   - no request may for REPLICA_STICKY_SECONDS after the same client's
+#     last write, so that it reads its own writes while replicas catch up.
+#
+# Writes always go to the primary: flushes, INSERT/UPDATE/DELETE statements,
+# SELECT ... FOR UPDATE, textual SQL and raw connections. After the first
+# one the rest of the request reads the primary too. Code outside a request
+# (CLI commands, scripts) uses the primary only.
+#----------------------------------------------------------------------------#
 
-db = SQLAlchemy() 
\ No newline at end of file
+import random
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+
+PRIMARY_UNTIL = 'db_primary_until'
+
+
+def reads_replica(view):
+    """Let a view that is not a GET read from a replica."""
+    view.database_reads = 'replica'
+    return view
+
+
+def reads_primary(view):
+    """Make a GET view read from the primary."""
+    view.database_reads = 'primary'
+    return view
+
+
+def replica_keys(app):
+    return [key for key in app.config['SQLALCHEMY_BINDS'] or () if key.startswith('replica_')]
+
+
+def _route():
+    # 'primary' or the bind key of the replica this request reads from
+    route = g.get('database_route')
+    if route is None:
+        route = 'primary'
+        keys = replica_keys(current_app)
+        if keys:
+            view = current_app.view_functions.get(request.endpoint)
+            reads = getattr(view, 'database_reads', None)
+            if reads is None:
+                reads = 'replica' if request.method in ('GET', 'HEAD') else 'primary'
+            if reads == 'replica' and session.get(PRIMARY_UNTIL, 0) <= time.time():
+                route = random.choice(keys)
+        g.database_route = route
+    return route
+
+
+def replica_route():
+    """Bind key of the replica the current request reads from, or None when
+    it reads from the primary."""
+    if not has_request_context():
+        return None
+    route = _route()
+    return None if route == 'primary' else route
+
+
+def wrote_primary():
+    # The rest of this request and the client's next requests read the
+    # primary. Requests that read the primary anyway (every POST) write too,
+    # so this goes by whether the request wrote, not by where it reads.
+    if has_request_context() and not g.get('database_wrote'):
+        g.database_wrote = True
+        g.database_route = 'primary'
+        if replica_keys(current_app):
+            session[PRIMARY_UNTIL] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+
+def _is_read(clause):
+    return (clause is not None and clause.is_select
+            and getattr(clause, '_for_update_arg', None) is None)
+
+
+class RoutingSession(SignallingSession):
+    """Sends a request's reads to its replica (see replica_route)."""
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or not _is_read(clause):
+            wrote_primary()
+        else:
+            route = replica_route()
+            if route is not None:
+                return db.get_engine(self.app, bind=route)
+        return SignallingSession.get_bind(self, mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
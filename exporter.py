@@ -0,0 +1,153 @@
+#----------------------------------------------------------------------------#
+# Bulk export.
+#
+#   flask export shows --format csv --output shows.csv --since 2035-01-01T00:00:00
+#   GET /export/venues.jsonl?after_id=1000
+#
+# Rows are read through a server-side cursor and written as they arrive,
+# so memory stays flat whatever the table size. Exports are ordered by
+# (updated_at, id) when ``since`` is given and by id otherwise, so the last
+# row exported is the watermark for the next incremental run: pass its
+# updated_at and id as ``since`` and ``after_id`` (or just its id). Shows carry
+# their venue's and artist's natural keys, so an export can be fed back to
+# `flask import`.
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, tuple_
+
+from database import db
+from models import Venue, Artist, Show
+
+ENTITIES = ('venues', 'artists', 'shows')
+BATCH_SIZE = 1000
+
+
+def _export_statement(entity):
+    if entity == 'venues':
+        return select(*Venue.__table__.columns), Venue
+    if entity == 'artists':
+        return select(*Artist.__table__.columns), Artist
+    return select(
+        *Show.__table__.columns,
+        Venue.name.label('venue_name'),
+        Venue.city.label('venue_city'),
+        Venue.state.label('venue_state'),
+        Artist.name.label('artist_name'),
+        Artist.city.label('artist_city'),
+        Artist.state.label('artist_state')
+    ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id), Show
+
+
+def export_rows(entity, since=None, after_id=None, batch_size=BATCH_SIZE):
+    """Yield lists of up to ``batch_size`` rows of ``entity`` after
+    the watermark given by ``since`` (an updated_at) and/or ``after_id``."""
+    statement, model = _export_statement(entity)
+    if since is not None and after_id is not None:
+        statement = statement.where(tuple_(model.updated_at, model.id) > tuple_(since, after_id))
+    elif since is not None:
+        statement = statement.where(model.updated_at >= since)
+    elif after_id is not None:
+        statement = statement.where(model.id > after_id)
+    if since is not None:
+        statement = statement.order_by(model.updated_at, model.id)
+    else:
+        statement = statement.order_by(model.id)
+
+    result = db.session.execute(statement.execution_options(stream_results=True))
+    for partition in result.partitions(batch_size):
+        yield partition
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def encode_jsonl(batches, columns):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), default=_json_default) + '\n' for row in rows
+        )
+
+
+def encode_csv(batches, columns, list_columns=()):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    positions = [columns.index(column) for column in list_columns]
+    for rows in batches:
+        if positions:
+            # Genres use the semicolon separated form `flask import` reads
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in positions:
+                    row[i] = ';'.join(row[i] or [])
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_columns(entity):
+    statement, model = _export_statement(entity)
+    return [column.key for column in statement.selected_columns]
+
+
+def encode(entity, format, batches):
+    columns = export_columns(entity)
+    if format == 'csv':
+        return encode_csv(batches, columns, [column for column in columns if column == 'genres'])
+    return encode_jsonl(batches, columns)
+
+
+def export_chunks(entity, format, since=None, after_id=None):
+    """Encoded chunks of an export, for a streamed response or a file."""
+    return encode(entity, format, export_rows(entity, since, after_id))
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@click.command('export')
+@click.argument('entity', type=click.Choice(ENTITIES))
+@click.option('--format', type=click.Choice(['jsonl', 'csv']), default='jsonl', show_default=True)
+@click.option('--output', type=click.File('w'), default='-', help='File to write; stdout by default.')
+@click.option('--since', type=click.DateTime(), help='Only rows updated at or after this time.')
+@click.option('--after-id', type=int, help='Only rows with a greater id.')
+@with_appcontext
+def export_command(entity, format, output, since, after_id):
+    """Export venues, artists or shows as JSON Lines or CSV."""
+    started = time.perf_counter()
+    rows = 0
+    watermark = None
+
+    def counted(batches):
+        nonlocal rows, watermark
+        for batch in batches:
+            rows += len(batch)
+            watermark = batch[-1]
+            yield batch
+
+    for chunk in encode(entity, format, counted(export_rows(entity, since, after_id))):
+        output.write(chunk)
+    output.flush()
+
+    seconds = time.perf_counter() - started
+    click.echo(f'{rows} {entity} exported in {seconds:.2f}s '
+               f'({rows / max(seconds, 1e-9):,.0f} rows/s).', file=sys.stderr)
+    if watermark is not None:
+        click.echo(f'Watermark: id={watermark.id} updated_at={watermark.updated_at.isoformat()}',
+                   file=sys.stderr)
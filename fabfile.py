@@ -7,7 +7,9 @@ from fabric.contrib.console import confirm
 def test():
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m benchmarks.query_plans && "
+            "python -m benchmarks.cache_consistency && "
+            "python -m benchmarks.load_test --venues 500 --requests 500", capture=True
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
@@ -40,7 +42,10 @@ def heroku():
 
 def heroku_test():
     local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
+        # The benchmarks drop every table, so production only gets checks. Shows
+        # that started since the last cron roll are rolled first, as cron would,
+        # so only real drift fails the deploy
+        "heroku run flask counters check --roll"
     )
 
 
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Application factory.
+#
+# create_app() builds the app for a web worker, or with views=False just the
+# database, cache and CLI commands for scripts like the seeds. Modules that
+# only some code paths need are imported on first use: Flask-Migrate (and
+# Alembic) when the app is loaded by the flask command, babel with the
+# views' forms (Flask-WTF) or on the first formatted date (formatting.py),
+# dateutil on the first recurring booking and the async views only when
+# ASYNC_VIEWS is on.
+#----------------------------------------------------------------------------#
+
+import os
+
+from flask import Flask, current_app, render_template
+
+import formatting
+from cache import response_cache
+from config import Config
+from counters import counters_cli
+from database import db
+from exporter import export_command
+from importer import import_command
+from instrumentation import request_metrics
+from logs import log_pipeline
+
+BASEDIR = os.path.abspath(os.path.dirname(__file__))
+
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+def format_datetime(value, format='medium', tzinfo=None):
+    # Views pass datetimes; patterns are compiled once (see formatting.py)
+    config = current_app.config
+    return formatting.format_datetime(value, format, config['DATETIME_LOCALE'],
+                                      tzinfo or config['DISPLAY_TIMEZONE'])
+
+
+#----------------------------------------------------------------------------#
+# Error handlers.
+#----------------------------------------------------------------------------#
+
+def not_found_error(error):
+    return render_template('errors/404.html'), 404
+
+
+def server_error(error):
+    return render_template('errors/500.html'), 500
+
+
+#----------------------------------------------------------------------------#
+# Setup.
+#----------------------------------------------------------------------------#
+
+def init_migrations(app):
+    # Only the `flask db` commands use Flask-Migrate, and Flask sets
+    # FLASK_RUN_FROM_CLI before loading the app for any flask command
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+
+def init_views(app):
+    # Flask-WTF imports babel, which the seeds and CLI commands don't need
+    from flask_wtf.csrf import CSRFProtect
+
+    from api import api
+    from artist_views import artist_views
+    from main_views import main_views
+    from show_views import show_views
+    from venue_views import venue_views
+
+    CSRFProtect(app)
+    request_metrics.init_app(app)
+    app.jinja_env.filters['datetime'] = format_datetime
+
+    app.register_blueprint(main_views)
+    app.register_blueprint(venue_views)
+    app.register_blueprint(artist_views)
+    app.register_blueprint(show_views)
+    # JSON API under /api/v1
+    app.register_blueprint(api)
+
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+
+    # Async variants of the hot read views (see async_views.py)
+    if app.config['ASYNC_VIEWS']:
+        import async_views
+        async_views.init_app(app)
+
+
+def init_logging(app):
+    # JSON lines to LOG_FILE from a background thread (see logs.py); in
+    # debug mode Flask's handler prints records to the console instead
+    if not app.debug:
+        log_pipeline.init_app(app)
+        app.logger.info('Application startup')
+
+
+def create_app(config=Config, views=True):
+    """The Fyyur app configured from ``config``. Without ``views`` it has no
+    routes, only the database, the page data cache and the CLI commands."""
+    # Named after app.py, where it used to be built, so its loggers are
+    # still `app` and `app.requests`
+    app = Flask('app', root_path=BASEDIR)
+    app.config.from_object(config)
+
+    db.init_app(app)
+    response_cache.init_app(app)
+    init_migrations(app)
+
+    # flask counters roll|check
+    app.cli.add_command(counters_cli)
+    # flask import venues|artists|availabilities|shows <file>
+    app.cli.add_command(import_command)
+    # flask export venues|artists|shows
+    app.cli.add_command(export_command)
+
+    if views:
+        init_views(app)
+    init_logging(app)
+    return app
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------------#
+# Date formatting.
+#
+# The `datetime` template filter runs once per listed show, so Babel
+# patterns are compiled once per (format, locale) into a list of
+# per-field functions: numbers are formatted directly and names (weekdays,
+# months, AM/PM) are looked up in tables rendered by Babel itself, so the
+# output matches babel.dates.format_datetime. Fields without a fast path
+# (time zone names, week numbers...) fall back to Babel for that field only.
+# Babel itself is imported when the first pattern is compiled.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Named formats of the `datetime` filter; anything else is a Babel pattern
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+# Sample days for the name tables: 2001-01-01 was a Monday
+_WEEKDAY_SAMPLES = [datetime(2001, 1, day) for day in range(1, 8)]
+_MONTH_SAMPLES = [datetime(2001, month, 1) for month in range(1, 13)]
+_PERIOD_SAMPLES = [datetime(2001, 1, 1, 0), datetime(2001, 1, 1, 12)]
+
+
+def _babel_field(char, count, locale):
+    from babel.dates import UTC, DateTimeFormat
+
+    field = char * count
+
+    def format_field(value):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        return DateTimeFormat(value, locale)[field]
+    return format_field
+
+
+def _lookup(char, count, locale, samples, key):
+    field = _babel_field(char, count, locale)
+    names = [field(sample) for sample in samples]
+    return lambda value: names[key(value)]
+
+
+def _number(attribute, count, transform=None):
+    def format_number(value):
+        number = getattr(value, attribute)
+        if transform is not None:
+            number = transform(number)
+        return str(number).zfill(count)
+    return format_number
+
+
+def _compile_field(char, count, locale):
+    if char in 'Eec':
+        return _lookup(char, count, locale, _WEEKDAY_SAMPLES, datetime.weekday)
+    if char in 'ML':
+        if count <= 2:
+            return _number('month', count)
+        return _lookup(char, count, locale, _MONTH_SAMPLES, lambda value: value.month - 1)
+    if char == 'a':
+        return _lookup(char, count, locale, _PERIOD_SAMPLES, lambda value: value.hour >= 12)
+    if char == 'd':
+        return _number('day', count)
+    if char == 'y':
+        if count == 2:
+            return _number('year', 2, lambda year: year % 100)
+        return _number('year', count)
+    if char == 'h':
+        return _number('hour', count, lambda hour: hour % 12 or 12)
+    if char == 'H':
+        return _number('hour', count)
+    if char == 'm':
+        return _number('minute', count)
+    if char == 's':
+        return _number('second', count)
+    return _babel_field(char, count, locale)
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(format, locale='en'):
+    """The parts of ``format`` (a name from DATETIME_FORMATS or a Babel
+    pattern) as literal strings and functions of a datetime."""
+    from babel import Locale
+    from babel.dates import parse_pattern, tokenize_pattern
+
+    locale = Locale.parse(locale)
+    pattern = DATETIME_FORMATS.get(format, format)
+    # Rejects malformed patterns the way Babel does
+    parse_pattern(pattern)
+    parts = []
+    for kind, token in tokenize_pattern(pattern):
+        if kind == 'chars':
+            parts.append(token)
+        else:
+            parts.append(_compile_field(*token, locale))
+    return parts
+
+
+@lru_cache(maxsize=64)
+def _timezone(name):
+    from babel.dates import get_timezone
+
+    return get_timezone(name)
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        # ISO 8601 strings, as older cached data and JSON payloads carry them
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value
+
+
+def format_datetime(value, format='medium', locale='en', tzinfo=None):
+    """Format a datetime (or an ISO 8601 string) like
+    ``babel.dates.format_datetime``. With ``tzinfo`` (a zone or its name)
+    the time is shown in that zone; naive values are taken to be UTC, as
+    Babel does."""
+    if value is None:
+        return ''
+    value = _to_datetime(value)
+    if tzinfo is not None:
+        if isinstance(tzinfo, str):
+            tzinfo = _timezone(tzinfo)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        value = value.astimezone(tzinfo)
+    return ''.join([part if part.__class__ is str else part(value)
+                    for part in compile_pattern(format, locale)])
@@ -0,0 +1,62 @@
+#----------------------------------------------------------------------------#
+# Production server profile, read by gunicorn from the working directory:
+#
+#   WEB_CONCURRENCY=8 DB_CONNECTION_BUDGET=80 gunicorn app:app
+#
+# The app is imported once in the master and the workers are forked from
+# it, sharing its memory. Each worker then drops the database connections
+# it inherited, so no two processes ever use the same socket. Workers and
+# threads come from WEB_CONCURRENCY and WEB_THREADS, which config.py also
+# reads to size each worker's connection pool within DB_CONNECTION_BUDGET;
+# set them there rather than with -w/--threads.
+#----------------------------------------------------------------------------#
+
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('WEB_THREADS', 1))
+preload_app = True
+# Recycle workers now and then so slow leaks don't build up, staggered so
+# they don't all restart at once
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+graceful_timeout = 30
+
+
+def on_starting(server):
+    # Config is read here, after the app was preloaded from the same
+    # environment
+    from config import Config
+
+    per_worker = Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+    if Config.ASYNC_VIEWS:
+        per_worker += Config.ASYNC_POOL_SIZE + Config.ASYNC_MAX_OVERFLOW
+    if Config.DB_POOLER:
+        server.log.info('Connection pooling left to %s', Config.DB_POOLER)
+        return
+    server.log.info('%d workers x %d database connections (budget %d)',
+                    server.cfg.workers, per_worker, Config.DB_CONNECTION_BUDGET)
+    if server.cfg.workers != Config.WEB_CONCURRENCY or server.cfg.threads != Config.WEB_THREADS:
+        server.log.warning('Pools are sized for %d workers with %d threads; set WEB_CONCURRENCY '
+                           'and WEB_THREADS instead of -w/--threads',
+                           Config.WEB_CONCURRENCY, Config.WEB_THREADS)
+    if server.cfg.workers * per_worker > Config.DB_CONNECTION_BUDGET:
+        server.log.warning('Up to %d connections may be opened, over the budget of %d',
+                           server.cfg.workers * per_worker, Config.DB_CONNECTION_BUDGET)
+
+
+def post_fork(server, worker):
+    # The pools were created (and may hold connections) in the master. Forget
+    # those connections without closing them, which would close them for
+    # the master too; the worker opens its own on first use.
+    from app import app
+    from database import db, replica_keys
+    from logs import log_pipeline
+
+    with app.app_context():
+        for bind in [None, *replica_keys(app)]:
+            db.get_engine(app, bind=bind).dispose(close=False)
+    # The log listener thread stayed behind in the master
+    log_pipeline.restart()
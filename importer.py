@@ -0,0 +1,328 @@
+#----------------------------------------------------------------------------#
+# Bulk import.
+#
+#   flask import venues partner/venues.csv
+#   flask import shows partner/shows.jsonl --chunk-size 50000
+#
+# Rows are streamed from CSV or JSON Lines files and written a chunk at a
+# time (COPY on Postgres, executemany elsewhere), one transaction per chunk.
+# Venues and artists are identified by their natural key (name, city,
+# state): rows whose key already exists are skipped, and availabilities and
+# shows refer to their artist and venue through artist_name/artist_city/
+# artist_state and venue_name/venue_city/venue_state columns. Memory is
+# bounded by the chunk size plus the venue and artist keys, whatever the
+# number of shows. Imported shows are not checked for availability or
+# double bookings. Start times without an offset are taken to be UTC.
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, time as dt_time
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+
+from cache import response_cache
+from clock import as_utc, state_timezone
+from counters import recount
+from database import db
+from models import Venue, Artist, Show, ArtistAvailability
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+NATURAL_KEY = ('name', 'city', 'state')
+
+
+def _text(value):
+    if isinstance(value, (list, dict)):
+        raise ValueError(f'expected a single value, not a {type(value).__name__}')
+    return None if value is None or value == '' else str(value)
+
+
+def _required(value):
+    value = _text(value)
+    if value is None:
+        raise ValueError('missing value')
+    return value
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _genres(value):
+    # A JSON list, or a semicolon separated string in CSV files
+    if isinstance(value, list):
+        if not all(isinstance(genre, str) for genre in value):
+            raise ValueError('genres must be strings')
+        return value
+    if value is not None and not isinstance(value, str):
+        raise ValueError('genres must be a list or a ; separated string')
+    return [genre.strip() for genre in (value or '').split(';') if genre.strip()]
+
+
+def _datetime(value):
+    # Times without an offset are UTC
+    return as_utc(datetime.fromisoformat(_required(value).replace('Z', '+00:00')))
+
+
+def _time(value):
+    return dt_time.fromisoformat(_required(value))
+
+
+def _day_of_week(value):
+    day = int(_required(value))
+    if not 0 <= day <= 6:
+        raise ValueError('must be 0 (Monday) to 6 (Sunday)')
+    return day
+
+
+# Column converters of each entity, in COPY column order
+FIELDS = {
+    'venues': {
+        'name': _required,
+        'city': _required,
+        'state': _required,
+        'address': _required,
+        'phone': _text,
+        'genres': _genres,
+        'image_link': _text,
+        'facebook_link': _text,
+        'website': _text,
+        'seeking_talent': _bool,
+        'seeking_description': _text,
+        # Derived from the state when empty
+        'timezone': _text,
+    },
+    'artists': {
+        'name': _required,
+        'city': _required,
+        'state': _required,
+        'phone': _text,
+        'genres': _genres,
+        'image_link': _text,
+        'facebook_link': _text,
+        'website': _text,
+        'seeking_venue': _bool,
+        'seeking_description': _text,
+    },
+    'availabilities': {
+        'day_of_week': _day_of_week,
+        'start_time': _time,
+        'end_time': _time,
+    },
+    'shows': {
+        'start_time': _datetime,
+    },
+}
+
+MODELS = {
+    'venues': Venue,
+    'artists': Artist,
+    'availabilities': ArtistAvailability,
+    'shows': Show,
+}
+
+# Foreign keys resolved by natural key: (column, referenced model, column prefix)
+REFERENCES = {
+    'availabilities': [('artist_id', Artist, 'artist_')],
+    'shows': [('venue_id', Venue, 'venue_'), ('artist_id', Artist, 'artist_')],
+}
+
+
+def read_rows(path, format=None):
+    """Yield (line number, row) from a CSV or JSON Lines file. CSV rows are
+    dicts; JSON Lines rows are left as text for ``import_rows`` to parse, so
+    that a malformed line rejects that row only."""
+    format = format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if format == 'csv':
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    yield line, text
+
+
+def _parse(raw):
+    # A row dict, or the text of a JSON Lines row
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'invalid JSON: {e.msg} at column {e.colno}')
+    if not isinstance(raw, dict):
+        raise ValueError('not a JSON object')
+    return raw
+
+
+def natural_keys(model):
+    """Map of (name, city, state) to id for every row of ``model``."""
+    return {
+        (name, city, state): id
+        for id, name, city, state in db.session.query(model.id, model.name, model.city, model.state)
+    }
+
+
+def _pg_array(values):
+    return '{' + ','.join(
+        '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values
+    ) + '}'
+
+
+def _copy(table, columns, rows):
+    buffer = io.StringIO()
+    # Empty fields are NULLs; the converters never produce empty strings
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            _pg_array(value) if isinstance(value, list) else value
+            for value in (row[column] for column in columns)
+        ])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        f'COPY "{table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+    )
+
+
+def write_rows(table, columns, rows, method='auto'):
+    if not rows:
+        return
+    if method == 'auto':
+        method = 'copy' if db.engine.dialect.name == 'postgresql' else 'executemany'
+    if method == 'copy':
+        _copy(table, columns, rows)
+    else:
+        db.session.execute(table.insert(), rows)
+
+
+class ImportReport:
+    """Row counts and throughput of an import, with the first rejected rows."""
+
+    max_examples = 100
+
+    def __init__(self, entity, echo=None):
+        self.entity = entity
+        self.echo = echo or (lambda message: None)
+        self.imported = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.examples = []
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return (self.imported + self.skipped + self.rejected) / max(self.seconds, 1e-9)
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append((line, reason))
+
+    def progress(self):
+        self.echo(f'{self.entity}: {self.imported} imported, {self.skipped} skipped, '
+                  f'{self.rejected} rejected ({self.rate:,.0f} rows/s)')
+
+
+def import_rows(entity, rows, chunk_size=10000, method='auto', echo=None):
+    """Import (line number, row) pairs as ``entity`` rows and return an
+    ``ImportReport``. Rows are dicts or JSON text; rows that can't be parsed
+    or converted are rejected with their line number."""
+    fields = FIELDS[entity]
+    table = MODELS[entity].__table__
+    references = REFERENCES.get(entity, [])
+    columns = [column for column, model, prefix in references] + list(fields)
+    report = ImportReport(entity, echo)
+
+    # Venues and artists already present (or earlier in the file) are skipped
+    seen = set(natural_keys(MODELS[entity])) if entity in ('venues', 'artists') else None
+    # (column, model, natural key columns in the file, key to id map, ids used)
+    lookups = [
+        (column, model, [prefix + part for part in NATURAL_KEY], natural_keys(model), set())
+        for column, model, prefix in references
+    ]
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        values = []
+        for line, raw in chunk:
+            try:
+                raw = _parse(raw)
+                row = {column: convert(raw.get(column)) for column, convert in fields.items()}
+                for column, model, key_columns, key_ids, touched in lookups:
+                    key = tuple([_text(raw.get(key_column)) for key_column in key_columns])
+                    id = key_ids.get(key)
+                    if id is None:
+                        raise ValueError(f'unknown {model.__tablename__} {key}')
+                    row[column] = id
+                    touched.add(id)
+            except (TypeError, ValueError) as e:
+                # JSON errors are ValueErrors; values of the wrong type may
+                # raise TypeError, e.g. a list as a natural key
+                report.reject(line, str(e))
+                continue
+            if entity == 'venues' and row['timezone'] is None:
+                row['timezone'] = state_timezone(row['state'])
+            if seen is not None:
+                key = tuple(row[part] for part in NATURAL_KEY)
+                if key in seen:
+                    report.skipped += 1
+                    continue
+                seen.add(key)
+            values.append(row)
+
+        write_rows(table, columns, values, method)
+        db.session.commit()
+        report.imported += len(values)
+        report.progress()
+
+    if entity == 'shows':
+        # Bulk writes bypass the counter events
+        for column, model, key_columns, key_ids, touched in lookups:
+            model_ids = sorted(touched)
+            for start in range(0, len(model_ids), chunk_size):
+                recount(model, model_ids[start:start + chunk_size])
+        db.session.commit()
+    response_cache.invalidate('venues', 'artists', 'shows', 'venue', 'artist')
+    return report
+
+
+def import_file(entity, path, format=None, chunk_size=10000, method='auto', echo=None):
+    return import_rows(entity, read_rows(path, format), chunk_size, method, echo)
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@click.command('import')
+@click.argument('entity', type=click.Choice(list(FIELDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(['csv', 'jsonl']),
+              help='File format; inferred from the extension by default.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per write and commit.')
+@click.option('--method', type=click.Choice(['auto', 'copy', 'executemany']), default='auto',
+              show_default=True, help='COPY needs Postgres.')
+@with_appcontext
+def import_command(entity, path, format, chunk_size, method):
+    """Import venues, artists, availabilities or shows from a CSV or JSON Lines file."""
+    report = import_file(entity, path, format, chunk_size, method, echo=click.echo)
+    for line, reason in report.examples[:20]:
+        click.echo(f'  line {line}: {reason}', err=True)
+    click.echo(f'{os.path.basename(path)}: {report.imported} {entity} imported in '
+               f'{report.seconds:.2f}s ({report.rate:,.0f} rows/s), {report.skipped} already present, '
+               f'{report.rejected} rejected.')
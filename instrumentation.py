@@ -0,0 +1,256 @@
+#----------------------------------------------------------------------------#
+# Request instrumentation.
+#
+# SQLAlchemy engine events time every statement a request sends and a
+# template class times its rendering. When a request ends, its query count,
+# database time, template time and slowest statement go to:
+#
+#   - a log record on the `app.requests` logger (METRICS_LOG_REQUESTS) with
+#     them as fields, plus a warning for statements over
+#     METRICS_SLOW_QUERY_MS (logs.py writes both as JSON lines);
+#   - per endpoint counters and histograms served as Prometheus text at
+#     /metrics. They are kept per process, so scrape every worker;
+#   - Server-Timing and X-DB-Queries response headers, in debug mode or
+#     when METRICS_HEADERS is set.
+#
+# With METRICS_ENABLED off nothing is registered: no events, no request
+# hooks and no /metrics route.
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, has_app_context, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SLOW_STATEMENT_LENGTH = 500
+
+
+class RequestStats:
+    """Database and template time of the request in flight."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statement_started = None
+        self.status = None
+
+    def statement_done(self, statement, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+def current_stats():
+    if not has_app_context():
+        return None
+    return g.get('request_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is not None:
+        stats.statement_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    if stats is not None and stats.statement_started is not None:
+        stats.statement_done(statement, time.perf_counter() - stats.statement_started)
+        stats.statement_started = None
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request's stats.
+    Included and extended templates render inside their parent's render()."""
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats = current_stats()
+            if stats is not None:
+                stats.template_seconds += time.perf_counter() - started
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=str(bound)), cumulative
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, cumulative
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """Per endpoint request, query and timing totals of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.durations = {}
+        self.query_counts = {}
+        self.db_seconds = defaultdict(float)
+        self.template_seconds = defaultdict(float)
+        self.slow_queries = defaultdict(int)
+
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.app = app
+        self.logger = app.logger.getChild('requests')
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        # Only templates loaded from now on are timed, so this runs at startup
+        app.jinja_env.template_class = TimedTemplate
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        # Streamed responses run their queries after after_request, so the
+        # request is recorded when its context is torn down
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def _before_request(self):
+        g.request_stats = RequestStats()
+
+    def _after_request(self, response):
+        stats = g.get('request_stats')
+        if stats is None:
+            return response
+        stats.status = response.status_code
+        headers = self.app.config['METRICS_HEADERS']
+        if headers or (headers is None and self.app.debug):
+            total_ms = (time.perf_counter() - stats.started) * 1000
+            response.headers['X-DB-Queries'] = str(stats.queries)
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"',
+                f'db-slowest;dur={stats.slowest_seconds * 1000:.2f}',
+                f'template;dur={stats.template_seconds * 1000:.2f}',
+                f'total;dur={total_ms:.2f}',
+            ])
+        return response
+
+    def _teardown_request(self, exc):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return
+        seconds = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+        status = stats.status or 500
+        slow = (stats.slowest_statement is not None
+                and stats.slowest_seconds * 1000 >= self.app.config['METRICS_SLOW_QUERY_MS'])
+        self.record(endpoint, request.method, status, seconds, stats, slow)
+
+        if self.app.config['METRICS_LOG_REQUESTS']:
+            self.logger.info('%s %s %s', request.method, request.path, status, extra={
+                'method': request.method,
+                'path': request.path,
+                'endpoint': endpoint,
+                'status': status,
+                'ms': round(seconds * 1000, 2),
+                'queries': stats.queries,
+                'db_ms': round(stats.db_seconds * 1000, 2),
+                'template_ms': round(stats.template_seconds * 1000, 2),
+                'slowest_query_ms': round(stats.slowest_seconds * 1000, 2),
+            })
+        if slow:
+            self.logger.warning('Slow query in %s', endpoint, extra={
+                'slow_query_ms': round(stats.slowest_seconds * 1000, 2),
+                'endpoint': endpoint,
+                'statement': ' '.join(stats.slowest_statement.split())[:SLOW_STATEMENT_LENGTH],
+            })
+
+    def record(self, endpoint, method, status, seconds, stats, slow=False):
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            if endpoint not in self.durations:
+                self.durations[endpoint] = Histogram(DURATION_BUCKETS)
+                self.query_counts[endpoint] = Histogram(QUERY_BUCKETS)
+            self.durations[endpoint].observe(seconds)
+            self.query_counts[endpoint].observe(stats.queries)
+            self.db_seconds[endpoint] += stats.db_seconds
+            self.template_seconds[endpoint] += stats.template_seconds
+            if slow:
+                self.slow_queries[endpoint] += 1
+
+    def exposition(self):
+        """The metrics in the Prometheus text format."""
+        with self.lock:
+            families = self._families()
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample in samples:
+                # Histograms yield (name, labels, value), the rest (labels, value)
+                sample_name, labels, value = sample if len(sample) == 3 else (name, *sample)
+                lines.append(f'{sample_name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _families(self):
+        return [
+            ('fyyur_requests_total', 'counter', 'Requests handled.', [
+                ({'endpoint': endpoint, 'method': method, 'status': status}, count)
+                for (endpoint, method, status), count in sorted(self.requests.items())
+            ]),
+            ('fyyur_request_duration_seconds', 'histogram', 'Request duration.', [
+                sample for endpoint, histogram in sorted(self.durations.items())
+                for sample in histogram.samples('fyyur_request_duration_seconds', {'endpoint': endpoint})
+            ]),
+            ('fyyur_request_queries', 'histogram', 'SQL statements per request.', [
+                sample for endpoint, histogram in sorted(self.query_counts.items())
+                for sample in histogram.samples('fyyur_request_queries', {'endpoint': endpoint})
+            ]),
+            ('fyyur_db_seconds_total', 'counter', 'Time spent in SQL statements.', [
+                ({'endpoint': endpoint}, seconds) for endpoint, seconds in sorted(self.db_seconds.items())
+            ]),
+            ('fyyur_template_seconds_total', 'counter', 'Time spent rendering templates.', [
+                ({'endpoint': endpoint}, seconds)
+                for endpoint, seconds in sorted(self.template_seconds.items())
+            ]),
+            ('fyyur_slow_requests_total', 'counter',
+             'Requests with a statement slower than METRICS_SLOW_QUERY_MS.', [
+                ({'endpoint': endpoint}, count) for endpoint, count in sorted(self.slow_queries.items())
+            ]),
+        ]
+
+    def _metrics_view(self):
+        return Response(self.exposition(), mimetype='text/plain; version=0.0.4')
+
+
+request_metrics = RequestMetrics()
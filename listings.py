@@ -0,0 +1,331 @@
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import and_, case, func, or_, select, tuple_
+
+from clock import MAX_UTC_OFFSET, as_utc, bucket_ceiling, bucket_now, is_past, is_upcoming, utcnow
+from database import db
+from models import Venue, Artist, Show, SHOW_FOREIGN_KEYS
+from schemas import SCHEMAS
+
+
+def venue_areas_statement():
+    return select(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ).order_by(
+        Venue.city, Venue.state, Venue.id
+    )
+
+
+def group_venue_areas(rows):
+    areas = []
+    for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "num_upcoming_shows": venue.num_upcoming_shows
+            } for venue in venues]
+        })
+    return areas
+
+
+def venue_areas():
+    """Build the city/state ``areas`` structure used by ``pages/venues.html``.
+
+    Every venue comes back with its maintained upcoming show counter from a
+    single query, instead of one COUNT per venue.
+    """
+    return group_venue_areas(db.session.execute(venue_areas_statement()))
+
+
+def artist_names_statement():
+    return select(Artist.id, Artist.name).order_by(Artist.name)
+
+
+def list_artist_names(rows):
+    return [{"id": row.id, "name": row.name} for row in rows]
+
+
+def artist_names():
+    """Every artist's id and name, in name order, for ``pages/artists.html``."""
+    return list_artist_names(db.session.execute(artist_names_statement()))
+
+
+def _show_page_bounds(page, per_page):
+    return (page - 1) * per_page + 1, page * per_page
+
+
+def entity_detail(model, entity_id, counterpart, past_page=1, upcoming_page=1, per_page=24, now=None):
+    """Load a venue or artist together with one page of its past and one page
+    of its upcoming shows (with their ``counterpart`` artist or venue) in a
+    single query.
+
+    Shows are ranked per past/upcoming partition with a window function, so
+    only the requested pages are fetched; the partition totals come from
+    correlated counts in the same statement. Each show carries its venue's
+    time zone. ``now`` defaults to the start of the current time bucket, so
+    the result can be cached for the rest of the bucket. Returns None when
+    there is no such entity.
+    """
+    if now is None:
+        now = bucket_now()
+    show_fk = SHOW_FOREIGN_KEYS[model]
+    counterpart_fk = SHOW_FOREIGN_KEYS[counterpart]
+    past = is_past(Show.start_time, now)
+
+    ranked = select(
+        Show.start_time,
+        counterpart_fk.label('counterpart_id'),
+        past.label('is_past'),
+        func.row_number().over(
+            partition_by=past,
+            # Most recent past shows first, soonest upcoming shows first
+            order_by=[case((past, Show.start_time)).desc(), Show.start_time, Show.id]
+        ).label('rank')
+    ).where(show_fk == entity_id).subquery()
+
+    past_first, past_last = _show_page_bounds(past_page, per_page)
+    upcoming_first, upcoming_last = _show_page_bounds(upcoming_page, per_page)
+    on_page = or_(
+        and_(ranked.c.is_past, ranked.c.rank.between(past_first, past_last)),
+        and_(~ranked.c.is_past, ranked.c.rank.between(upcoming_first, upcoming_last))
+    )
+
+    rows = db.session.query(
+        model,
+        _show_total(model, is_past(Show.start_time, now)).label('past_shows_count'),
+        _show_total(model, is_upcoming(Show.start_time, now)).label('upcoming_shows_count'),
+        ranked.c.start_time,
+        ranked.c.is_past,
+        counterpart.id.label('counterpart_id'),
+        counterpart.name.label('counterpart_name'),
+        counterpart.image_link.label('counterpart_image_link'),
+        # The entity's own column on venue pages, the joined venue's on artist pages
+        Venue.timezone.label('venue_timezone')
+    ).select_from(
+        model
+    ).outerjoin(
+        ranked, on_page
+    ).outerjoin(
+        counterpart, counterpart.id == ranked.c.counterpart_id
+    ).filter(
+        model.id == entity_id
+    ).order_by(
+        ranked.c.is_past, ranked.c.rank
+    ).all()
+
+    if not rows:
+        return None
+
+    past_shows, upcoming_shows = [], []
+    for row in rows:
+        if row.start_time is not None:
+            (past_shows if row.is_past else upcoming_shows).append(row)
+    return detail_data(model, counterpart, rows[0][0], rows[0].past_shows_count,
+                       rows[0].upcoming_shows_count, past_shows, upcoming_shows,
+                       past_page, upcoming_page, per_page)
+
+
+def detail_data(model, counterpart, entity, past_shows_count, upcoming_shows_count,
+                past_shows, upcoming_shows, past_page, upcoming_page, per_page):
+    """The data of a venue or artist page from its entity and its show rows
+    (start_time, counterpart id, name and image link, venue_timezone)."""
+    prefix = counterpart.__tablename__
+
+    def show(row):
+        return {
+            f"{prefix}_id": row.counterpart_id,
+            f"{prefix}_name": row.counterpart_name,
+            f"{prefix}_image_link": row.counterpart_image_link,
+            "start_time": row.start_time,
+            "venue_timezone": row.venue_timezone
+        }
+
+    data = SCHEMAS[model].dump(entity)
+    data.update({
+        "past_shows": [show(row) for row in past_shows],
+        "upcoming_shows": [show(row) for row in upcoming_shows],
+        "past_shows_count": past_shows_count,
+        "upcoming_shows_count": upcoming_shows_count,
+        "past_shows_page": past_page,
+        "upcoming_shows_page": upcoming_page,
+        "shows_per_page": per_page,
+    })
+    return data
+
+
+def _show_total(model, condition):
+    show_fk = SHOW_FOREIGN_KEYS[model]
+    return select(func.count(Show.id)).where(show_fk == model.id, condition).scalar_subquery()
+
+
+def entity_summary_statement(model, entity_id, now):
+    """A venue's or artist's columns and its past and upcoming show totals
+    at ``now`` (which the stored counters only catch up with on a roll)."""
+    return select(
+        *model.__table__.columns,
+        _show_total(model, is_past(Show.start_time, now)).label('past_shows_total'),
+        _show_total(model, is_upcoming(Show.start_time, now)).label('upcoming_shows_total')
+    ).where(model.id == entity_id)
+
+
+def show_page_statement(model, entity_id, counterpart, past, page, per_page, now):
+    """One page of a venue's or artist's past (most recent first) or
+    upcoming (soonest first) shows, in the row shape ``detail_data`` takes."""
+    show_fk = SHOW_FOREIGN_KEYS[model]
+    if past:
+        condition, order = is_past(Show.start_time, now), [Show.start_time.desc(), Show.id]
+    else:
+        condition, order = is_upcoming(Show.start_time, now), [Show.start_time, Show.id]
+    first, last = _show_page_bounds(page, per_page)
+    return select(
+        Show.start_time,
+        counterpart.id.label('counterpart_id'),
+        counterpart.name.label('counterpart_name'),
+        counterpart.image_link.label('counterpart_image_link'),
+        Venue.timezone.label('venue_timezone')
+    ).select_from(
+        Show
+    ).join(
+        Venue, Show.venue_id == Venue.id
+    ).join(
+        Artist, Show.artist_id == Artist.id
+    ).where(
+        show_fk == entity_id, condition
+    ).order_by(*order).offset(first - 1).limit(per_page)
+
+
+def entity_version_statement(model, entity_id, now):
+    show_fk = SHOW_FOREIGN_KEYS[model]
+    last_started = select(func.max(Show.start_time)).where(
+        show_fk == model.id, is_past(Show.start_time, now)
+    ).scalar_subquery()
+    return select(model.updated_at, last_started).where(model.id == entity_id)
+
+
+def latest_version(row):
+    """The version of a row of ``entity_version_statement``."""
+    if row is None:
+        return None
+    updated_at, last_started = row
+    if last_started is None:
+        return updated_at
+    return max(updated_at, bucket_ceiling(last_started))
+
+
+def entity_version(model, entity_id, now=None):
+    """When the page of a venue or artist last changed, or None when there is
+    no such entity.
+
+    That is the later of the row's ``updated_at`` (bumped by edits and by
+    show counter changes) and the start of the time bucket in which its most
+    recent past show moved from the upcoming to the past list. Both come
+    from one primary key lookup and one probe of the show index. ``now``
+    defaults to ``bucket_now()``, the instant the page data is split at.
+    """
+    if now is None:
+        now = bucket_now()
+    return latest_version(db.session.execute(entity_version_statement(model, entity_id, now)).first())
+
+
+def touch_counterparts(model, entity_id):
+    """Bump ``updated_at`` on the venues or artists that share a show with
+    the given artist or venue, whose pages list its name and image."""
+    counterpart = next(other for other in SHOW_FOREIGN_KEYS if other is not model)
+    ids = select(SHOW_FOREIGN_KEYS[counterpart]).where(SHOW_FOREIGN_KEYS[model] == entity_id)
+    return counterpart.query.filter(counterpart.id.in_(ids)).update(
+        {counterpart.updated_at: utcnow()}, synchronize_session=False
+    )
+
+
+def format_cursor(start_time, id):
+    # UTC without an offset, so the cursor needs no escaping in a URL
+    return f"{as_utc(start_time).replace(tzinfo=None).isoformat()}_{id}"
+
+
+def parse_cursor(cursor):
+    """Inverse of ``format_cursor``; raises ValueError for malformed cursors."""
+    start_time, id = cursor.rsplit('_', 1)
+    return as_utc(datetime.fromisoformat(start_time)), int(id)
+
+
+def _local_time_filter(value, lower):
+    # An aware bound is an instant. A naive one is a time on each venue's
+    # clock: the UTC range is widened by the largest offset so the
+    # start_time index still applies, then local times are compared exactly
+    # (clock.py provides timezone() on SQLite)
+    if value.tzinfo is not None:
+        bound = as_utc(value)
+        return [Show.start_time >= bound if lower else Show.start_time < bound]
+    local_time = func.timezone(Venue.timezone, Show.start_time, type_=db.DateTime)
+    if lower:
+        return [Show.start_time >= as_utc(value - MAX_UTC_OFFSET), local_time >= value]
+    return [Show.start_time < as_utc(value + MAX_UTC_OFFSET), local_time < value]
+
+
+def shows_page_statement(limit, after=None, start=None, end=None):
+    """The /shows listing query: ``limit`` + 1 rows in (start_time, id)
+    order, so ``list_shows_page`` can tell whether there is a next page."""
+    statement = select(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Venue.timezone.label('venue_timezone')
+    ).join(
+        Venue, Show.venue_id == Venue.id
+    ).join(
+        Artist, Show.artist_id == Artist.id
+    )
+    if after is not None:
+        statement = statement.where(tuple_(Show.start_time, Show.id) > tuple_(*after))
+    if start is not None:
+        statement = statement.where(*_local_time_filter(start, lower=True))
+    if end is not None:
+        statement = statement.where(*_local_time_filter(end, lower=False))
+    return statement.order_by(Show.start_time, Show.id).limit(limit + 1)
+
+
+def list_shows_page(rows, limit):
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = format_cursor(rows[-1].start_time, rows[-1].id)
+
+    shows = [{
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time,
+        "venue_timezone": row.venue_timezone
+    } for row in rows]
+    return shows, next_cursor
+
+
+def shows_page(limit, after=None, start=None, end=None):
+    """One page of the /shows listing in (start_time, id) order.
+
+    ``start`` and ``end`` without an offset are venue-local times. Pages
+    are addressed by keyset cursor (the last row's start time and id)
+    rather than OFFSET, so every page costs one indexed range scan. Only the
+    columns the template uses are selected. Returns the shows and the cursor
+    of the next page (None on the last page).
+    """
+    return list_shows_page(db.session.execute(shows_page_statement(limit, after, start, end)), limit)
@@ -0,0 +1,159 @@
+#----------------------------------------------------------------------------#
+# Logging.
+#
+# Records of the app's loggers go through a queue. The thread that logs only
+# renders the message and puts the record on the queue; a listener thread
+# formats it as a JSON line and writes it to LOG_FILE ('-' for stderr),
+# which rotates at LOG_MAX_BYTES. A slow or busy disk then holds up log
+# lines, not responses.
+#
+# Every request gets an id, taken from its X-Request-ID header when that
+# looks like one or generated otherwise. It is sent back in the same header
+# and added to the request's records. The INFO records of a request are
+# kept with probability LOG_SAMPLE_RATES[endpoint] (LOG_SAMPLE_RATE for
+# other endpoints), drawn once per request so that its lines are kept or
+# dropped together; kept records carry the rate they were sampled at.
+# Warnings and errors are always kept.
+#----------------------------------------------------------------------------#
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Ids from clients and proxies end up in the logs as is, so only plain ones
+# are taken over
+_REQUEST_ID = re.compile(r'[A-Za-z0-9._:-]{1,128}')
+# What every LogRecord has; anything else was passed as `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with its `extra` fields at the top level."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+def _sampled(record):
+    if record.levelno >= logging.WARNING or not has_request_context():
+        return True
+    return g.get('log_sampled', True)
+
+
+class RequestQueueHandler(QueueHandler):
+    """Puts records on the queue with what only the logging thread knows."""
+
+    def prepare(self, record):
+        # Arguments may change once the call returns, so the message is
+        # rendered here. The traceback is formatted by the listener.
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            if record.levelno < logging.WARNING and g.get('log_sample_rate', 1) < 1:
+                record.sample_rate = g.log_sample_rate
+        return record
+
+
+def log_file_handler(config):
+    """The handler LOG_FILE asks for, writing JSON lines."""
+    if config['LOG_FILE'] == '-':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = RotatingFileHandler(config['LOG_FILE'], maxBytes=config['LOG_MAX_BYTES'],
+                                      backupCount=config['LOG_BACKUP_COUNT'],
+                                      encoding='utf-8', delay=True)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+class LogPipeline:
+    """The queue and listener thread behind the app's loggers."""
+
+    def __init__(self):
+        self.logger = None
+        self.handler = None
+        self.listener = None
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.logger.setLevel(app.config['LOG_LEVEL'])
+        # Flask's own handler writes to stderr from the request thread
+        app.logger.removeHandler(default_handler)
+        self.start(app.logger, log_file_handler(app.config))
+
+    def start(self, logger, *handlers):
+        """Send the records of ``logger`` through the queue to ``handlers``,
+        replacing the ones it was started with before."""
+        if self.listener is None:
+            atexit.register(self.stop)
+        else:
+            self.stop()
+            self.logger.removeHandler(self.handler)
+        self.logger = logger
+        self.handler = RequestQueueHandler(queue.SimpleQueue())
+        self.handler.addFilter(_sampled)
+        self.listener = QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        logger.addHandler(self.handler)
+
+    def restart(self):
+        # Threads don't survive a fork, so a forked worker starts its own
+        # listener, on a fresh queue in case the parent's held records
+        if self.listener is not None:
+            self.handler.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.handler.queue, *self.listener.handlers,
+                                          respect_handler_level=True)
+            self.listener.start()
+
+    def stop(self):
+        """Write out the queued records and stop the listener thread."""
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+
+    def _before_request(self):
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = request_id if _REQUEST_ID.fullmatch(request_id) else uuid.uuid4().hex
+        config = self.app.config
+        rate = config['LOG_SAMPLE_RATES'].get(request.endpoint, config['LOG_SAMPLE_RATE'])
+        g.log_sample_rate = rate
+        g.log_sampled = rate >= 1 or random.random() < rate
+
+    def _after_request(self, response):
+        request_id = g.get('request_id')
+        if request_id is not None:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,66 @@
+#----------------------------------------------------------------------------#
+# The home page, the /search typeahead, cache stats and exports.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+
+from flask import (Blueprint, Response, abort, current_app, jsonify, render_template, request,
+                   stream_with_context)
+
+from cache import response_cache
+from exporter import export_chunks
+from search import prefix_index, upcoming_shows_for
+
+main_views = Blueprint('main', __name__)
+
+@main_views.route('/')
+def index():
+  return render_template('pages/home.html')
+
+@main_views.route('/search')
+def search():
+    # Typeahead over venues and artists (by name, city/state or genre) plus
+    # their next upcoming shows, returned as JSON
+    query = request.args.get('q', '')
+    types = set(filter(None, request.args.get('types', '').split(','))) & {'venue', 'artist'}
+    limit = min(max(request.args.get('limit', 10, type=int), 1), current_app.config['SEARCH_RESULTS_MAX'])
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    results, next_offset = prefix_index().search(query, types, limit, offset)
+    shows = upcoming_shows_for(results, limit) if request.args.get('shows', '1') != '0' else []
+
+    response = jsonify({
+        "query": query,
+        "results": results,
+        "shows": shows,
+        "next_offset": next_offset
+    })
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['TYPEAHEAD_INDEX_TTL']
+    return response
+
+@main_views.route('/cache/stats')
+def cache_stats():
+    # Hit/miss counts of the page data cache in this process
+    return jsonify(response_cache.stats())
+
+#  Export
+#  ----------------------------------------------------------------
+
+@main_views.route('/export/<any(venues, artists, shows):entity>.<any(jsonl, csv):format>')
+def export(entity, format):
+    # Streams the whole table, or the rows after the ?since=<updated_at>
+    # and/or ?after_id=<id> watermark of a previous export
+    try:
+        since = request.args.get('since')
+        since = datetime.fromisoformat(since) if since else None
+        after_id = request.args.get('after_id')
+        after_id = int(after_id) if after_id else None
+    except ValueError:
+        abort(400)
+
+    mimetype = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(export_chunks(entity, format, since, after_id)),
+                        mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={entity}.{format}'
+    return response
@@ -0,0 +1,53 @@
+"""search indexes
+
+Revision ID: 3c9d1e7b5a20
+Revises: 571a27b3f4a6
+Create Date: 2026-10-18 11:40:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d1e7b5a20'
+down_revision = '571a27b3f4a6'
+branch_labels = None
+depends_on = None
+
+TRIGRAM_COLUMNS = [
+    ('venue', 'name'),
+    ('venue', 'city'),
+    ('artist', 'name'),
+    ('artist', 'city'),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('venue', schema=None) as batch_op:
+        batch_op.create_index('ix_venue_genres', ['genres'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('artist', schema=None) as batch_op:
+        batch_op.create_index('ix_artist_genres', ['genres'], unique=False, postgresql_using='gin')
+
+    # Trigram indexes serve the ILIKE '%term%' searches and similarity ranking
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column in TRIGRAM_COLUMNS:
+        op.create_index(
+            f'ix_{table}_{column}_trgm', table, [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column in TRIGRAM_COLUMNS:
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+
+    with op.batch_alter_table('artist', schema=None) as batch_op:
+        batch_op.drop_index('ix_artist_genres', postgresql_using='gin')
+
+    with op.batch_alter_table('venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_venue_genres', postgresql_using='gin')
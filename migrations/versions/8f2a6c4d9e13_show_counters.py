@@ -0,0 +1,40 @@
+"""show counters
+
+Revision ID: 8f2a6c4d9e13
+Revises: 3c9d1e7b5a20
+Create Date: 2026-10-18 12:05:47.106522
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2a6c4d9e13'
+down_revision = '3c9d1e7b5a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venue', 'artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the show table; `flask counters roll` keeps them current
+    for table, column in (('venue', 'venue_id'), ('artist', 'artist_id')):
+        op.execute(f"""
+            UPDATE {table} SET
+                upcoming_shows_count = (SELECT count(*) FROM show
+                    WHERE show.{column} = {table}.id AND show.start_time > CURRENT_TIMESTAMP),
+                past_shows_count = (SELECT count(*) FROM show
+                    WHERE show.{column} = {table}.id AND show.start_time <= CURRENT_TIMESTAMP)
+        """)
+
+
+def downgrade():
+    for table in ('artist', 'venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
@@ -0,0 +1,36 @@
+"""show indexes
+
+Revision ID: b71e0a93c5d4
+Revises: 8f2a6c4d9e13
+Create Date: 2026-10-18 12:41:09.533870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71e0a93c5d4'
+down_revision = '8f2a6c4d9e13'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_show_venue_id_start_time', 'show', ['venue_id', 'start_time']),
+    ('ix_show_artist_id_start_time', 'show', ['artist_id', 'start_time']),
+    ('ix_show_start_time_id', 'show', ['start_time', 'id']),
+    ('ix_artist_availability_artist_id_day_of_week', 'artist_availability', ['artist_id', 'day_of_week']),
+]
+
+
+def upgrade():
+    # Build the indexes without locking the tables against writes on Postgres
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""export indexes
+
+Revision ID: e2c7b5f90a18
+Revises: d4e8a1f27c6b
+Create Date: 2026-10-18 17:20:33.904511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c7b5f90a18'
+down_revision = 'd4e8a1f27c6b'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_venue_updated_at_id', 'venue', ['updated_at', 'id']),
+    ('ix_artist_updated_at_id', 'artist', ['updated_at', 'id']),
+    ('ix_show_updated_at_id', 'show', ['updated_at', 'id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
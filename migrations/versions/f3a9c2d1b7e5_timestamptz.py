@@ -0,0 +1,80 @@
+"""timestamptz show times and venue time zones
+
+Revision ID: f3a9c2d1b7e5
+Revises: e2c7b5f90a18
+Create Date: 2026-10-18 19:05:12.440917
+
+Existing naive timestamps are read as UTC, which is what the seed data
+(``...Z``) holds. With the session time zone set to UTC, Postgres 12+
+converts timestamp to timestamptz without rewriting the table or its
+indexes.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c2d1b7e5'
+down_revision = 'e2c7b5f90a18'
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ('show', 'start_time', False),
+    ('show', 'updated_at', True),
+    ('venue', 'updated_at', True),
+    ('artist', 'updated_at', True),
+]
+
+# Copy of clock.STATE_TIMEZONES at the time of this migration
+STATE_TIMEZONES = {
+    'AL': 'America/Chicago', 'AK': 'America/Anchorage', 'AZ': 'America/Phoenix',
+    'AR': 'America/Chicago', 'CA': 'America/Los_Angeles', 'CO': 'America/Denver',
+    'CT': 'America/New_York', 'DE': 'America/New_York', 'DC': 'America/New_York',
+    'FL': 'America/New_York', 'GA': 'America/New_York', 'HI': 'Pacific/Honolulu',
+    'ID': 'America/Boise', 'IL': 'America/Chicago', 'IN': 'America/Indiana/Indianapolis',
+    'IA': 'America/Chicago', 'KS': 'America/Chicago', 'KY': 'America/New_York',
+    'LA': 'America/Chicago', 'ME': 'America/New_York', 'MT': 'America/Denver',
+    'NE': 'America/Chicago', 'NV': 'America/Los_Angeles', 'NH': 'America/New_York',
+    'NJ': 'America/New_York', 'NM': 'America/Denver', 'NY': 'America/New_York',
+    'NC': 'America/New_York', 'ND': 'America/Chicago', 'OH': 'America/New_York',
+    'OK': 'America/Chicago', 'OR': 'America/Los_Angeles', 'MD': 'America/New_York',
+    'MA': 'America/New_York', 'MI': 'America/Detroit', 'MN': 'America/Chicago',
+    'MS': 'America/Chicago', 'MO': 'America/Chicago', 'PA': 'America/New_York',
+    'RI': 'America/New_York', 'SC': 'America/New_York', 'SD': 'America/Chicago',
+    'TN': 'America/Chicago', 'TX': 'America/Chicago', 'UT': 'America/Denver',
+    'VT': 'America/New_York', 'VA': 'America/New_York', 'WA': 'America/Los_Angeles',
+    'WV': 'America/New_York', 'WI': 'America/Chicago', 'WY': 'America/Denver',
+}
+
+
+def _alter_columns(timezone):
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for table, column, has_default in COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(column,
+                                  type_=sa.DateTime(timezone=timezone),
+                                  existing_type=sa.DateTime(timezone=not timezone),
+                                  existing_nullable=False,
+                                  existing_server_default=sa.func.now() if has_default else None)
+
+
+def upgrade():
+    _alter_columns(timezone=True)
+
+    with op.batch_alter_table('venue', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(length=64), server_default='UTC', nullable=False))
+
+    venue = sa.table('venue', sa.column('state', sa.String), sa.column('timezone', sa.String))
+    op.execute(venue.update().values(timezone=sa.case(
+        *[(venue.c.state == state, name) for state, name in STATE_TIMEZONES.items()], else_='UTC'
+    )))
+
+
+def downgrade():
+    with op.batch_alter_table('venue', schema=None) as batch_op:
+        batch_op.drop_column('timezone')
+
+    _alter_columns(timezone=False)
@@ -2,10 +2,47 @@
 # Models.
 #----------------------------------------------------------------------------#
 
+from datetime import timezone
+
+from clock import state_timezone, utcnow
 from database import db
 
+# Genres are a Postgres ARRAY; non-Postgres (SQLite) test databases store them as JSON
+GenreList = db.ARRAY(db.String()).with_variant(db.JSON(), 'sqlite')
+
+
+class UTCDateTime(db.TypeDecorator):
+    """timestamptz on Postgres; values are stored and returned as aware UTC
+    datetimes on every database (SQLite keeps them as naive UTC text).
+    Naive values are taken to be UTC."""
+
+    impl = db.DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            # Otherwise Postgres would read it in the session time zone
+            value = value.replace(tzinfo=timezone.utc)
+        value = value.astimezone(timezone.utc)
+        return value if dialect.name == 'postgresql' else value.replace(tzinfo=None)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+
 class Venue(db.Model):
     __tablename__ = 'venue'
+    __table_args__ = (
+        db.Index('ix_venue_genres', 'genres', postgresql_using='gin'),
+        # Incremental exports read rows in (updated_at, id) order
+        db.Index('ix_venue_updated_at_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -14,12 +51,23 @@ class Venue(db.Model):
     address = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
     # Modify the genres column to explicitly use String ARRAY
-    genres = db.Column(db.ARRAY(db.String()), nullable=True)
+    genres = db.Column(GenreList, nullable=True)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
+    # tz database name; show times are entered and displayed in it
+    timezone = db.Column(db.String(64), default=lambda context: state_timezone(
+        context.get_current_parameters().get('state')), server_default='UTC', nullable=False)
+    # Denormalized show counts, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Last change to the row or to its counters; versions the entity page.
+    # Set from the app's clock, since SQLite's CURRENT_TIMESTAMP only has
+    # whole seconds and two changes within one would share an ETag.
+    updated_at = db.Column(UTCDateTime, default=utcnow, onupdate=utcnow,
+                           server_default=db.func.now(), nullable=False)
     shows = db.relationship('Show', backref='venue', lazy=True,
                           cascade='all, delete-orphan')
 
@@ -27,7 +75,10 @@ class Venue(db.Model):
 
 class ArtistAvailability(db.Model):
     __tablename__ = 'artist_availability'
-    
+    __table_args__ = (
+        db.Index('ix_artist_availability_artist_id_day_of_week', 'artist_id', 'day_of_week'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False)
     day_of_week = db.Column(db.Integer, nullable=False)  # 0-6 for Monday-Sunday
@@ -36,18 +87,29 @@ class ArtistAvailability(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'artist'
+    __table_args__ = (
+        db.Index('ix_artist_genres', 'genres', postgresql_using='gin'),
+        # Incremental exports read rows in (updated_at, id) order
+        db.Index('ix_artist_updated_at_id', 'updated_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String()), nullable=True)
+    genres = db.Column(GenreList, nullable=True)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False, nullable=False)
     seeking_description = db.Column(db.String(500))
+    # Denormalized show counts, maintained by counters.py
+    upcoming_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    past_shows_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Last change to the row or to its counters; versions the entity page
+    updated_at = db.Column(UTCDateTime, default=utcnow, onupdate=utcnow,
+                           server_default=db.func.now(), nullable=False)
     shows = db.relationship('Show', backref='artist', lazy=True,
                           cascade='all, delete-orphan')
     availabilities = db.relationship('ArtistAvailability', backref='artist', lazy=True)
@@ -58,16 +120,28 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = 'show'
-    
+    __table_args__ = (
+        # Every show query filters by venue or artist and/or a start time range
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        # (start_time, id) is also the keyset order of the /shows listing
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+        db.Index('ix_show_updated_at_id', 'updated_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False)  # Add this field to track show times
+    start_time = db.Column(UTCDateTime, nullable=False)  # Add this field to track show times
+    updated_at = db.Column(UTCDateTime, default=utcnow, onupdate=utcnow,
+                           server_default=db.func.now(), nullable=False)
     
     # Remove duplicate fields and incorrect relationship
     # Remove: name, city, state, phone, genres, image_link, facebook_link
     # Remove: course relationship
 
-
-
-
+# Column on the show table that points back at each of its parents
+SHOW_FOREIGN_KEYS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id,
+}
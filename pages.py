@@ -0,0 +1,79 @@
+#----------------------------------------------------------------------------#
+# Page helpers shared by the views (venue_views.py, artist_views.py and
+# show_views.py) and their async variants in async_views.py.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+
+from flask import abort, current_app, request, session
+from werkzeug.http import is_resource_modified
+
+from clock import as_utc, time_bucket
+from listings import parse_cursor
+
+
+def show_pages():
+    # Past and upcoming show pages requested on a venue or artist page
+    return {
+        "past_page": max(request.args.get('past_page', 1, type=int), 1),
+        "upcoming_page": max(request.args.get('upcoming_page', 1, type=int), 1),
+        "per_page": current_app.config['SHOWS_PER_PAGE'],
+    }
+
+
+def detail_cache_key(entity_id, pages):
+    # Past and upcoming are split at the start of the time bucket, which is
+    # part of the key
+    return f"{entity_id}:{pages['past_page']}:{pages['upcoming_page']}:{pages['per_page']}:{time_bucket()}"
+
+
+def page_validators(model, entity_id, version):
+    # ETag and Last-Modified of a venue or artist page from its version
+    # (see listings.entity_version); 404 when there is no such entity
+    if version is None:
+        abort(404)
+    etag = f"{model.__tablename__}-{entity_id}-{version.timestamp():.6f}"
+    return etag, as_utc(version)
+
+
+def not_modified(etag, last_modified):
+    # Whether the client's copy is current. A page with flashed messages
+    # waiting is rendered to show them.
+    if session.get('_flashes'):
+        return False
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # The page carries the session's flashes and CSRF token, so only the
+    # browser may keep it, and it must revalidate it every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def search_page():
+    # Clamp the requested page so a one-letter search can't return a whole table
+    max_limit = current_app.config['SEARCH_RESULTS_MAX']
+    limit = request.form.get('limit', current_app.config['SEARCH_RESULTS_PER_PAGE'], type=int)
+    offset = request.form.get('offset', 0, type=int)
+    return min(max(limit, 1), max_limit), max(offset, 0)
+
+
+def shows_listing_args():
+    # limit, after (a cursor), from and to of the /shows listing; 400 when malformed
+    config = current_app.config
+    try:
+        limit = min(max(request.args.get('limit', config['SHOWS_LISTING_PER_PAGE'], type=int), 1),
+                    config['SHOWS_LISTING_MAX'])
+        after = request.args.get('after')
+        after = parse_cursor(after) if after else None
+        start = request.args.get('from')
+        start = datetime.fromisoformat(start) if start else None
+        end = request.args.get('to')
+        end = datetime.fromisoformat(end) if end else None
+    except ValueError:
+        abort(400)
+    return limit, after, start, end
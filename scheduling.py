@@ -0,0 +1,226 @@
+#----------------------------------------------------------------------------#
+# Scheduling.
+#
+# A show occupies its venue and its artist from its start time for
+# SHOW_DURATION_MINUTES, so two shows of the same venue or artist conflict
+# when their start times are less than one show length apart. That turns
+# the overlap test into a start time range probe on the (venue_id,
+# start_time) and (artist_id, start_time) indexes, and an availability
+# check into a probe on (artist_id, day_of_week).
+#
+# Start times are instants (aware, or naive UTC); availability windows and
+# the times in messages are wall clock times in the venue's time zone.
+#----------------------------------------------------------------------------#
+
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, exists, func, literal, or_, select
+from sqlalchemy.dialects import postgresql
+
+from clock import local
+from counters import recount
+from database import db
+from models import Venue, Artist, Show, ArtistAvailability
+
+
+def show_duration():
+    return timedelta(minutes=current_app.config['SHOW_DURATION_MINUTES'])
+
+
+def _available(artist_id, start_time):
+    return exists().where(
+        ArtistAvailability.artist_id == artist_id,
+        ArtistAvailability.day_of_week == start_time.weekday(),
+        ArtistAvailability.start_time <= start_time.time(),
+        ArtistAvailability.end_time >= start_time.time()
+    )
+
+
+def _conflict(show_fk, entity_id, start_time, duration):
+    return select(Show.start_time).where(
+        show_fk == entity_id,
+        Show.start_time > start_time - duration,
+        Show.start_time < start_time + duration
+    ).order_by(Show.start_time).limit(1).scalar_subquery()
+
+
+def lock_schedules(artist_id, venue_id):
+    """Lock the venue and artist rows until the transaction ends, so
+    concurrent bookings for either are checked one after the other (a no-op
+    on SQLite, which serializes writers anyway). Returns the venue's time
+    zone; raises LookupError when the artist or the venue doesn't exist."""
+    venue = db.session.query(Venue.timezone).filter(Venue.id == venue_id).with_for_update().all()
+    artist = db.session.query(Artist.id).filter(Artist.id == artist_id).with_for_update().all()
+    missing = [f'There is no {name} with id {id}.'
+               for name, id, rows in (('artist', artist_id, artist), ('venue', venue_id, venue)) if not rows]
+    if missing:
+        raise LookupError(' '.join(missing))
+    return venue[0].timezone
+
+
+def _problem_messages(available, venue_conflict, artist_conflict, timezone):
+    problems = []
+    if not available:
+        problems.append('Artist is not available at this time.')
+    if venue_conflict is not None:
+        problems.append(f'The venue already has a show at {local(venue_conflict, timezone):%Y-%m-%d %H:%M}.')
+    if artist_conflict is not None:
+        problems.append(f'The artist already has a show at {local(artist_conflict, timezone):%Y-%m-%d %H:%M}.')
+    return problems
+
+
+def schedule_problems(artist_id, venue_id, start_time, duration=None, timezone=None):
+    """Reasons a show can't be booked, empty when it can.
+
+    The artist's availability (in the venue's ``timezone``) and the venue's
+    and artist's conflicting shows are checked in a single statement.
+    """
+    if duration is None:
+        duration = show_duration()
+    available, venue_conflict, artist_conflict = db.session.query(
+        _available(artist_id, local(start_time, timezone)),
+        _conflict(Show.venue_id, venue_id, start_time, duration),
+        _conflict(Show.artist_id, artist_id, start_time, duration)
+    ).one()
+    return _problem_messages(available, venue_conflict, artist_conflict, timezone)
+
+
+#----------------------------------------------------------------------------#
+# In-memory indexes, for checking many start times against one schedule.
+#----------------------------------------------------------------------------#
+
+class IntervalIndex:
+    """Sorted start times of shows that all last ``duration``; testing a new
+    show for overlap is one bisect."""
+
+    def __init__(self, start_times, duration):
+        self.start_times = sorted(start_times)
+        self.duration = duration
+
+    def overlapping(self, start_time):
+        """Start time of a show overlapping one starting at ``start_time``, or None."""
+        i = bisect_right(self.start_times, start_time - self.duration)
+        if i < len(self.start_times) and self.start_times[i] < start_time + self.duration:
+            return self.start_times[i]
+        return None
+
+    def add(self, start_time):
+        self.start_times.insert(bisect_left(self.start_times, start_time), start_time)
+
+
+class AvailabilityIndex:
+    """An artist's weekly availability windows, merged per day of the week,
+    so a lookup is one bisect however many windows overlap."""
+
+    def __init__(self, windows):
+        days = {}
+        for day_of_week, start, end in sorted(windows):
+            merged = days.setdefault(day_of_week, [])
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = {day: [start for start, end in merged] for day, merged in days.items()}
+        self.ends = {day: [end for start, end in merged] for day, merged in days.items()}
+
+    def available(self, start_time):
+        day = start_time.weekday()
+        if day not in self.starts:
+            return False
+        i = bisect_right(self.starts[day], start_time.time()) - 1
+        return i >= 0 and start_time.time() <= self.ends[day][i]
+
+
+class Schedule:
+    """The availability of one artist and the shows of that artist and one
+    venue between two times, loaded with two indexed queries."""
+
+    def __init__(self, artist_id, venue_id, first, last, duration=None, timezone=None):
+        if duration is None:
+            duration = show_duration()
+        self.timezone = timezone
+        windows = db.session.query(
+            ArtistAvailability.day_of_week, ArtistAvailability.start_time, ArtistAvailability.end_time
+        ).filter(ArtistAvailability.artist_id == artist_id).all()
+        shows = db.session.query(Show.venue_id, Show.artist_id, Show.start_time).filter(
+            or_(Show.venue_id == venue_id, Show.artist_id == artist_id),
+            and_(Show.start_time > first - duration, Show.start_time < last + duration)
+        ).all()
+
+        self.availability = AvailabilityIndex(windows)
+        self.venue_shows = IntervalIndex(
+            [show.start_time for show in shows if show.venue_id == venue_id], duration)
+        self.artist_shows = IntervalIndex(
+            [show.start_time for show in shows if show.artist_id == artist_id], duration)
+
+    def problems(self, start_time):
+        """Same checks as ``schedule_problems``, without a query."""
+        return _problem_messages(
+            self.availability.available(local(start_time, self.timezone)),
+            self.venue_shows.overlapping(start_time),
+            self.artist_shows.overlapping(start_time),
+            self.timezone
+        )
+
+    def book(self, start_time):
+        """Record a show accepted in this batch, so later ones are checked against it."""
+        self.venue_shows.add(start_time)
+        self.artist_shows.add(start_time)
+
+
+#----------------------------------------------------------------------------#
+# Recurring shows.
+#----------------------------------------------------------------------------#
+
+def _insert_shows(artist_id, venue_id, start_times):
+    table = Show.__table__
+    if db.engine.dialect.name == 'postgresql':
+        # One INSERT whatever the batch size: the start times travel as a
+        # single array parameter instead of being compiled into VALUES rows
+        start_times = bindparam('start_times', start_times,
+                                type_=postgresql.ARRAY(db.DateTime(timezone=True)))
+        db.session.execute(table.insert().from_select(
+            ['artist_id', 'venue_id', 'start_time'],
+            select(literal(artist_id), literal(venue_id), func.unnest(start_times))
+        ))
+    else:
+        db.session.execute(table.insert(), [{
+            'artist_id': artist_id,
+            'venue_id': venue_id,
+            'start_time': start_time,
+        } for start_time in start_times])
+
+
+def book_recurring(artist_id, venue_id, occurrences, skip_conflicts=False, timezone=None):
+    """Book a show at each of ``occurrences`` (sorted start times) in the
+    current transaction; ``timezone`` is the venue's.
+
+    Every occurrence is checked against one ``Schedule`` loaded for the
+    whole range, including the occurrences booked before it, and the
+    accepted ones are written with a single INSERT on Postgres (one
+    executemany elsewhere). Unless
+    ``skip_conflicts`` is set, nothing is booked when any occurrence has a
+    problem. Returns the booked start times and a list of
+    (start time, problems) for the rejected ones.
+    """
+    schedule = Schedule(artist_id, venue_id, occurrences[0], occurrences[-1], timezone=timezone)
+    booked = []
+    conflicts = []
+    for start_time in occurrences:
+        problems = schedule.problems(start_time)
+        if problems:
+            conflicts.append((start_time, problems))
+        else:
+            schedule.book(start_time)
+            booked.append(start_time)
+
+    if conflicts and not skip_conflicts:
+        return [], conflicts
+    if booked:
+        _insert_shows(artist_id, venue_id, booked)
+        # The bulk insert bypasses the counter events
+        recount(Venue, [venue_id])
+        recount(Artist, [artist_id])
+    return booked, conflicts
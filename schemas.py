@@ -0,0 +1,72 @@
+#----------------------------------------------------------------------------#
+# Schemas.
+#
+# The serialized fields of each model come from its table's columns, plus
+# optional related fields reached through a join (a show's venue_name).
+# The same schema dumps an ORM object for the HTML views and turns a sparse
+# fieldset (?fields=id,name) into a SELECT of just those columns, joining
+# only the tables the requested related fields live in.
+#----------------------------------------------------------------------------#
+
+from database import db
+from models import Venue, Artist, Show, ArtistAvailability
+
+
+class Schema:
+
+    def __init__(self, model, related=None):
+        self.model = model
+        self.columns = {column.key: getattr(model, column.key) for column in model.__table__.columns}
+        # field -> (column, joined model, join condition)
+        self.related = related or {}
+        self.fields = list(self.columns) + list(self.related)
+
+    def dump(self, obj, fields=None):
+        """The fields of an ORM object or a row as a dict of plain values."""
+        return {field: getattr(obj, field) for field in fields or self.columns}
+
+    def parse_fields(self, value):
+        """Fields named in a comma separated ``value``, or every column when
+        it is empty. The id is always included. Raises ValueError for
+        unknown fields."""
+        if not value:
+            return list(self.columns)
+        fields = ['id'] + [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in self.columns and field not in self.related]
+        if unknown:
+            raise ValueError(f"Unknown field(s) {', '.join(unknown)}; "
+                             f"{self.model.__tablename__} has {', '.join(self.fields)}")
+        return list(dict.fromkeys(fields))
+
+    def query(self, fields):
+        """A query selecting only ``fields``, each labelled with its name."""
+        query = db.session.query(*[
+            self.columns[field].label(field) if field in self.columns else self.related[field][0].label(field)
+            for field in fields
+        ]).select_from(self.model)
+        joined = []
+        for field in fields:
+            if field in self.related and self.related[field][1] not in joined:
+                column, target, onclause = self.related[field]
+                query = query.join(target, onclause)
+                joined.append(target)
+        return query
+
+
+venue_schema = Schema(Venue)
+artist_schema = Schema(Artist)
+availability_schema = Schema(ArtistAvailability)
+show_schema = Schema(Show, related={
+    'venue_name': (Venue.name, Venue, Show.venue_id == Venue.id),
+    'venue_image_link': (Venue.image_link, Venue, Show.venue_id == Venue.id),
+    'venue_timezone': (Venue.timezone, Venue, Show.venue_id == Venue.id),
+    'artist_name': (Artist.name, Artist, Show.artist_id == Artist.id),
+    'artist_image_link': (Artist.image_link, Artist, Show.artist_id == Artist.id),
+})
+
+SCHEMAS = {
+    Venue: venue_schema,
+    Artist: artist_schema,
+    Show: show_schema,
+    ArtistAvailability: availability_schema,
+}
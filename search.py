@@ -0,0 +1,369 @@
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event, func, or_
+
+from clock import is_upcoming, request_now
+from database import db
+from forms import GENRES_CHOICES
+from models import Venue, Artist, Show, SHOW_FOREIGN_KEYS
+
+GENRES_BY_NAME = {value.lower(): value for value, label in GENRES_CHOICES}
+
+
+def search_results(model, search_term, limit, offset=0):
+    """Search ``model`` by name, city and genre and return the ``results``
+    structure used by the search templates, best matches first.
+
+    On Postgres, matching and ranking run against the pg_trgm indexes in one
+    query. Other databases use an in-process n-gram index (see
+    ``NgramIndex``). Upcoming show counts come from the maintained counters.
+    """
+    search_term = search_term.strip()
+
+    if search_backend() == 'trigram':
+        return _trigram_search(model, search_term, limit, offset)
+    return _ngram_search(model, search_term, limit, offset)
+
+
+def search_backend():
+    backend = current_app.config['SEARCH_BACKEND']
+    if backend == 'auto':
+        return 'trigram' if db.engine.dialect.name == 'postgresql' else 'ngram'
+    return backend
+
+
+def _results_query(model, *columns):
+    return db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows'),
+        *columns
+    )
+
+
+def _result(rows, total):
+    return {
+        "count": total,
+        "data": [{
+            "id": row.id,
+            "name": row.name,
+            "num_upcoming_shows": row.num_upcoming_shows,
+        } for row in rows]
+    }
+
+
+def _trigram_search(model, search_term, limit, offset):
+    pattern = f'%{search_term}%'
+    matches = [model.name.ilike(pattern), model.city.ilike(pattern)]
+    genre = GENRES_BY_NAME.get(search_term.lower())
+    if genre:
+        matches.append(model.genres.contains([genre]))
+
+    rank = func.greatest(
+        func.similarity(model.name, search_term),
+        func.similarity(model.city, search_term)
+    )
+    # The window count is taken before the page is cut, so any row of the
+    # page carries the total. A page past the last match has no rows to
+    # carry it, so the matches are counted on their own.
+    rows = _results_query(
+        model, func.count().over().label('total')
+    ).filter(
+        or_(*matches)
+    ).order_by(
+        rank.desc(), model.name, model.id
+    ).limit(limit).offset(offset).all()
+    if rows:
+        total = rows[0].total
+    elif offset:
+        total = db.session.query(func.count(model.id)).filter(or_(*matches)).scalar()
+    else:
+        total = 0
+
+    return _result(rows, total)
+
+
+def _ngram_search(model, search_term, limit, offset):
+    ids = ngram_index(model).search(search_term)
+    page = ids[offset:offset + limit]
+    if not page:
+        return _result([], len(ids))
+
+    rows = _results_query(model).filter(model.id.in_(page)).all()
+    position = {id: i for i, id in enumerate(page)}
+    rows.sort(key=lambda row: position[row.id])
+    return _result(rows, len(ids))
+
+
+#----------------------------------------------------------------------------#
+# In-process n-gram index.
+#----------------------------------------------------------------------------#
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(text):
+    # pg_trgm pads every word with two leading spaces and one trailing space
+    return set().union(*(trigrams(f'  {word} ') for word in text.split()))
+
+
+def similarity(grams_a, grams_b):
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class NgramIndex:
+    """Trigram inverted index over the name, city and genres of each row.
+
+    A search keeps only the rows containing every trigram of the term, checks
+    them for the substring itself and ranks them like the Postgres path.
+    """
+
+    def __init__(self, rows):
+        self.documents = {}
+        self.postings = {}
+        for id, name, city, genres in rows:
+            fields = [(name or '').lower(), (city or '').lower()]
+            fields += [genre.lower() for genre in genres or []]
+            self.documents[id] = (name or '', fields, word_trigrams(fields[0]), word_trigrams(fields[1]))
+            for field in fields:
+                for gram in trigrams(field):
+                    self.postings.setdefault(gram, set()).add(id)
+
+    def search(self, search_term):
+        term = search_term.lower()
+        grams = trigrams(term)
+        if grams:
+            postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = self.documents.keys()
+
+        term_grams = word_trigrams(term)
+        matches = []
+        for id in candidates:
+            name, fields, name_grams, city_grams = self.documents[id]
+            if any(term in field for field in fields):
+                rank = max(similarity(name_grams, term_grams), similarity(city_grams, term_grams))
+                matches.append((-rank, name, id))
+        matches.sort()
+        return [id for rank, name, id in matches]
+
+
+_ngram_indexes = {}
+
+
+def ngram_index(model):
+    if model not in _ngram_indexes:
+        rows = db.session.query(model.id, model.name, model.city, model.genres)
+        _ngram_indexes[model] = NgramIndex(rows)
+    return _ngram_indexes[model]
+
+
+def _discard_ngram_index(mapper, connection, target):
+    _ngram_indexes.pop(type(target), None)
+
+
+for _model in SHOW_FOREIGN_KEYS:
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _discard_ngram_index)
+
+
+#----------------------------------------------------------------------------#
+# Typeahead.
+#----------------------------------------------------------------------------#
+
+def word_suffixes(text):
+    # 'The Musical Hop' -> 'the musical hop', 'musical hop', 'hop'
+    words = text.lower().split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted prefix keys over venues and artists.
+
+    Every entity is indexed under each word suffix of its name, its city,
+    "city, state" and its genres, so a prefix lookup is a bisect into one
+    sorted list. Answers for hot prefixes are kept in a small LRU.
+    """
+
+    def __init__(self, entries, cache_size=1024, max_matches=1000):
+        self.entries = []
+        keys = {}
+        for entry, texts in entries:
+            position = len(self.entries)
+            self.entries.append(entry)
+            for text in texts:
+                for key in word_suffixes(text):
+                    keys.setdefault(entry['type'], []).append((key, position))
+        # One sorted key list per entity type, so filtering by type never
+        # scans the keys of the other types
+        self.keys = {}
+        for type, type_keys in keys.items():
+            type_keys.sort()
+            self.keys[type] = ([key for key, position in type_keys],
+                               [position for key, position in type_keys])
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.cache_size = cache_size
+        self.max_matches = max_matches
+        self.built_at = time.monotonic()
+
+    def _scan(self, type, prefix):
+        keys, positions = self.keys[type]
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            yield keys[i], positions[i]
+
+    def _matches(self, prefix, types):
+        cache_key = (prefix, types)
+        with self.cache_lock:
+            if cache_key in self.cache:
+                self.cache.move_to_end(cache_key)
+                return self.cache[cache_key]
+
+        matches = []
+        seen = set()
+        scans = [self._scan(type, prefix) for type in self.keys if not types or type in types]
+        for key, position in heapq.merge(*scans):
+            if position in seen:
+                continue
+            seen.add(position)
+            matches.append(position)
+            if len(matches) == self.max_matches:
+                break
+
+        with self.cache_lock:
+            self.cache[cache_key] = matches
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return matches
+
+    def search(self, query, types=frozenset(), limit=10, offset=0):
+        prefix = ' '.join(query.lower().split())
+        if not prefix:
+            return [], None
+        matches = self._matches(prefix, frozenset(types))
+        page = [self.entries[p] for p in matches[offset:offset + limit]]
+        next_offset = offset + limit if len(matches) > offset + limit else None
+        return page, next_offset
+
+
+def _typeahead_entries():
+    for venue in db.session.query(Venue.id, Venue.name, Venue.city, Venue.state, Venue.genres):
+        yield {
+            "type": "venue",
+            "id": venue.id,
+            "name": venue.name,
+            "city": venue.city,
+            "state": venue.state,
+        }, [venue.name or '', venue.city, f'{venue.city}, {venue.state}', *(venue.genres or [])]
+
+    for artist in db.session.query(Artist.id, Artist.name, Artist.city, Artist.state, Artist.genres):
+        yield {
+            "type": "artist",
+            "id": artist.id,
+            "name": artist.name,
+            "city": artist.city,
+            "state": artist.state,
+        }, [artist.name, artist.city, f'{artist.city}, {artist.state}', *(artist.genres or [])]
+
+
+def upcoming_shows_for(results, limit, now=None):
+    """Next upcoming shows of the venues and artists in a typeahead page.
+
+    Shows change with time and are far more numerous than venues and
+    artists, so they are looked up per page rather than indexed.
+    """
+    if now is None:
+        now = request_now()
+    venue_ids = [result['id'] for result in results if result['type'] == 'venue']
+    artist_ids = [result['id'] for result in results if result['type'] == 'artist']
+    if not venue_ids and not artist_ids:
+        return []
+
+    shows = db.session.query(
+        Show.id, Show.start_time, Venue.id, Venue.name, Artist.id, Artist.name
+    ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id).filter(
+        or_(Show.venue_id.in_(venue_ids), Show.artist_id.in_(artist_ids)),
+        is_upcoming(Show.start_time, now)
+    ).order_by(Show.start_time, Show.id).limit(limit)
+
+    return [{
+        "type": "show",
+        "id": show_id,
+        "start_time": start_time.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "venue_id": venue_id,
+        "venue_name": venue_name,
+        "artist_id": artist_id,
+        "artist_name": artist_name,
+    } for show_id, start_time, venue_id, venue_name, artist_id, artist_name in shows]
+
+
+_prefix_index = None
+_prefix_index_stale = False
+_prefix_index_rebuilding = threading.Lock()
+
+
+def _build_prefix_index(app):
+    global _prefix_index, _prefix_index_stale
+    with app.app_context():
+        try:
+            _prefix_index_stale = False
+            _prefix_index = PrefixIndex(
+                _typeahead_entries(),
+                cache_size=app.config['TYPEAHEAD_CACHE_SIZE']
+            )
+        finally:
+            db.session.remove()
+            _prefix_index_rebuilding.release()
+
+
+def prefix_index():
+    """The typeahead index.
+
+    The first call builds it; after a write, or once it is older than
+    ``TYPEAHEAD_INDEX_TTL`` seconds (to pick up other workers' writes), it is
+    rebuilt in a background thread while the current one keeps serving.
+    """
+    app = current_app._get_current_object()
+    if _prefix_index is None:
+        _prefix_index_rebuilding.acquire()
+        if _prefix_index is None:
+            _build_prefix_index(app)
+        else:
+            _prefix_index_rebuilding.release()
+    elif _prefix_index_stale or time.monotonic() - _prefix_index.built_at > app.config['TYPEAHEAD_INDEX_TTL']:
+        if _prefix_index_rebuilding.acquire(blocking=False):
+            threading.Thread(target=_build_prefix_index, args=(app,), daemon=True).start()
+    return _prefix_index
+
+
+def _mark_prefix_index_stale(mapper, connection, target):
+    global _prefix_index_stale
+    _prefix_index_stale = True
+
+
+for _model in (Venue, Artist):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_prefix_index_stale)
+
+
+def entities_changed(model):
+    """Drop what the search indexes hold for ``model`` after a write that
+    bypassed the mapper events (a Core INSERT or UPDATE)."""
+    global _prefix_index_stale
+    _ngram_indexes.pop(model, None)
+    _prefix_index_stale = True
@@ -0,0 +1,208 @@
+#----------------------------------------------------------------------------#
+# Shows: the /shows listing and booking single and recurring shows.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from itertools import islice
+
+from flask import Blueprint, current_app, flash, jsonify, render_template, request
+
+from cache import response_cache
+from clock import localize
+from database import db
+from forms import ShowForm
+from listings import shows_page
+from models import Show
+from pages import shows_listing_args
+from scheduling import lock_schedules, schedule_problems, book_recurring
+
+show_views = Blueprint('shows', __name__)
+
+#  Shows
+#  ----------------------------------------------------------------
+
+@show_views.route('/shows')
+def shows():
+    # TODO: replace with real venues data.
+    # data=[{
+    #     "venue_id": 1,
+    #     "venue_name": "The Musical Hop",
+    #     "artist_id": 4,
+    #     "artist_name": "Guns N Petals",
+    #     "artist_image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80",
+    #     "start_time": "2019-05-21T21:30:00.000Z"
+    # }, {
+    #     "venue_id": 3,
+    #     "venue_name": "Park Square Live Music & Coffee",
+    #     "artist_id": 5,
+    #     "artist_name": "Matt Quevedo",
+    #     "artist_image_link": "https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80",
+    #     "start_time": "2019-06-15T23:00:00.000Z"
+    # }, {
+    #     "venue_id": 3,
+    #     "venue_name": "Park Square Live Music & Coffee",
+    #     "artist_id": 6,
+    #     "artist_name": "The Wild Sax Band",
+    #     "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #     "start_time": "2035-04-01T20:00:00.000Z"
+    # }, {
+    #     "venue_id": 3,
+    #     "venue_name": "Park Square Live Music & Coffee",
+    #     "artist_id": 6,
+    #     "artist_name": "The Wild Sax Band",
+    #     "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #     "start_time": "2035-04-08T20:00:00.000Z"
+    # }, {
+    #     "venue_id": 3,
+    #     "venue_name": "Park Square Live Music & Coffee",
+    #     "artist_id": 6,
+    #     "artist_name": "The Wild Sax Band",
+    #     "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #     "start_time": "2035-04-15T20:00:00.000Z"
+    # }]
+
+    # displays list of shows at /shows, one keyset page at a time
+    limit, after, start, end = shows_listing_args()
+
+    data = []
+    next_cursor = None
+    try:
+        data, next_cursor = response_cache.cached(
+            'shows', repr((limit, after, start, end)), ('shows',),
+            lambda: shows_page(limit, after, start, end)
+        )
+    except Exception:
+        current_app.logger.exception('Error loading shows')
+        db.session.rollback()
+        flash('An error occurred loading shows.')
+    finally:
+        db.session.close()
+    return render_template('pages/shows.html', shows=data, next_cursor=next_cursor,
+                           start=request.args.get('from', ''), end=request.args.get('to', ''))
+
+@show_views.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@show_views.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    # called to create new shows in the db, upon submitting new show listing form
+    # TODO: insert form data as a new Show record in the db, instead
+    
+    form = ShowForm()
+    if not form.validate():
+        # If form validation fails, flash the errors and return
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/new_show.html', form=form)
+    
+    error = False
+    
+        # Create new show using form data attributes
+    try:
+        # Check the artist's availability and double bookings of the venue
+        # or the artist in one query, holding both schedules until commit.
+        # The form's time is the venue's local time.
+        try:
+            timezone = lock_schedules(form.artist_id.data, form.venue_id.data)
+        except LookupError as e:
+            db.session.rollback()
+            flash(f'Show cannot be scheduled. {e}')
+            return render_template('forms/new_show.html', form=form)
+        show_datetime = localize(form.start_time.data, timezone)
+        problems = schedule_problems(form.artist_id.data, form.venue_id.data, show_datetime,
+                                     timezone=timezone)
+        
+        if problems:
+            db.session.rollback()
+            for problem in problems:
+                flash(f'Show cannot be scheduled. {problem}')
+            return render_template('forms/new_show.html', form=form)
+        
+        # If available, create the show
+        show = Show(
+            artist_id=form.artist_id.data,
+            venue_id=form.venue_id.data,
+            start_time=show_datetime
+        )
+        
+        # Add and commit the new show
+        db.session.add(show)
+        db.session.commit()
+        # The venue listing shows upcoming show counts
+        response_cache.invalidate('shows', 'venues', f'venue:{form.venue_id.data}',
+                                  f'artist:{form.artist_id.data}')
+        
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error creating show')
+    finally:
+        db.session.close()
+
+    if error:
+        # TODO: on unsuccessful db insert, flash an error instead.
+        # e.g., flash('An error occurred. Show could not be listed.')
+        # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+        flash('An error occurred. Show could not be listed.')
+    else:
+        # on successful db insert, flash success
+        flash('Show was successfully listed!')
+
+    return render_template('pages/home.html')
+
+@show_views.route('/shows/recurring', methods=['POST'])
+def create_recurring_shows():
+    # Books a residency from a JSON body like
+    #   {"artist_id": 4, "venue_id": 1, "start_time": "2035-01-05T20:00:00",
+    #    "rule": "FREQ=WEEKLY;BYDAY=FR;COUNT=52", "skip_conflicts": false}
+    # where rule is an RFC 5545 recurrence rule and start_time is in the
+    # venue's time zone unless it has an offset. Occurrences with problems are
+    # reported one by one; unless skip_conflicts is set, none are booked then.
+    # dateutil is only needed here, so workers don't import it at startup
+    from dateutil.rrule import rrulestr
+
+    payload = request.get_json(silent=True) or {}
+    max_shows = current_app.config['RECURRING_SHOWS_MAX']
+    try:
+        artist_id = int(payload['artist_id'])
+        venue_id = int(payload['venue_id'])
+        rule = rrulestr(payload['rule'], dtstart=datetime.fromisoformat(payload['start_time']))
+        occurrences = list(islice(rule, max_shows + 1))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': f'Invalid recurring show request: {e}'}), 400
+    if not occurrences or len(occurrences) > max_shows:
+        return jsonify({'success': False, 'error': f'The rule must produce 1 to {max_shows} shows.'}), 400
+
+    try:
+        try:
+            timezone = lock_schedules(artist_id, venue_id)
+        except LookupError as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 404
+        # Times without an offset are the venue's local time, so a weekly
+        # 8pm show stays at 8pm across daylight saving changes
+        occurrences = [localize(occurrence, timezone) for occurrence in occurrences]
+        booked, conflicts = book_recurring(artist_id, venue_id, occurrences, timezone=timezone,
+                                           skip_conflicts=bool(payload.get('skip_conflicts')))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.close()
+
+    if booked:
+        response_cache.invalidate('shows', 'venues', f'venue:{venue_id}', f'artist:{artist_id}')
+    return jsonify({
+        'success': bool(booked),
+        'requested': len(occurrences),
+        'booked': [start_time.isoformat() for start_time in booked],
+        'conflicts': [{
+            'start_time': start_time.isoformat(),
+            'problems': problems,
+        } for start_time, problems in conflicts],
+    }), 201 if booked else 409
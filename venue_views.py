@@ -0,0 +1,377 @@
+#----------------------------------------------------------------------------#
+# Venue pages: the listing, search, the venue page and the create, edit and
+# delete forms.
+#----------------------------------------------------------------------------#
+
+from flask import (Blueprint, Response, abort, current_app, flash, jsonify, make_response,
+                   redirect, render_template, request, url_for)
+
+from cache import response_cache
+from counters import forget_venue_shows
+from database import db, reads_primary, reads_replica
+from forms import VenueForm
+from listings import venue_areas, entity_detail, entity_version, touch_counterparts
+from models import Venue, Artist, Show
+from pages import (show_pages, detail_cache_key, page_validators, not_modified,
+                   with_validators, search_page)
+from schemas import venue_schema
+from search import search_results
+from writes import COUNTERPART_COLUMNS, create_venue, form_fields, update_entity
+
+venue_views = Blueprint('venues', __name__)
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@venue_views.route('/venues')
+def venues():
+    # TODO: replace with real venues data.
+    #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
+    # data=[{
+    #   "city": "San Francisco",
+    #   "state": "CA",
+    #   "venues": [{
+    #     "id": 1,
+    #     "name": "The Musical Hop",
+    #     "num_upcoming_shows": 0,
+    #   }, {
+    #     "id": 3,
+    #     "name": "Park Square Live Music & Coffee",
+    #     "num_upcoming_shows": 1,
+    #   }]
+    # }, {
+    #   "city": "New York",
+    #   "state": "NY",
+    #   "venues": [{
+    #     "id": 2,
+    #     "name": "The Dueling Pianos Bar",
+    #     "num_upcoming_shows": 0,
+    #   }]
+    # }]
+    data = []
+    try:
+        # Group venues by city/state with their upcoming show counts in one query
+        data = response_cache.cached('venues', '', ('venues',), venue_areas)
+    except Exception:
+        current_app.logger.exception('Error loading venues')
+        db.session.rollback()
+        flash('An error occurred. Could not load venues.')
+    finally:
+        db.session.close()
+    return render_template('pages/venues.html', areas=data)
+
+@venue_views.route('/venues/search', methods=['POST'])
+@reads_replica
+def search_venues():
+    # TODO: implement search on venues with partial string search. Ensure it is case-insensitive.
+    # seach for Hop should return "The Musical Hop".
+    # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+    
+    # Original response data for reference:
+    # response={
+    #     "count": 1,
+    #     "data": [{
+    #         "id": 2,
+    #         "name": "The Dueling Pianos Bar",
+    #         "num_upcoming_shows": 0,
+    #     }]
+    # }
+
+    if not request.form:
+        flash('No form data received')
+        return redirect(url_for('venues.venues'))
+
+    search_term = request.form.get('search_term', '')
+    limit, offset = search_page()
+
+    # Matches and their upcoming show counts come back from a single query
+    response = search_results(Venue, search_term, limit, offset)
+    
+    return render_template('pages/search_venues.html', 
+                         results=response, 
+                         search_term=search_term)
+
+@venue_views.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+    # shows the venue page with the given venue_id
+    # TODO: replace with real venue data from the venues table, using venue_id
+    
+    # Original mock data for reference:
+    # data1={
+      # "id": 1,
+      # "name": "The Musical Hop",
+      # "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
+      # "address": "1015 Folsom Street",
+      # "city": "San Francisco",
+      # "state": "CA",
+      # "phone": "123-123-1234",
+      # "website": "https://www.themusicalhop.com",
+      # "facebook_link": "https://www.facebook.com/TheMusicalHop",
+      # "seeking_talent": True,
+      # "seeking_description": "We are on the lookout for a local artist to play every two weeks. Please call us.",
+      # "image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60",
+      # "past_shows": [{
+        # "artist_id": 4,
+        # "artist_name": "Guns N Petals",
+        # "artist_image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80",
+        # "start_time": "2019-05-21T21:30:00.000Z"
+      # }],
+      # "upcoming_shows": [],
+      # "past_shows_count": 1,
+      # "upcoming_shows_count": 0,
+    # }
+    # data2={
+      # "id": 2,
+      # "name": "The Dueling Pianos Bar",
+      # "genres": ["Classical", "R&B", "Hip-Hop"],
+      # "address": "335 Delancey Street",
+      # "city": "New York",
+      # "state": "NY",
+      # "phone": "914-003-1132",
+      # "website": "https://www.theduelingpianos.com",
+      # "facebook_link": "https://www.facebook.com/theduelingpianos",
+      # "seeking_talent": False,
+      # "image_link": "https://images.unsplash.com/photo-1497032205916-ac775f0649ae?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=750&q=80",
+      # "past_shows": [],
+      # "upcoming_shows": [],
+      # "past_shows_count": 0,
+      # "upcoming_shows_count": 0,
+    # }
+    # data3={
+      # "id": 3,
+      # "name": "Park Square Live Music & Coffee",
+      # "genres": ["Rock n Roll", "Jazz", "Classical", "Folk"],
+      # "address": "34 Whiskey Moore Ave",
+      # "city": "San Francisco",
+      # "state": "CA",
+      # "phone": "415-000-1234",
+      # "website": "https://www.parksquarelivemusicandcoffee.com",
+      # "facebook_link": "https://www.facebook.com/ParkSquareLiveMusicAndCoffee",
+      # "seeking_talent": False,
+      # "image_link": "https://images.unsplash.com/photo-1485686531765-ba63b07845a7?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=747&q=80",
+      # "past_shows": [{
+        # "artist_id": 5,
+        # "artist_name": "Matt Quevedo",
+        # "artist_image_link": "https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80",
+        # "start_time": "2019-06-15T23:00:00.000Z"
+      # }],
+      # "upcoming_shows": [{
+        # "artist_id": 6,
+        # "artist_name": "The Wild Sax Band",
+        # "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+        # "start_time": "2035-04-01T20:00:00.000Z"
+      # }, {
+        # "artist_id": 6,
+        # "artist_name": "The Wild Sax Band",
+        # "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+        # "start_time": "2035-04-08T20:00:00.000Z"
+      # }, {
+        # "artist_id": 6,
+        # "artist_name": "The Wild Sax Band",
+        # "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+        # "start_time": "2035-04-15T20:00:00.000Z"
+      # }],
+      # "past_shows_count": 1,
+      # "upcoming_shows_count": 1,
+    # }
+    # data = list(filter(lambda d: d['id'] == venue_id, [data1, data2, data3]))[0]
+    
+    # Answer repeat requests with 304 before loading any shows
+    etag, last_modified = page_validators(Venue, venue_id, entity_version(Venue, venue_id))
+    if not_modified(etag, last_modified):
+        return with_validators(Response(status=304), etag, last_modified)
+
+    # Venue, its show counts and one page each of past and upcoming shows
+    pages = show_pages()
+    data = response_cache.cached(
+        'venue', detail_cache_key(venue_id, pages),
+        (f'venue:{venue_id}', 'venue'),
+        lambda: entity_detail(Venue, venue_id, Artist, **pages)
+    )
+    if data is None:
+        abort(404)
+    
+    response = make_response(render_template('pages/show_venue.html', venue=data))
+    return with_validators(response, etag, last_modified)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@venue_views.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@venue_views.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    # TODO: insert form data as a new Venue record in the db, instead
+    # TODO: modify data to be the data object returned from db insertion
+
+    form = VenueForm()
+
+    if not form.validate():
+        # If form validation fails, flash the errors and return
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/new_venue.html', form=form)
+    
+    error = False
+    
+    try:
+        # One INSERT ... RETURNING id (see writes.py)
+        venue_id = create_venue(form_fields(Venue, form))
+        db.session.commit()
+        response_cache.invalidate('venues', f'venue:{venue_id}')
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error creating venue')
+    finally:
+        db.session.close()
+
+    if error:
+        # TODO: on unsuccessful db insert, flash an error instead.
+        # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+        flash('An error occurred. Venue ' + form.name.data + ' could not be listed.')
+    else:
+        # on successful db insert, flash success
+        flash('Venue ' + form.name.data + ' was successfully listed!')
+
+    return render_template('pages/home.html')
+
+@venue_views.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    # TODO: Complete this endpoint for taking a venue_id, and using
+    # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+
+    # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+    # clicking that button delete it from the db then redirect the user to the homepage
+    
+    error = False
+    try:
+        # Find the venue by ID
+        venue = Venue.query.get(venue_id)
+        
+        if venue:
+            # Delete associated shows first, taking them off their artists' counters
+            forget_venue_shows(venue_id)
+            Show.query.filter_by(venue_id=venue_id).delete()
+            
+            # Delete the venue
+            db.session.delete(venue)
+            db.session.commit()
+            # Its artists' pages listed its shows
+            response_cache.invalidate('venues', f'venue:{venue_id}', 'artist', 'shows')
+        else:
+            error = True
+            
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error deleting venue')
+    finally:
+        db.session.close()
+    
+    if error:
+        flash(f'An error occurred deleting venue {venue_id}')
+        return jsonify({'success': False})
+    else:
+        flash(f'Venue {venue_id} was successfully deleted!')
+        return jsonify({'success': True})
+
+#  Update
+#  ----------------------------------------------------------------
+
+@venue_views.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@reads_primary
+def edit_venue(venue_id):
+    form = VenueForm()
+    
+    # Original mock data for reference:
+    # venue={
+    #   "id": 1,
+    #   "name": "The Musical Hop",
+    #   "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
+    #   "address": "1015 Folsom Street",
+    #   "city": "San Francisco",
+    #   "state": "CA",
+    #   "phone": "123-123-1234",
+    #   "website": "https://www.themusicalhop.com",
+    #   "facebook_link": "https://www.facebook.com/TheMusicalHop",
+    #   "seeking_talent": True,
+    #   "seeking_description": "We are on the lookout for a local artist to play every two weeks. Please call us.",
+    #   "image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60"
+    # }
+    
+    try:
+        # Query the venue
+        venue_data = Venue.query.get_or_404(venue_id)
+        
+        # Populate form with existing venue data
+        form.name.data = venue_data.name
+        form.genres.data = venue_data.genres
+        form.address.data = venue_data.address
+        form.city.data = venue_data.city
+        form.state.data = venue_data.state
+        form.phone.data = venue_data.phone
+        form.website.data = venue_data.website
+        form.facebook_link.data = venue_data.facebook_link
+        form.seeking_talent.data = venue_data.seeking_talent
+        form.seeking_description.data = venue_data.seeking_description
+        form.image_link.data = venue_data.image_link
+        
+        # Format venue data for the template
+        venue = venue_schema.dump(venue_data)
+        
+    except Exception:
+        current_app.logger.exception('Error loading venue')
+        db.session.rollback()
+        flash('An error occurred. Could not load venue.')
+    finally:
+        db.session.close()
+        
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@venue_views.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    # TODO: take values from the form submitted, and update existing
+    # venue record with ID <venue_id> using the new attributes
+    
+    form = VenueForm()
+
+    if not form.validate():
+        # If form validation fails, flash the errors and return
+        for field, errors in form.errors.items():
+            for error in errors:
+                flash(f'Error in {field}: {error}')
+        return render_template('forms/edit_venue.html', form=form)
+    
+    error = False
+    
+    try:
+        # Updates only the columns that changed, if any (see writes.py)
+        changed = update_entity(Venue, venue_id, form_fields(Venue, form))
+        if changed is not None:
+            if COUNTERPART_COLUMNS[Venue] & changed.keys():
+                # Artist pages list the venue's name, image and time zone
+                touch_counterparts(Venue, venue_id)
+            db.session.commit()
+            if changed:
+                # Artist pages and the show listing carry venue names, the
+                # venue listing its city and state
+                response_cache.invalidate('venues', f'venue:{venue_id}', 'artist', 'shows')
+            flash(f'Venue {form.name.data} was successfully updated!')
+        else:
+            error = True
+            flash(f'Venue {venue_id} not found.')
+            
+    except Exception:
+        error = True
+        db.session.rollback()
+        current_app.logger.exception('Error updating venue')
+        flash(f'An error occurred. Venue {form.name.data} could not be updated.')
+    finally:
+        db.session.close()
+    
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
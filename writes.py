@@ -0,0 +1,180 @@
+#----------------------------------------------------------------------------#
+# Write path of the create and edit forms.
+#
+# Each write is a fixed, small number of statements whatever the form holds:
+#
+#   - creating a venue is one INSERT ... RETURNING id; creating an artist on
+#     Postgres is one statement, the artist INSERT ... RETURNING id as a CTE
+#     that the INSERT of its availability windows selects from (an INSERT
+#     and one executemany elsewhere);
+#   - editing reads the form's columns of the row (locking it) and sends one
+#     UPDATE of only the columns that changed, or none when nothing did;
+#   - availability edits keep the windows that stay, and delete and insert
+#     the others with one statement on Postgres (three elsewhere).
+#
+# The statements run in the current session's transaction; callers commit.
+# Core statements skip the mapper events that keep the search indexes
+# current, so each write tells search.py itself.
+#----------------------------------------------------------------------------#
+
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql
+
+from clock import state_timezone
+from database import db
+from models import Venue, Artist, ArtistAvailability
+from search import entities_changed
+
+# The columns the create and edit forms fill in
+FORM_COLUMNS = {
+    Venue: ('name', 'city', 'state', 'address', 'phone', 'genres', 'facebook_link', 'image_link',
+            'website', 'seeking_talent', 'seeking_description'),
+    Artist: ('name', 'city', 'state', 'phone', 'genres', 'facebook_link', 'image_link',
+             'website', 'seeking_venue', 'seeking_description'),
+}
+# The columns of a venue or artist that the other side's pages show
+COUNTERPART_COLUMNS = {
+    Venue: frozenset({'name', 'image_link', 'timezone'}),
+    Artist: frozenset({'name', 'image_link'}),
+}
+
+
+def form_fields(model, form):
+    """The column values a venue or artist form holds."""
+    return {column: getattr(form, column).data for column in FORM_COLUMNS[model]}
+
+
+def availability_windows(form):
+    """The distinct (day_of_week, start_time, end_time) windows of an artist
+    form, sorted."""
+    return sorted({(window['day_of_week'], window['start_time'], window['end_time'])
+                   for window in form.availabilities.data})
+
+
+#----------------------------------------------------------------------------#
+# Postgres statements. Availability windows travel as three array
+# parameters, so each statement is the same whatever their number and is
+# built once.
+#----------------------------------------------------------------------------#
+
+_availability = ArtistAvailability.__table__
+_window_columns = (_availability.c.day_of_week, _availability.c.start_time, _availability.c.end_time)
+
+
+def _unnest_windows():
+    # One row per window when selected together
+    return (func.unnest(bindparam('days', type_=postgresql.ARRAY(db.Integer))).label('day_of_week'),
+            func.unnest(bindparam('starts', type_=postgresql.ARRAY(db.Time))).label('start_time'),
+            func.unnest(bindparam('ends', type_=postgresql.ARRAY(db.Time))).label('end_time'))
+
+
+def _window_params(windows):
+    days, starts, ends = zip(*windows)
+    return {'days': list(days), 'starts': list(starts), 'ends': list(ends)}
+
+
+def _replace_availabilities_statement():
+    # Counts the deleted and inserted rows. Both statements see the windows
+    # as they were before either ran.
+    wanted = select(*_unnest_windows()).cte('wanted')
+    artist_id = bindparam('artist_id', type_=db.Integer)
+    deleted = delete(_availability).where(
+        _availability.c.artist_id == artist_id,
+        tuple_(*_window_columns).not_in(select(*wanted.c))
+    ).returning(_availability.c.id).cte('deleted')
+    inserted = _availability.insert().from_select(
+        ['artist_id', 'day_of_week', 'start_time', 'end_time'],
+        select(artist_id, *wanted.c).where(tuple_(*wanted.c).not_in(
+            select(*_window_columns).where(_availability.c.artist_id == artist_id)))
+    ).returning(_availability.c.id).cte('inserted')
+    return select(select(func.count()).select_from(deleted).scalar_subquery()
+                  + select(func.count()).select_from(inserted).scalar_subquery())
+
+
+_REPLACE_AVAILABILITIES = _replace_availabilities_statement()
+
+
+#----------------------------------------------------------------------------#
+# Writes.
+#----------------------------------------------------------------------------#
+
+
+def create_venue(fields):
+    """Insert a venue; returns its id."""
+    # Postgres returns the id from the INSERT itself
+    venue_id = db.session.execute(insert(Venue).values(fields)).inserted_primary_key[0]
+    entities_changed(Venue)
+    return venue_id
+
+
+def create_artist(fields, windows=()):
+    """Insert an artist with its availability ``windows``; returns its id."""
+    table = _availability
+    if not windows or db.engine.dialect.name != 'postgresql':
+        artist_id = db.session.execute(insert(Artist).values(fields)).inserted_primary_key[0]
+        if windows:
+            db.session.execute(table.insert(), [{
+                'artist_id': artist_id,
+                'day_of_week': day_of_week,
+                'start_time': start_time,
+                'end_time': end_time,
+            } for day_of_week, start_time, end_time in windows])
+        entities_changed(Artist)
+        return artist_id
+
+    artist = insert(Artist).values(fields).returning(Artist.id).cte('new_artist')
+    statement = table.insert().from_select(
+        ['artist_id', 'day_of_week', 'start_time', 'end_time'],
+        select(artist.c.id, *_unnest_windows())
+    ).returning(table.c.artist_id)
+    artist_id = db.session.execute(statement, _window_params(windows)).first().artist_id
+    entities_changed(Artist)
+    return artist_id
+
+
+def update_entity(model, entity_id, fields):
+    """Update the venue or artist ``entity_id`` with the columns of
+    ``fields`` that differ from what is stored. Returns the changed
+    columns and their new values, or None when there is no such row.
+
+    A venue that moves to another state gets that state's time zone.
+    """
+    table = model.__table__
+    row = db.session.execute(
+        select(*[table.c[column] for column in fields]).where(table.c.id == entity_id).with_for_update()
+    ).first()
+    if row is None:
+        return None
+    changed = {column: value for column, value in fields.items() if row._mapping[column] != value}
+    if model is Venue and 'state' in changed:
+        changed['timezone'] = state_timezone(changed['state'])
+    if changed:
+        db.session.execute(update(table).where(table.c.id == entity_id).values(changed))
+        entities_changed(model)
+    return changed
+
+
+def replace_availabilities(artist_id, windows):
+    """Make ``windows`` the artist's availability windows, keeping the rows
+    of those it already has. Returns whether any row was deleted or added."""
+    table = _availability
+    if windows and db.engine.dialect.name == 'postgresql':
+        return bool(db.session.execute(_REPLACE_AVAILABILITIES,
+                                       dict(_window_params(windows), artist_id=artist_id)).scalar())
+
+    existing = db.session.execute(
+        select(table.c.id, *_window_columns).where(table.c.artist_id == artist_id))
+    have = {(row.day_of_week, row.start_time, row.end_time): row.id for row in existing}
+    keep = set(windows)
+    stale = [id for key, id in have.items() if key not in keep]
+    missing = [key for key in windows if key not in have]
+    if stale:
+        db.session.execute(delete(table).where(table.c.id.in_(stale)))
+    if missing:
+        db.session.execute(table.insert(), [{
+            'artist_id': artist_id,
+            'day_of_week': day_of_week,
+            'start_time': start_time,
+            'end_time': end_time,
+        } for day_of_week, start_time, end_time in missing])
+    return bool(stale or missing)